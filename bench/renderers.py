@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Throughput benchmarks for Dagny's generic renderer backends.
+
+Run from the repository root:
+
+    PYTHONPATH=src:example DJANGO_SETTINGS_MODULE=settings \\
+        python bench/renderers.py [iterations]
+
+Each benchmark renders the same data for an action with a hand-written
+`@<action>.render.<format>` backend and with the generic backend, and prints
+the number of responses per second for each.
+"""
+
+import datetime
+import decimal
+import sys
+import timeit
+
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.utils import simplejson
+
+from dagny import Resource, action, cbor
+from dagny.renderers import JSONEncoder
+from dagny.serializers import Serializer
+
+
+ROWS = [{'id': i,
+         'username': u'user%d' % i,
+         'first_name': u'Zachary',
+         'last_name': u'Voase',
+         'joined': datetime.datetime(2011, 5, 1, 12, 30, i % 60),
+         'balance': decimal.Decimal('%d.50' % i)}
+        for i in xrange(200)]
+
+
+class HandWritten(Resource):
+
+    @action
+    def index(self):
+        self.users = ROWS
+
+    @index.render.json
+    def index(self):
+        users = [dict(user, joined=user['joined'].isoformat(),
+                      balance=str(user['balance']))
+                 for user in self.users]
+        return HttpResponse(content=simplejson.dumps(users),
+                            content_type='application/json')
+
+
+class Generic(Resource):
+
+    @action
+    def index(self):
+        self.users = ROWS
+
+    index.exposes = 'users'
+
+
+class User(object):
+
+    def __init__(self, row):
+        self.__dict__.update(row)
+
+
+USERS = [User(row) for row in ROWS]
+
+USER_SERIALIZER = Serializer('id', 'username', 'first_name', 'last_name')
+
+
+def user_to_dict(user):
+    return {
+        "id": user.id,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name
+    }
+
+
+def make_bench(resource_cls, request):
+    resource = resource_cls._new(request)
+    bound_action = resource.index
+    return lambda: bound_action()
+
+
+def report(name, timer, iterations):
+    elapsed = min(timeit.repeat(timer, number=iterations, repeat=3))
+    print "%-30s %10.1f responses/sec" % (name, iterations / elapsed)
+
+
+def report_size(name, data):
+    print "%-30s %10d bytes" % (name, len(data))
+
+
+def main(iterations=200):
+    request = RequestFactory().get('/users/', HTTP_ACCEPT='application/json')
+    print "JSON (%d rows per response):" % (len(ROWS),)
+    report("  hand-written json_response", make_bench(HandWritten, request),
+           iterations)
+    report("  render_json", make_bench(Generic, request), iterations)
+
+    print "Serializing (%d objects):" % (len(USERS),)
+    report("  user_to_dict() per object",
+           lambda: [user_to_dict(user) for user in USERS], iterations)
+    report("  Serializer.serialize_many()",
+           lambda: USER_SERIALIZER.serialize_many(USERS), iterations)
+    report("  Serializer.rows()",
+           lambda: list(USER_SERIALIZER.rows(USERS)), iterations)
+
+    print "JSON vs. CBOR (%d rows):" % (len(ROWS),)
+    encoder = JSONEncoder()
+    json_data, cbor_data = encoder.encode(ROWS), cbor.dumps(ROWS)
+    report_size("  JSON size", json_data)
+    report_size("  CBOR size", cbor_data)
+    report("  JSON encode", lambda: encoder.encode(ROWS), iterations)
+    report("  CBOR encode", lambda: cbor.dumps(ROWS), iterations)
+    report("  JSON decode", lambda: simplejson.loads(json_data), iterations)
+    report("  CBOR decode", lambda: cbor.loads(cbor_data), iterations)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Throughput benchmarks for the generic HTML backend's template engines.
+
+Run from the repository root:
+
+    PYTHONPATH=src:example:. DJANGO_SETTINGS_MODULE=settings \\
+        python bench/templates.py [users] [iterations]
+
+This renders the example app's `auth/user/index.html` for a collection of
+users with Django's template language and with Jinja2, and prints the number
+of responses per second for each. It also compares how soon the first chunk
+of a response is ready with and without `stream = True`. `TEMPLATE_DEBUG` is turned off, as it would
+be in production, so that compiled templates are cached.
+"""
+
+import sys
+import timeit
+
+from django.conf import settings
+from django.test.client import RequestFactory
+
+from dagny import Resource, action
+
+
+class Person(object):
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+
+class User(Resource):
+
+    template_path_prefix = 'auth/'
+
+    @action
+    def index(self):
+        self.users = USERS
+        self.page = None
+
+
+class JinjaUser(User):
+
+    template_engine = 'jinja2'
+
+    @action
+    def index(self):
+        self.users = USERS
+        self.page = None
+
+    index.template_name = 'auth/user/index.html'
+
+
+class StreamingUser(User):
+
+    @action
+    def index(self):
+        self.users = USERS
+        self.page = None
+
+    index.template_name = 'auth/user/index.html'
+    index.stream = True
+
+
+USERS = []
+
+
+def make_bench(resource_cls, request):
+    resource = resource_cls._new(request)
+    resource._called_yet = True  # As if it had been dispatched by a URLconf.
+    bound_action = resource.index
+    return lambda: bound_action()
+
+
+def make_first_chunk_bench(resource_cls, request):
+    bench = make_bench(resource_cls, request)
+    return lambda: iter(bench()).next()
+
+
+def report(name, timer, iterations):
+    elapsed = min(timeit.repeat(timer, number=iterations, repeat=3))
+    print "%-30s %10.1f responses/sec" % (name, iterations / elapsed)
+
+
+def main(users=1000, iterations=50):
+    settings.TEMPLATE_DEBUG = False
+    USERS[:] = [Person(i, u'user%d' % i) for i in xrange(users)]
+
+    request = RequestFactory().get('/users/', HTTP_ACCEPT='text/html')
+    print "HTML (%d users per response):" % (users,)
+    report("  Django templates", make_bench(User, request), iterations)
+    report("  Jinja2", make_bench(JinjaUser, request), iterations)
+    report("  Django templates, streamed",
+           lambda: ''.join(make_bench(StreamingUser, request)()), iterations)
+
+    print "Time to first chunk (%d users per response):" % (users,)
+    report("  Django templates", make_first_chunk_bench(User, request),
+           iterations)
+    report("  Django templates, streamed",
+           make_first_chunk_bench(StreamingUser, request), iterations)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
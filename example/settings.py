@@ -31,6 +31,19 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Used by the tests as a cache shared between processes.
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 TIME_ZONE = 'GMT'
 LANGUAGE_CODE = 'en-us'
 SITE_ID = 1
@@ -72,5 +85,6 @@ INSTALLED_APPS = (
     'django.contrib.sites',
     'django.contrib.messages',
 
+    'dagny',
     'users',
 )
@@ -14,6 +14,8 @@ urlpatterns = patterns('',
                                            name='UserAtomPub')),
     (r'^users-rails', rails.resources('users.resources.User',
                                       name='UserRails')),
+    (r'^users-bulk/', resources('users.resources.User', name='UserBulk',
+                                bulk=True)),
 
     (r'^account/', resource('users.resources.Account', name='Account')),
     (r'^account-atompub/', atompub.resource('users.resources.Account',
@@ -21,5 +23,8 @@ urlpatterns = patterns('',
     (r'^account-rails', rails.resource('users.resources.Account',
                                         name='AccountRails')),
 
+    (r'^batch/$', 'dagny.batch.batch', {'max_requests': 5}),
+    (r'^batch-parallel/$', 'dagny.batch.batch', {'parallel': True}),
+
     (r'^admin/', include(admin.site.urls)),
 )
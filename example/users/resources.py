@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
-from dagny import Resource, action
+from dagny import Resource, action, bulk
+from dagny.pagination import Paginator, paginate
 from dagny.renderer import Skip
+from dagny.serializers import Serializer
 from django.contrib.auth import forms, models
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect
 import simplejson
 
@@ -12,14 +14,14 @@ import simplejson
 class User(Resource):
 
     template_path_prefix = 'auth/'
+    paginator = Paginator(ordering=('username',), per_page=20)
+    serializer = Serializer('username', 'first_name', 'last_name')
 
     @action
     def index(self):
-        self.users = models.User.objects.all()
+        self.users = paginate(self, models.User.objects.all())
 
-    @index.render.json
-    def index(self):
-        return json_response([user_to_dict(user) for user in self.users])
+    index.exposes = 'users'
 
     # Stub to test that skipping works.
     @index.render.xml
@@ -43,9 +45,7 @@ class User(Resource):
     def show(self, user_id):
         self.user = get_object_or_404(models.User, id=int(user_id))
 
-    @show.render.json
-    def show(self):
-        return json_response(user_to_dict(self.user))
+    show.exposes = 'user'
 
     @action
     def edit(self, user_id):
@@ -68,6 +68,32 @@ class User(Resource):
         self.user.delete()
         return redirect('User#index')
 
+    @action
+    def bulk_create(self):
+        try:
+            items = bulk.parse_items(self.request)
+        except ValueError:
+            return HttpResponseBadRequest()
+        return json_response(bulk.create_all(forms.UserCreationForm, items))
+
+    @action
+    def bulk_update(self):
+        try:
+            items = bulk.parse_items(self.request)
+        except ValueError:
+            return HttpResponseBadRequest()
+        return json_response(bulk.update_all(
+            forms.UserChangeForm, models.User.objects.all(), items,
+            partial=(self.request.method == 'PATCH')))
+
+    @action
+    def bulk_destroy(self):
+        try:
+            ids = bulk.parse_ids(self.request)
+        except ValueError:
+            return HttpResponseBadRequest()
+        return json_response(bulk.destroy_all(models.User.objects.all(), ids))
+
 
 # A stub resource for the routing tests.
 class Account(Resource):
@@ -77,20 +103,11 @@ class Account(Resource):
     @action
     @action.deco(login_required)
     def show(self):
-        return
+        self.account = {'username': self.request.user.username}
 
-    @show.render.json
-    def show(self):
-        return json_response({'username': self.request.user.username})
+    show.exposes = 'account'
 
 
 def json_response(data):
     return HttpResponse(content=simplejson.dumps(data),
                         content_type='application/json')
-
-def user_to_dict(user):
-    return {
-        "username": user.username,
-        "first_name": user.first_name,
-        "last_name": user.last_name
-    }
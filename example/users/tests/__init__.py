@@ -2,3 +2,25 @@ from test_decoration import *
 from test_integration import *
 from test_rendering import *
 from test_routing import *
+from test_warmup import *
+from test_checks import *
+from test_batch import *
+from test_bulk import *
+from test_pagination import *
+from test_json import *
+from test_serializers import *
+from test_columns import *
+from test_streaming import *
+from test_cbor import *
+from test_templates import *
+from test_jinja import *
+from test_files import *
+from test_cache import *
+from test_conditional import *
+from test_cachecontrol import *
+from test_coalesce import *
+from test_shm import *
+from test_fragments import *
+from test_objectcache import *
+from test_export import *
+from test_pjax import *
@@ -0,0 +1,110 @@
+from django.contrib.auth import models
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.utils import simplejson
+
+from dagny import batch
+
+
+class BatchTest(TestCase):
+
+    def batch(self, entries, url='/batch/'):
+        response = self.client.post(url, simplejson.dumps(entries),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return simplejson.loads(response.content)
+
+    def test_runs_each_request(self):
+        user = models.User.objects.create_user("zack", "z@zacharyvoase.com",
+                                               "hello")
+        results = self.batch([
+            {'path': '/users/%d/' % user.id,
+             'headers': {'Accept': 'application/json'}},
+            {'path': '/users/?format=json'},
+            {'path': '/users/new/'},
+        ])
+
+        self.assertEqual([result['status'] for result in results],
+                         [200, 200, 200])
+        self.assertEqual(simplejson.loads(results[0]['body'])['username'],
+                         'zack')
+        self.assertEqual(results[0]['headers']['Content-Type'],
+                         'application/json')
+        self.assertEqual(len(simplejson.loads(results[1]['body'])), 1)
+        assert '<form method="post" action="/users/">' in results[2]['body']
+
+    def test_mutating_requests(self):
+        user = models.User.objects.create_user("zack", "z@zacharyvoase.com",
+                                               "hello")
+        results = self.batch([
+            {'method': 'DELETE', 'path': '/users/%d/' % user.id},
+            {'path': '/users/%d/' % user.id},
+        ])
+
+        self.assertEqual(results[0]['status'], 302)
+        self.assertEqual(results[1]['status'], 404)
+        self.assertEqual(models.User.objects.count(), 0)
+
+    def test_only_resources_can_be_requested(self):
+        results = self.batch([{'path': '/admin/'}, {'path': '/nowhere/'},
+                              {'path': '/batch/', 'method': 'POST'}])
+        self.assertEqual([result['status'] for result in results],
+                         [404, 404, 404])
+
+    def test_limits(self):
+        response = self.client.post('/batch/',
+                                    simplejson.dumps([{'path': '/users/'}] * 6),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+
+    def test_invalid_batches(self):
+        self.assertEqual(self.client.get('/batch/').status_code, 405)
+        for body in ('not json', '{"path": "/users/"}', '[{"method": "GET"}]'):
+            response = self.client.post('/batch/', body,
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_parallel(self):
+        results = self.batch([{'path': '/users/new/'}] * 4 +
+                             [{'path': '/account/'}],
+                             url='/batch-parallel/')
+        self.assertEqual([result['status'] for result in results],
+                         [200, 200, 200, 200, 302])
+
+    def test_parallel_after_writes(self):
+        # These users aren't committed, so reading them on other threads'
+        # connections would miss them; the reads are run in order instead.
+        users = [models.User.objects.create(username=name)
+                 for name in ('zack', 'ben', 'chris')]
+        results = self.batch([{'path': '/users/%d/' % user.id,
+                               'headers': {'Accept': 'application/json'}}
+                              for user in users],
+                             url='/batch-parallel/')
+        self.assertEqual([result['status'] for result in results],
+                         [200, 200, 200])
+        self.assertEqual([simplejson.loads(result['body'])['username']
+                          for result in results], ['zack', 'ben', 'chris'])
+
+    def test_parallel_requests_get_own_session(self):
+        request = RequestFactory().post('/batch/')
+        request.session = SessionStore()
+        request.user = models.AnonymousUser()
+        seen = []
+
+        def run_entry(request, entry):
+            seen.append(request)
+            return {}
+        original, batch.run_entry = batch.run_entry, run_entry
+        try:
+            batch.run_parallel(request, [{'path': '/users/'}] * 3, 3)
+        finally:
+            batch.run_entry = original
+
+        self.assertEqual(len(seen), 3)
+        sessions = set(id(subrequest.session) for subrequest in seen)
+        users = set(id(subrequest.user) for subrequest in seen)
+        self.assertEqual(len(sessions), 3)
+        self.assertEqual(len(users), 3)
+        assert id(request.session) not in sessions
+        assert id(request.user) not in users
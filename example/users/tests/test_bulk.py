@@ -0,0 +1,143 @@
+import copy
+
+from django.contrib.auth import forms, models
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils import simplejson
+
+from dagny import bulk
+
+
+class BulkTest(TestCase):
+
+    def create_users(self, *usernames):
+        return [models.User.objects.create_user(username,
+                                                "%s@example.com" % username,
+                                                "hello")
+                for username in usernames]
+
+    def request(self, method, data, **extra):
+        response = getattr(self.client, method)(
+            '/users-bulk/', simplejson.dumps(data),
+            content_type='application/json', **extra)
+        self.assertEqual(response.status_code, 200)
+        return simplejson.loads(response.content)
+
+    def test_routes(self):
+        for action in ('index', 'create', 'bulk_create', 'bulk_update',
+                       'bulk_destroy'):
+            self.assertEqual(reverse('UserBulk#' + action), '/users-bulk/')
+
+    def test_bulk_create(self):
+        results = self.request('post', [
+            {'username': 'one', 'password1': 'a', 'password2': 'a'},
+            {'username': '!!', 'password1': 'a', 'password2': 'a'},
+            {'username': 'two', 'password1': 'a', 'password2': 'a'},
+        ])
+
+        self.assertEqual([result['status'] for result in results],
+                         [201, 400, 201])
+        assert 'username' in results[1]['errors']
+        self.assertEqual(
+            sorted(models.User.objects.values_list('username', flat=True)),
+            ['one', 'two'])
+
+    def test_bulk_create_duplicates(self):
+        results = self.request('post', [
+            {'username': 'one', 'password1': 'a', 'password2': 'a'},
+            {'username': 'one', 'password1': 'b', 'password2': 'b'},
+        ])
+
+        self.assertEqual([result['status'] for result in results], [201, 400])
+        assert 'username' in results[1]['errors']
+        self.assertEqual(models.User.objects.count(), 1)
+
+    def test_create_all_conflict(self):
+        # Another request creates the same user between validation and save.
+        class RacingForm(forms.UserCreationForm):
+            def save(self, commit=True):
+                if not models.User.objects.filter(username='one').exists():
+                    models.User.objects.create_user('one', '', 'a')
+                return super(RacingForm, self).save(commit=commit)
+
+        results = bulk.create_all(RacingForm, [
+            {'username': 'one', 'password1': 'a', 'password2': 'a'}])
+        self.assertEqual(results[0]['status'], 409)
+
+    def test_bulk_create_without_ids(self):
+        # Like Django 1.4's `bulk_create()`, which doesn't set primary keys.
+        def bulk_create(objects):
+            for obj in objects:
+                copy.copy(obj).save()
+        manager = models.User._default_manager
+        manager.bulk_create = bulk_create
+        try:
+            results = bulk.create_all(forms.UserCreationForm, [
+                {'username': 'one', 'password1': 'a', 'password2': 'a'}])
+        finally:
+            del manager.bulk_create
+        self.assertEqual(results, [{'status': 201}])
+        assert models.User.objects.filter(username='one').exists()
+
+    def test_destroy_all_using(self):
+        user, = self.create_users('zack')
+        results = bulk.destroy_all(models.User.objects.all(), [user.pk],
+                                   using='default')
+        self.assertEqual(results, [{'status': 204, 'id': user.pk}])
+        self.assertEqual(models.User.objects.count(), 0)
+
+    def test_form_post_still_creates(self):
+        response = self.client.post('/users-bulk/', {
+            'username': 'zack', 'password1': 'hello', 'password2': 'hello'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(models.User.objects.count(), 1)
+
+    def test_bulk_update(self):
+        one, two = self.create_users('one', 'two')
+        results = self.request('put', [
+            {'id': one.id, 'first_name': 'One'},
+            {'id': two.id, 'first_name': 'Two'},
+            {'id': 12345, 'first_name': 'Nobody'},
+            {'first_name': 'No id'},
+        ], REQUEST_METHOD='PATCH')  # The test client has no `patch()`.
+
+        self.assertEqual([result['status'] for result in results],
+                         [200, 200, 404, 400])
+        self.assertEqual(models.User.objects.get(id=one.id).first_name, 'One')
+        self.assertEqual(models.User.objects.get(id=two.id).first_name, 'Two')
+
+    def test_bulk_update_duplicate_ids(self):
+        one, = self.create_users('one')
+        results = self.request('put', [
+            {'id': one.id, 'first_name': 'First'},
+            {'id': one.id, 'first_name': 'Second'},
+        ], REQUEST_METHOD='PATCH')
+
+        self.assertEqual([result['status'] for result in results], [200, 400])
+        self.assertEqual(results[1]['id'], one.id)
+        self.assertEqual(models.User.objects.get(id=one.id).first_name,
+                         'First')
+
+    def test_bulk_update_requires_full_objects_for_put(self):
+        one, = self.create_users('one')
+        results = self.request('put', [{'id': one.id, 'first_name': 'One'}])
+
+        self.assertEqual(results[0]['status'], 400)
+        self.assertEqual(results[0]['id'], one.id)
+
+    def test_bulk_destroy(self):
+        one, two, three = self.create_users('one', 'two', 'three')
+        response = self.client.delete('/users-bulk/',
+                                      {'ids': '%d,%d,999' % (one.id, two.id)})
+        results = simplejson.loads(response.content)
+
+        self.assertEqual([result['status'] for result in results],
+                         [204, 204, 404])
+        self.assertEqual(list(models.User.objects.values_list('id', flat=True)),
+                         [three.id])
+
+    def test_bulk_routes_are_opt_in(self):
+        response = self.client.delete('/users/', {'ids': '1'})
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(sorted(response['Allow'].split(', ')),
+                         ['GET', 'POST'])
@@ -0,0 +1,353 @@
+import time
+
+from django.conf.urls.defaults import patterns
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse, HttpResponseForbidden
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.utils import simplejson
+
+from dagny import Resource, action
+from dagny.cache import (GENERATION_TIMEOUT, ResponseCache, copy_request,
+                         get_backend)
+from dagny.renderer import Skip
+from dagny.urls import resources
+
+
+NOTES = {}
+RUNS = []
+
+
+class Note(Resource):
+
+    @action
+    def index(self):
+        RUNS.append('index')
+        self.notes = sorted(NOTES.values())
+
+    index.exposes = 'notes'
+    index.cache = ResponseCache(timeout=60)
+
+    @action
+    def create(self):
+        NOTES[self.request.POST['id']] = self.request.POST['text']
+        return HttpResponse(status=201)
+
+    @action
+    def show(self, note_id):
+        RUNS.append('show ' + note_id)
+        if note_id not in NOTES:
+            return HttpResponse(status=404)
+        self.note = NOTES[note_id]
+        self.language = self.request.META.get('HTTP_ACCEPT_LANGUAGE')
+
+    show.exposes = ('note', 'language')
+    show.cache = ResponseCache(timeout=60, vary_on=('Accept-Language',))
+
+    @action
+    def update(self, note_id):
+        NOTES[note_id] = self.request.POST['text']
+        return HttpResponse(status=204)
+
+    # There are no templates for this resource.
+    del index.render['html'], show.render['html']
+
+
+class Feed(Resource):
+
+    @action
+    def index(self):
+        RUNS.append('feed')
+        self.notes = sorted(NOTES.values())
+
+    index.exposes = 'notes'
+    index.cache = ResponseCache(timeout=60, stale_while_revalidate=600)
+    del index.render['html']
+
+
+class Choice(Resource):
+
+    @action
+    def index(self):
+        RUNS.append('choice')
+
+    index.cache = ResponseCache(timeout=60)
+
+    @index.render.json
+    def index(self):
+        raise Skip
+
+    @index.render.xml
+    def index(self):
+        return HttpResponse('<choice/>', mimetype='application/xml')
+
+    @index.render.html
+    def index(self):
+        return HttpResponse('<p>choice</p>')
+
+
+class SharedNote(Resource):
+
+    @action
+    def show(self, note_id):
+        RUNS.append('shared ' + note_id)
+        self.note = NOTES[note_id]
+
+    show.exposes = 'note'
+    show.cache = ResponseCache(timeout=60, cache='shared')
+
+    @action
+    def update(self, note_id):
+        NOTES[note_id] = self.request.POST['text']
+        return HttpResponse(status=204)
+
+    del show.render['html']
+
+
+def token_required(view):
+    def wrapper(request, *args, **kwargs):
+        if request.META.get('HTTP_X_TOKEN') != 'secret':
+            return HttpResponseForbidden()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class Greeting(Resource):
+
+    @action
+    @action.deco(token_required)
+    def index(self):
+        RUNS.append('greeting')
+        user = self.request.user
+        self.name = user.username if user.is_authenticated() else 'stranger'
+
+    index.exposes = 'name'
+    index.cache = ResponseCache(timeout=60)
+    del index.render['html']
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^notes/', resources('users.tests.test_cache.Note', name='Note',
+                           actions=['index', 'create', 'show', 'update'])),
+    (r'^feed/', resources('users.tests.test_cache.Feed', name='Feed',
+                          actions=['index'])),
+    (r'^choices/', resources('users.tests.test_cache.Choice', name='Choice',
+                             actions=['index'])),
+    (r'^shared-notes/', resources('users.tests.test_cache.SharedNote',
+                                  name='SharedNote',
+                                  actions=['show', 'update'])),
+    (r'^greetings/', resources('users.tests.test_cache.Greeting',
+                               name='Greeting', actions=['index'])),
+)
+
+
+class ResponseCacheTest(TestCase):
+
+    urls = 'users.tests.test_cache'
+
+    def setUp(self):
+        get_backend().clear()
+        get_backend('shared').clear()
+        NOTES.clear()
+        NOTES.update({'1': 'one', '2': 'two'})
+        del RUNS[:]
+
+    def get(self, path, accept='application/json', **headers):
+        response = self.client.get(path, HTTP_ACCEPT=accept, **headers)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return simplejson.loads(response.content)
+
+    def test_hit(self):
+        self.assertEqual(self.get('/notes/'), ['one', 'two'])
+        NOTES['3'] = 'changed behind the cache'
+        self.assertEqual(self.get('/notes/'), ['one', 'two'])
+        self.assertEqual(RUNS, ['index'])
+
+    def test_keyed_on_negotiated_format(self):
+        self.get('/notes/')
+        # A different, but equivalent, Accept header shares the entry.
+        self.get('/notes/', accept='application/json, text/javascript, */*')
+        self.assertEqual(RUNS, ['index'])
+
+        response = self.client.get('/notes/',
+                                   HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(RUNS, ['index', 'index'])
+
+    def test_keyed_on_rendering_backend(self):
+        # Both headers match JSON first, but it raises `Skip`, so they get
+        # different representations, which mustn't share an entry.
+        html = self.client.get('/choices/',
+                               HTTP_ACCEPT='application/json, text/html')
+        xml = self.client.get('/choices/',
+                              HTTP_ACCEPT='application/json, application/xml')
+        self.assertEqual(html.content, '<p>choice</p>')
+        self.assertEqual(xml.content, '<choice/>')
+        self.assertEqual(RUNS, ['choice', 'choice'])
+
+        self.client.get('/choices/', HTTP_ACCEPT='application/json, text/html')
+        self.assertEqual(RUNS, ['choice', 'choice'])
+
+    def test_vary_on(self):
+        self.assertEqual(self.get('/notes/1/', HTTP_ACCEPT_LANGUAGE='en'),
+                         {'note': 'one', 'language': 'en'})
+        self.assertEqual(self.get('/notes/1/', HTTP_ACCEPT_LANGUAGE='fr'),
+                         {'note': 'one', 'language': 'fr'})
+        self.get('/notes/1/', HTTP_ACCEPT_LANGUAGE='en')
+        self.assertEqual(RUNS, ['show 1', 'show 1'])
+
+    def test_errors_are_not_cached(self):
+        response = self.client.get('/notes/3/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 404)
+        NOTES['3'] = 'three'
+        self.assertEqual(self.get('/notes/3/')['note'], 'three')
+
+    def test_update_invalidates_member_and_collection(self):
+        self.get('/notes/')
+        self.get('/notes/1/')
+        self.get('/notes/2/')
+        response = self.client.post('/notes/1/', {'_method': 'PUT',
+                                                  'text': 'uno'})
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.get('/notes/'), ['two', 'uno'])
+        self.assertEqual(self.get('/notes/1/')['note'], 'uno')
+        self.get('/notes/2/')
+        self.assertEqual(RUNS, ['index', 'show 1', 'show 2',
+                                'index', 'show 1'])
+
+    def test_create_invalidates_collection(self):
+        self.get('/notes/')
+        self.get('/notes/1/')
+        self.client.post('/notes/', {'id': '3', 'text': 'three'})
+
+        self.assertEqual(self.get('/notes/'), ['one', 'three', 'two'])
+        self.get('/notes/1/')
+        self.assertEqual(RUNS, ['index', 'show 1', 'index'])
+
+    def test_decorators_run_on_hits(self):
+        self.assertEqual(self.get('/greetings/', HTTP_X_TOKEN='secret'),
+                         'stranger')
+        self.assertEqual(self.get('/greetings/', HTTP_X_TOKEN='secret'),
+                         'stranger')
+        response = self.client.get('/greetings/',
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(RUNS, ['greeting'])
+
+    def test_logged_in_requests_bypass_cache(self):
+        User.objects.create_user('zack', 'zack@example.com', 'password')
+        assert self.client.login(username='zack', password='password')
+        self.assertEqual(self.get('/greetings/', HTTP_X_TOKEN='secret'),
+                         'zack')
+        self.client.logout()
+        self.assertEqual(self.get('/greetings/', HTTP_X_TOKEN='secret'),
+                         'stranger')
+        self.assertEqual(self.get('/greetings/', HTTP_X_TOKEN='secret'),
+                         'stranger')
+        self.assertEqual(RUNS, ['greeting', 'greeting'])
+
+    def test_generation_eviction(self):
+        self.get('/notes/1/')
+        NOTES['1'] = 'uno'
+        # Losing the counters must not resurrect (or keep) older entries.
+        backend = get_backend()
+        for key in backend._cache.keys():
+            if ':generation:' in key:
+                del backend._cache[key], backend._expire_info[key]
+        self.assertEqual(self.get('/notes/1/')['note'], 'uno')
+
+    def test_generations_kept_with_entries(self):
+        self.get('/shared-notes/1/')
+        shared = get_backend('shared')
+        keys = [key for key in shared._cache if ':generation:' in key]
+        assert keys
+        for key in keys:
+            self.assertAlmostEqual(shared._expire_info[key],
+                                   time.time() + GENERATION_TIMEOUT, delta=5)
+        assert not any(':generation:' in key for key in get_backend()._cache)
+
+        # Another process, with its own `default` cache, sees invalidations.
+        get_backend().clear()
+        self.client.post('/shared-notes/1/', {'_method': 'PUT',
+                                              'text': 'uno'})
+        self.assertEqual(self.get('/shared-notes/1/'), 'uno')
+        self.assertEqual(RUNS, ['shared 1', 'shared 1'])
+
+
+class StaleWhileRevalidateTest(TestCase):
+
+    urls = 'users.tests.test_cache'
+
+    def setUp(self):
+        get_backend().clear()
+        NOTES.clear()
+        NOTES.update({'1': 'one'})
+        del RUNS[:]
+
+    def get(self):
+        response = self.client.get('/feed/', HTTP_ACCEPT='application/json')
+        return simplejson.loads(response.content)
+
+    def key(self):
+        request = RequestFactory().get('/feed/', HTTP_ACCEPT='application/json')
+        return Feed.index.cache.key(Feed._new(request).index, 'json')
+
+    def expire(self):
+        # Make the entry stale, without waiting for its timeout.
+        backend = get_backend()
+        fresh_until, response = backend.get(self.key())
+        backend.set(self.key(), (0, response))
+
+    def wait_for_refresh(self):
+        deadline = time.time() + 5
+        while get_backend().get(self.key() + ':refresh') is not None:
+            assert time.time() < deadline, "Timed out"
+            time.sleep(0.01)
+
+    def test_fresh_entry(self):
+        self.get()
+        self.get()
+        self.assertEqual(RUNS, ['feed'])
+
+    def test_stale_entry_is_served_and_refreshed(self):
+        self.get()
+        NOTES['2'] = 'two'
+        self.expire()
+
+        self.assertEqual(self.get(), ['one'])
+        self.wait_for_refresh()
+        self.assertEqual(RUNS, ['feed', 'feed'])
+        self.assertEqual(self.get(), ['one', 'two'])
+        self.assertEqual(RUNS, ['feed', 'feed'])
+
+    def test_one_refresh_at_a_time(self):
+        self.get()
+        self.expire()
+        get_backend().add(self.key() + ':refresh', 1)
+
+        self.assertEqual(self.get(), ['one'])
+        self.assertEqual(RUNS, ['feed'])
+
+    def test_stored_with_hard_timeout(self):
+        self.get()
+        expiry = get_backend()._expire_info[':1:' + self.key()]
+        self.assertAlmostEqual(expiry, time.time() + 660, delta=5)
+
+    def test_refresh_uses_copy_of_request(self):
+        request = RequestFactory().get('/feed/', HTTP_ACCEPT='application/json')
+        request.user = User.objects.create(username='zack')
+        request.session = SessionStore()
+        request.session['cart'] = [1]
+        request.session.save()
+
+        clone = copy_request(request)
+        request.META['HTTP_ACCEPT'] = 'text/html'
+        request.user.username = 'changed'
+        request.session['cart'].append(2)
+        self.assertEqual(clone.META['HTTP_ACCEPT'], 'application/json')
+        self.assertEqual(clone.user.username, 'zack')
+        self.assertEqual(clone.session['cart'], [1])
+        self.assertEqual(clone.get_full_path(), '/feed/')
@@ -0,0 +1,115 @@
+from django.conf.urls.defaults import patterns
+from django.http import HttpResponse
+from django.test import TestCase
+
+from dagny import Resource, action
+from dagny.cache import ResponseCache
+from dagny.cachecontrol import CacheControl
+from dagny.urls import resources
+
+
+class Page(Resource):
+
+    cache_control = CacheControl(public=True, max_age=60, s_maxage=600,
+                                 stale_if_error=86400)
+
+    @action
+    def index(self):
+        self.pages = ['home', 'about']
+
+    index.exposes = 'pages'
+
+    @index.etag
+    def index(self):
+        return 'pages-v1'
+
+    @action
+    def new(self):
+        # Returns its own response, so the renderer is never involved.
+        return HttpResponse('<form>...</form>')
+
+    @action
+    def show(self, page_id):
+        self.page = page_id
+
+    show.exposes = 'page'
+    show.cache = ResponseCache(vary_on=('user', 'Accept-Language'))
+    show.cache_control = CacheControl(private=True, no_cache=True)
+
+    @index.render.html
+    def index(self):
+        return HttpResponse('<ul>...</ul>')
+
+    @show.render.html
+    def show(self):
+        return HttpResponse('<p>...</p>')
+
+    @action
+    def create(self):
+        response = self.index.render()
+        response.status_code = 201
+        return response
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^pages/', resources('users.tests.test_cachecontrol.Page', name='Page',
+                           actions=['index', 'new', 'show', 'create'])),
+)
+
+
+class CacheControlTest(TestCase):
+
+    urls = 'users.tests.test_cachecontrol'
+
+    def test_resource_policy(self):
+        response = self.client.get('/pages/')
+        self.assertEqual(response['Cache-Control'],
+                         'public, max-age=60, s-maxage=600, '
+                         'stale-if-error=86400')
+        self.assertEqual(response['Vary'], 'Accept, X-PJAX')
+
+    def test_action_policy(self):
+        response = self.client.get('/pages/1/',
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        self.assertEqual(response['Vary'], 'Accept, X-PJAX, Cookie, Accept-Language')
+
+    def test_not_modified(self):
+        response = self.client.get('/pages/',
+                                   HTTP_IF_NONE_MATCH='"pages-v1"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Cache-Control'],
+                         'public, max-age=60, s-maxage=600, '
+                         'stale-if-error=86400')
+        self.assertEqual(response['Vary'], 'Accept, X-PJAX')
+
+    def test_response_returned_by_action(self):
+        response = self.client.get('/pages/new/')
+        self.assertEqual(response.content, '<form>...</form>')
+        self.assertEqual(response['Cache-Control'],
+                         'public, max-age=60, s-maxage=600, '
+                         'stale-if-error=86400')
+        self.assertEqual(response['Vary'], 'Accept, X-PJAX')
+
+    def test_unsafe_methods_are_not_cacheable(self):
+        response = self.client.post('/pages/')
+        self.assertEqual(response.status_code, 201)
+        assert not response.has_header('Cache-Control')
+        self.assertEqual(response['Vary'], 'Accept, X-PJAX')
+
+    def test_single_backend_does_not_vary(self):
+        backends = Page.index.render._items()
+        for shortcode, backend in backends:
+            if shortcode != 'html':
+                del Page.index.render[shortcode]
+        try:
+            response = self.client.get('/pages/')
+        finally:
+            Page.index.render._clear()
+            Page.index.render._update(backends)
+        assert not response.has_header('Vary')
+
+    def test_both_public_and_private(self):
+        self.assertRaises(ValueError, CacheControl, public=True, private=True)
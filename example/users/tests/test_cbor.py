@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import decimal
+import uuid
+
+from django.contrib.auth import models
+from django.test import TestCase
+
+from dagny import cbor
+
+
+class CBORTest(TestCase):
+
+    def assert_round_trip(self, value, expected=None):
+        if expected is None:
+            expected = value
+        self.assertEqual(cbor.loads(cbor.dumps(value)), expected)
+
+    def test_integers(self):
+        for value in (0, 23, 24, 255, 256, 65535, 65536, 2 ** 32, 2 ** 64 - 1,
+                      2 ** 64, 2 ** 100, -1, -24, -25, -2 ** 64, -2 ** 100):
+            self.assert_round_trip(value)
+
+    def test_encodings(self):
+        # Examples from RFC 7049, appendix A.
+        self.assertEqual(cbor.dumps(1000000), '\x1a\x00\x0f\x42\x40')
+        self.assertEqual(cbor.dumps(-1000), '\x39\x03\xe7')
+        self.assertEqual(cbor.dumps(u'ü'), '\x62\xc3\xbc')
+        self.assertEqual(cbor.dumps([1, [2, 3]]), '\x82\x01\x82\x02\x03')
+        self.assertEqual(cbor.dumps(2 ** 64), '\xc2\x49\x01' + '\x00' * 8)
+        self.assertEqual(cbor.dumps(decimal.Decimal('273.15')),
+                         '\xc4\x82\x21\x19\x6a\xb3')
+
+    def test_other_types(self):
+        self.assert_round_trip(1.1)
+        self.assert_round_trip(u'café')
+        self.assert_round_trip('plain', u'plain')
+        self.assert_round_trip(bytearray('\x00\xff'), '\x00\xff')
+        self.assert_round_trip([True, False, None])
+        self.assert_round_trip({u'a': [1, {u'b': None}]})
+        self.assert_round_trip(decimal.Decimal('-10.50'))
+        self.assert_round_trip(uuid.UUID(int=1))
+        self.assert_round_trip(datetime.datetime(2011, 5, 1, 12, 30),
+                               u'2011-05-01T12:30:00')
+        self.assert_round_trip(iter([1, 2]), [1, 2])
+
+    def test_datetimes(self):
+        # Naive datetimes have no offset, so can't be tagged as RFC 3339.
+        self.assertEqual(cbor.dumps(datetime.datetime(2011, 5, 1, 12, 30)),
+                         '\x73' + '2011-05-01T12:30:00')
+
+        class Offset(datetime.tzinfo):
+            def utcoffset(self, dt):
+                return datetime.timedelta(hours=2)
+        aware = datetime.datetime(2011, 5, 1, 12, 30, tzinfo=Offset())
+        self.assertEqual(cbor.dumps(aware), '\xc0\x74' + '2011-05-01T10:30:00Z')
+
+    def test_decoding(self):
+        # Indefinite lengths, half-precision floats and unassigned tags.
+        self.assertEqual(cbor.loads('\x9f\x01\x82\x02\x03\xff'), [1, [2, 3]])
+        self.assertEqual(cbor.loads('\xbf\x61a\x01\xff'), {u'a': 1})
+        self.assertEqual(cbor.loads('\x7f\x62ab\x61c\xff'), u'abc')
+        self.assertEqual(cbor.loads('\xf9\x3e\x00'), 1.5)
+        self.assertEqual(cbor.loads('\xf9\xc4\x00'), -4.0)
+        self.assertEqual(cbor.loads('\xd8\x20\x61a'), u'a')
+
+    def test_invalid(self):
+        for data in ('', '\x82\x01', '\x01\x02', '\x1c', '\x62a'):
+            self.assertRaises(cbor.CBORDecodeError, cbor.loads, data)
+        self.assertRaises(TypeError, cbor.dumps, object())
+
+    def test_default(self):
+        self.assertEqual(cbor.loads(cbor.dumps(object(), default=repr))[:8],
+                         u'<object ')
+
+    def test_renderer(self):
+        user = models.User.objects.create_user("zack", "z@zacharyvoase.com",
+                                               "hello")
+        response = self.client.get('/users/%d/' % user.id,
+                                   HTTP_ACCEPT='application/cbor')
+        self.assertEqual(response['Content-Type'], 'application/cbor')
+        self.assertEqual(cbor.loads(response.content), {
+            u'username': u'zack',
+            u'first_name': u'',
+            u'last_name': u'',
+        })
@@ -0,0 +1,112 @@
+from StringIO import StringIO
+
+from django.conf.urls.defaults import patterns
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from dagny import Resource, action
+from dagny.checks import ERROR, WARNING, run_checks, validate
+from dagny.renderer import Skip
+from dagny.urls import resources
+
+
+class Broken(Resource):
+
+    @action
+    def index(self):
+        pass
+
+    @index.render.xml
+    def index(self):
+        raise Skip
+
+    @index.render.rss
+    def index(self):
+        pass
+
+    @action
+    def show(self, id):
+        pass
+
+    show.render['not_a_shortcode'] = lambda action, resource: None
+
+    @action
+    def edit(self, id):
+        pass
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^broken/', resources('users.tests.test_checks.Broken', name='Broken')),
+    (r'^broken-2/', resources('users.tests.test_checks.Broken', name='Broken',
+                              actions=['index'])),
+)
+
+
+class ChecksTest(TestCase):
+
+    def messages(self, level):
+        return [(msg.obj, msg.message)
+                for msg in run_checks(urlconf='users.tests.test_checks')
+                if msg.level == level]
+
+    def test_undefined_actions(self):
+        warnings = self.messages(WARNING)
+        assert (r'^broken/$',
+                "POST is routed to 'create', which is not an action on "
+                "users.tests.test_checks.Broken") in warnings
+
+    def test_duplicate_names(self):
+        errors = self.messages(ERROR)
+        assert [message for obj, message in errors
+                if obj == 'Broken#index' and
+                message.startswith('Route name is used for more than one URL')]
+
+    def test_unregistered_shortcode(self):
+        errors = self.messages(ERROR)
+        assert ('Broken#show',
+                "Renderer backend 'not_a_shortcode' has no mimetype "
+                "registered in dagny.conneg.MIMETYPES") in errors
+
+    def test_skip_order(self):
+        warnings = self.messages(WARNING)
+        assert ('Broken#index',
+                "Renderer backend(s) 'xml' may raise Skip, but are tried "
+                "before 'rss'") in warnings
+
+    def test_pagination(self):
+        warnings = self.messages(WARNING)
+        assert ('Broken#index',
+                "Resource has no `paginator`, so this index may load the "
+                "entire collection") in warnings
+
+    def test_missing_templates(self):
+        errors = self.messages(ERROR)
+        assert ('Broken#edit',
+                "Template 'broken/edit.html' does not exist") in errors
+
+    def test_missing_templates_with_own_backends(self):
+        # These actions might only be meant to render their own formats.
+        warnings = self.messages(WARNING)
+        assert ('Broken#index',
+                "Template 'broken/index.html' does not exist; if this action "
+                "isn't rendered as HTML, remove its 'html' renderer "
+                "backend") in warnings
+        assert not [message for obj, message in self.messages(ERROR)
+                    if obj == 'Broken#show' and 'Template' in message]
+
+    def test_example_project_has_no_errors(self):
+        validate()
+        self.assertRaises(ImproperlyConfigured, validate,
+                          urlconf='users.tests.test_checks')
+
+    def test_command(self):
+        stderr = StringIO()
+        call_command('checkresources', stderr=stderr, stdout=StringIO())
+        assert 'WARNING' in stderr.getvalue()
+
+        # `CommandError`s are turned into an exit status by `call_command()`.
+        self.assertRaises(SystemExit, call_command, 'checkresources',
+                          urlconf='users.tests.test_checks',
+                          stderr=StringIO(), stdout=StringIO())
@@ -0,0 +1,121 @@
+import threading
+import time
+
+from django.conf.urls.defaults import patterns
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.client import Client, RequestFactory
+from django.utils import simplejson
+
+from dagny import Resource, action
+from dagny import cache
+from dagny.cache import ResponseCache, get_backend
+from dagny.urls import resources
+
+
+GATE = threading.Event()
+RUNS = []
+
+
+class Post(Resource):
+
+    @action
+    def show(self, post_id):
+        RUNS.append('show ' + post_id)
+        GATE.wait(5)
+        self.post = 'post %s' % (post_id,)
+
+    show.exposes = 'post'
+    show.cache = ResponseCache(timeout=60, coalesce=True, coalesce_timeout=2)
+    del show.render['html']
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^posts/', resources('users.tests.test_coalesce.Post', name='Post',
+                           actions=['show'])),
+)
+
+
+class CoalesceTest(TestCase):
+
+    urls = 'users.tests.test_coalesce'
+
+    def setUp(self):
+        get_backend().clear()
+        GATE.clear()
+        del RUNS[:]
+
+    def tearDown(self):
+        GATE.set()
+
+    def get_in_thread(self, responses):
+        def get():
+            responses.append(Client().get('/posts/1/',
+                                          HTTP_ACCEPT='application/json'))
+        thread = threading.Thread(target=get)
+        thread.start()
+        return thread
+
+    def wait_for(self, condition):
+        deadline = time.time() + 5
+        while not condition():
+            assert time.time() < deadline, "Timed out"
+            time.sleep(0.01)
+
+    def key(self, shortcode=None):
+        request = RequestFactory().get('/posts/1/',
+                                       HTTP_ACCEPT='application/json')
+        resource = Post._new(request, '1')
+        return Post.show.cache.key(resource.show, shortcode)
+
+    def test_concurrent_misses_share_one_run(self):
+        responses = []
+        threads = [self.get_in_thread(responses) for i in range(5)]
+        # Once one thread is running the action, give the others time to
+        # miss too; any which are late get a hit, so can't run it either.
+        self.wait_for(lambda: RUNS)
+        time.sleep(0.2)
+        GATE.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(RUNS, ['show 1'])
+        self.assertEqual(len(responses), 5)
+        self.assertEqual(len(set(map(id, responses))), 5)
+        for response in responses:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(simplejson.loads(response.content), 'post 1')
+        self.assertEqual(cache._flights, {})
+
+    def test_waits_for_other_process(self):
+        # Another process is already running the action for this key.
+        backend = get_backend()
+        backend.add(self.key() + ':lock', 1)
+
+        def fill():
+            time.sleep(0.1)
+            backend.set(self.key('json'), HttpResponse('"from elsewhere"',
+                                          mimetype='application/json'))
+        threading.Thread(target=fill).start()
+
+        GATE.set()
+        response = self.client.get('/posts/1/', HTTP_ACCEPT='application/json')
+        self.assertEqual(simplejson.loads(response.content), 'from elsewhere')
+        self.assertEqual(RUNS, [])
+
+    def test_runs_if_other_process_gives_up(self):
+        key = self.key()
+        backend = get_backend()
+        backend.add(key + ':lock', 1)
+
+        def release():
+            time.sleep(0.1)
+            backend.delete(key + ':lock')
+        threading.Thread(target=release).start()
+
+        GATE.set()
+        response = self.client.get('/posts/1/', HTTP_ACCEPT='application/json')
+        self.assertEqual(simplejson.loads(response.content), 'post 1')
+        self.assertEqual(RUNS, ['show 1'])
+        assert backend.get(self.key('json')) is not None
@@ -0,0 +1,99 @@
+from django.conf.urls.defaults import patterns
+from django.contrib.auth import models
+from django.test import TestCase
+from django.utils import simplejson
+
+from dagny import Resource, action
+from dagny.serializers import Serializer
+from dagny.urls import resource
+
+
+COLUMNS_JSON = 'application/vnd.dagny.columns+json'
+
+
+class Directory(Resource):
+
+    serializer = Serializer('username', ('email', 'email'))
+
+    @action
+    def show(self):
+        self.users = models.User.objects.order_by('username')
+
+    show.exposes = 'users'
+
+    # There are no templates for this resource.
+    del show.render['html']
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^directory/', resource('users.tests.test_columns.Directory',
+                              name='Directory', actions=['show'])),
+)
+
+
+class ColumnarJSONTest(TestCase):
+
+    urls = 'users.tests.test_columns'
+
+    def setUp(self):
+        for username in ('ben', 'zack'):
+            models.User.objects.create_user(username,
+                                            "%s@example.com" % username,
+                                            "hello")
+
+    def get(self, path, **extra):
+        response = self.client.get(path, HTTP_ACCEPT=COLUMNS_JSON, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], COLUMNS_JSON)
+        return simplejson.loads(response.content)
+
+    def test_rows(self):
+        self.assertEqual(self.get('/directory/'), {
+            'fields': ['username', 'email'],
+            'rows': [['ben', 'ben@example.com'],
+                     ['zack', 'zack@example.com']],
+        })
+
+    def test_columns(self):
+        self.assertEqual(self.get('/directory/?orient=columns'), {
+            'fields': ['username', 'email'],
+            'columns': [['ben', 'zack'],
+                        ['ben@example.com', 'zack@example.com']],
+        })
+
+    def test_uses_values_list(self):
+        # A single query, and no model instances.
+        from django.db.models.signals import post_init
+        instances = []
+        listener = lambda sender, instance, **kwargs: instances.append(instance)
+        post_init.connect(listener, sender=models.User)
+        try:
+            self.get('/directory/')
+        finally:
+            post_init.disconnect(listener, sender=models.User)
+        self.assertEqual(instances, [])
+
+    def test_method_fields_fall_back_to_instances(self):
+        serializer = Directory.serializer
+        Directory.serializer = Serializer('username', ('name', 'get_full_name'))
+        try:
+            data = self.get('/directory/')
+        finally:
+            Directory.serializer = serializer
+        self.assertEqual(data['rows'], [['ben', ''], ['zack', '']])
+
+
+
+class ColumnarIndexTest(TestCase):
+
+    def test_paginated_index(self):
+        for username in ('ben', 'zack'):
+            models.User.objects.create_user(username,
+                                            "%s@example.com" % username,
+                                            "hello")
+        response = self.client.get('/users/?format=columns_json')
+        data = simplejson.loads(response.content)
+        self.assertEqual(data['fields'],
+                         ['username', 'first_name', 'last_name'])
+        self.assertEqual([row[0] for row in data['rows']], ['ben', 'zack'])
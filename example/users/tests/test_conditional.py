@@ -0,0 +1,141 @@
+import datetime
+
+from django.conf.urls.defaults import patterns
+from django.http import HttpResponse, HttpResponseForbidden
+from django.test import TestCase
+from django.utils.http import http_date
+
+from dagny import Resource, action
+from dagny.urls import resources
+
+
+MODIFIED = datetime.datetime(2011, 5, 1, 12, 30)
+ARTICLES = {}
+RUNS = []
+
+
+class Article(Resource):
+
+    @action
+    def show(self, article_id):
+        RUNS.append('show')
+        return HttpResponse(ARTICLES[article_id]['text'])
+
+    @show.etag
+    def show(self, article_id):
+        return 'v%d' % (ARTICLES[article_id]['version'],)
+
+    @show.last_modified
+    def show(self, article_id):
+        return ARTICLES[article_id]['modified']
+
+    @action
+    def update(self, article_id):
+        RUNS.append('update')
+        article = ARTICLES[article_id]
+        article['text'] = self.request.POST['text']
+        article['version'] += 1
+        return HttpResponse(status=204)
+
+    update.etag(show.etag_function)
+    update.last_modified(show.last_modified_function)
+
+
+def token_required(view):
+    def wrapper(request, *args, **kwargs):
+        if request.META.get('HTTP_X_TOKEN') != 'secret':
+            return HttpResponseForbidden()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class Draft(Resource):
+
+    @action
+    @action.deco(token_required)
+    def show(self, article_id):
+        RUNS.append('draft')
+        return HttpResponse(ARTICLES[article_id]['text'])
+
+    show.etag(Article.show.etag_function)
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^articles/', resources('users.tests.test_conditional.Article',
+                              name='Article', actions=['show', 'update'])),
+    (r'^drafts/', resources('users.tests.test_conditional.Draft',
+                            name='Draft', actions=['show'])),
+)
+
+
+class ConditionalTest(TestCase):
+
+    urls = 'users.tests.test_conditional'
+
+    def setUp(self):
+        ARTICLES['1'] = {'text': 'Hello', 'version': 1, 'modified': MODIFIED}
+        del RUNS[:]
+
+    def update(self, **headers):
+        return self.client.post('/articles/1/',
+                                {'_method': 'PUT', 'text': 'Bye'}, **headers)
+
+    def test_validators_are_sent(self):
+        response = self.client.get('/articles/1/')
+        self.assertEqual(response['ETag'], '"v1"')
+        self.assertEqual(response['Last-Modified'],
+                         'Sun, 01 May 2011 12:30:00 GMT')
+
+    def test_if_none_match(self):
+        response = self.client.get('/articles/1/', HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], '"v1"')
+        self.assertEqual(RUNS, [])
+
+        response = self.client.get('/articles/1/', HTTP_IF_NONE_MATCH='"v0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RUNS, ['show'])
+
+    def test_decorators_run_first(self):
+        response = self.client.get('/drafts/1/', HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get('/drafts/1/', HTTP_IF_NONE_MATCH='"v1"',
+                                   HTTP_X_TOKEN='secret')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(RUNS, [])
+
+    def test_if_modified_since(self):
+        response = self.client.get('/articles/1/',
+                                   HTTP_IF_MODIFIED_SINCE=http_date(
+                                       1304253000))
+        self.assertEqual(response.status_code, 304)
+
+        ARTICLES['1']['modified'] = MODIFIED + datetime.timedelta(seconds=1)
+        response = self.client.get('/articles/1/',
+                                   HTTP_IF_MODIFIED_SINCE=http_date(
+                                       1304253000))
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_match(self):
+        response = self.update(HTTP_IF_MATCH='"v0"')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(RUNS, [])
+
+        response = self.update(HTTP_IF_MATCH='"v1"')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(ARTICLES['1']['text'], 'Bye')
+        # The old validators don't describe the new state.
+        assert not response.has_header('ETag')
+
+    def test_if_unmodified_since(self):
+        response = self.update(HTTP_IF_UNMODIFIED_SINCE=http_date(1304252999))
+        self.assertEqual(response.status_code, 412)
+
+        response = self.update(HTTP_IF_UNMODIFIED_SINCE=http_date(1304253000))
+        self.assertEqual(response.status_code, 204)
+
+    def test_if_none_match_on_update(self):
+        response = self.update(HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(RUNS, [])
@@ -0,0 +1,173 @@
+import datetime
+import gzip
+import os
+import shutil
+import tempfile
+from StringIO import StringIO
+
+from django.conf.urls.defaults import patterns
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import TestCase
+from django.utils import simplejson
+
+from dagny import Resource, action
+from dagny.export import Export, export, export_one, iter_exports
+from dagny.urls import rails, resources
+
+
+class Profile(Resource):
+
+    export = Export(User.objects.all(), changed_field='last_login')
+
+    @action
+    def index(self):
+        self.users = [user.username * 100 for user in User.objects.all()]
+
+    index.exposes = 'users'
+
+    @action
+    def show(self, user_id=None):
+        # Rails-style URLs pass the ID as a keyword argument.
+        user_id = user_id or self.params['id']
+        self.user = User.objects.get(pk=user_id).username
+
+    show.exposes = 'user'
+
+    @action
+    def new(self):
+        self.csrf_token = get_token(self.request)
+
+    new.exposes = 'csrf_token'
+    del index.render['html'], show.render['html'], new.render['html']
+
+
+class Token(Resource):
+
+    @action
+    def index(self):
+        # Not a form route, but still different for every client.
+        self.csrf_token = get_token(self.request)
+
+    index.exposes = 'csrf_token'
+    del index.render['html']
+
+
+class Thing(Resource):
+
+    # Routed with `resources()`, but there's no `index`.
+    @action
+    def show(self, thing_id):
+        return HttpResponse(thing_id)
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^profiles/', resources('users.tests.test_export.Profile',
+                              name='Profile',
+                              actions=['index', 'new', 'show'])),
+    (r'^tokens/', resources('users.tests.test_export.Token', name='Token',
+                            actions=['index'])),
+    (r'^things/', resources('users.tests.test_export.Thing', name='Thing')),
+    (r'^profiles-rails', rails.resources('users.tests.test_export.Profile',
+                                         name='ProfileRails',
+                                         actions=['show'])),
+)
+
+
+class ExportTest(TestCase):
+
+    urls = 'users.tests.test_export'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.users = [User.objects.create(username=name)
+                      for name in ('zack', 'ben')]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, path):
+        with open(os.path.join(self.directory, path)) as exported:
+            return exported.read()
+
+    def test_iter_exports(self):
+        exports = set(iter_exports())
+        pk = self.users[0].pk
+        assert ('/profiles/', 'json') in exports
+        assert ('/profiles/%d/' % pk, 'json') in exports
+        assert ('/profiles/%d/' % pk, 'ndjson') in exports
+        assert ('/profiles-rails/%d' % pk, 'json') in exports
+        assert not any(shortcode == 'html' for url, shortcode in exports)
+        # Form routes aren't exported by default.
+        assert not any(url == '/profiles/new/' for url, shortcode in exports)
+
+    def test_missing_actions_are_skipped(self):
+        assert not any(url.startswith('/things/')
+                       for url, shortcode in iter_exports())
+
+    def test_unregistered_shortcode(self):
+        self.assertEqual(
+            export_one(('/profiles/', 'unknown', self.directory, False)),
+            ('/profiles/', 'unknown', None, 'no mimetype registered'))
+
+    def test_iter_exports_forms(self):
+        Profile.export = Export(User.objects.all(), forms=True)
+        try:
+            exports = set(iter_exports())
+        finally:
+            Profile.export = Export(User.objects.all(),
+                                    changed_field='last_login')
+        assert ('/profiles/new/', 'json') in exports
+
+    def test_export(self):
+        results = export(self.directory)
+        pk = self.users[0].pk
+
+        self.assertEqual(simplejson.loads(self.read('profiles/index.json')),
+                         ['zack' * 100, 'ben' * 100])
+        self.assertEqual(self.read('profiles/%d/index.json' % pk), '"zack"')
+        self.assertEqual(self.read('profiles-rails/%d.json' % pk), '"zack"')
+
+        # Only responses worth compressing get a gzipped copy.
+        gzipped = gzip.open(os.path.join(self.directory,
+                                         'profiles/index.json.gz'))
+        self.assertEqual(gzipped.read(), self.read('profiles/index.json'))
+        assert not os.path.exists(os.path.join(
+            self.directory, 'profiles/%d/index.json.gz' % pk))
+
+        assert 'application/json json;' in self.read('nginx.types')
+        # Responses which depend on the client's cookies aren't written.
+        assert not os.path.exists(os.path.join(self.directory,
+                                               'tokens/index.json'))
+        self.assertEqual(
+            [error for url, shortcode, path, error in results
+             if (url, shortcode) == ('/tokens/', 'json')],
+            ['depends on cookies'])
+        # Representations which can't be rendered are reported, not written.
+        assert any(error for url, shortcode, path, error in results)
+
+    def test_incremental(self):
+        export(self.directory)
+        user = self.users[1]
+        user.last_login = datetime.datetime.now() + datetime.timedelta(hours=1)
+        user.username = 'benjamin'
+        user.save()
+
+        results = export(self.directory, incremental=True)
+        urls = set(url for url, shortcode, path, error in results)
+        self.assertEqual(urls, set(['/profiles/', '/profiles/%d/' % user.pk,
+                                    '/profiles-rails/%d' % user.pk,
+                                    '/tokens/']))
+        self.assertEqual(self.read('profiles/%d/index.json' % user.pk),
+                         '"benjamin"')
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('exportresources', self.directory, compress=False,
+                     stdout=stdout, verbosity=1)
+        assert 'Exported' in stdout.getvalue()
+        assert not os.path.exists(os.path.join(self.directory,
+                                               'profiles/index.json.gz'))
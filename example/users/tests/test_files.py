@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.conf.urls.defaults import patterns
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from dagny import Resource, action
+from dagny.files import render_file, send_file
+from dagny.urls import resource
+
+
+CONTENT = ''.join(chr(i % 256) for i in xrange(200000))
+
+
+class Download(Resource):
+
+    @action
+    def show(self):
+        self.pdf = settings.DOWNLOAD_PATH
+
+    show.sends_file = 'pdf'
+    show.render['pdf'] = render_file
+
+    # There are no templates for this resource.
+    del show.render['html']
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^download/', resource('users.tests.test_files.Download',
+                             name='Download', actions=['show'])),
+)
+
+
+class SendFileTest(TestCase):
+
+    urls = 'users.tests.test_files'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'report.pdf')
+        fp = open(self.path, 'wb')
+        try:
+            fp.write(CONTENT)
+        finally:
+            fp.close()
+        settings.DOWNLOAD_PATH = self.path
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        del settings.DOWNLOAD_PATH
+        for name in ('DAGNY_SENDFILE', 'DAGNY_SENDFILE_ROOT',
+                     'DAGNY_SENDFILE_URL'):
+            if hasattr(settings, name):
+                delattr(settings, name)
+        shutil.rmtree(self.directory)
+
+    def test_render_file(self):
+        response = self.client.get('/download/?format=pdf')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        assert not response._is_string
+        self.assertEqual(response.content, CONTENT)
+
+    def test_range(self):
+        response = self.client.get('/download/?format=pdf',
+                                   HTTP_RANGE='bytes=100000-170000')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'],
+                         'bytes 100000-170000/%d' % (len(CONTENT),))
+        self.assertEqual(response['Content-Length'], '70001')
+        self.assertEqual(response.content, CONTENT[100000:170001])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get('/download/?format=pdf',
+                                   HTTP_RANGE='bytes=500000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'],
+                         'bytes */%d' % (len(CONTENT),))
+
+    def test_if_range(self):
+        request = self.factory.get('/', HTTP_RANGE='bytes=0-9',
+                                   HTTP_IF_RANGE='Sat, 01 Jan 2000 00:00:00 GMT')
+        response = send_file(request, self.path)
+        self.assertEqual(response.status_code, 200)
+
+        request = self.factory.get('/', HTTP_RANGE='bytes=0-9',
+                                   HTTP_IF_RANGE=response['Last-Modified'])
+        response = send_file(request, self.path)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, CONTENT[:10])
+
+    def test_file_object(self):
+        fp = open(self.path, 'rb')
+        response = send_file(self.factory.get('/'), fp, filename='a "b".pdf',
+                             attachment=True)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="a \\"b\\".pdf"')
+        self.assertEqual(response.content, CONTENT)
+        response.close()
+        assert fp.closed
+
+    def test_x_sendfile(self):
+        settings.DAGNY_SENDFILE = 'x-sendfile'
+        response = self.client.get('/download/?format=pdf')
+        self.assertEqual(response['X-Sendfile'], self.path)
+        self.assertEqual(response.content, '')
+
+    def test_x_accel_redirect(self):
+        settings.DAGNY_SENDFILE = 'x-accel-redirect'
+        settings.DAGNY_SENDFILE_ROOT = self.directory
+        settings.DAGNY_SENDFILE_URL = '/protected/'
+        response = self.client.get('/download/?format=pdf')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected/report.pdf')
+        self.assertEqual(response.content, '')
+
+    def test_x_accel_redirect_quoting(self):
+        settings.DAGNY_SENDFILE = 'x-accel-redirect'
+        settings.DAGNY_SENDFILE_ROOT = self.directory
+        settings.DAGNY_SENDFILE_URL = '/protected/'
+        for name, url in [('q3 report?#1.pdf', 'q3%20report%3F%231.pdf'),
+                          ('r\xc3\xa9sum\xc3\xa9.pdf', 'r%C3%A9sum%C3%A9.pdf'),
+                          (u'r\xe9sum\xe9.pdf', 'r%C3%A9sum%C3%A9.pdf')]:
+            path = os.path.join(self.directory, name)
+            response = send_file(self.factory.get('/'), path)
+            self.assertEqual(response['X-Accel-Redirect'], '/protected/' + url)
+
+    def test_skips_without_file(self):
+        settings.DOWNLOAD_PATH = None
+        response = self.client.get('/download/', HTTP_ACCEPT='application/pdf')
+        self.assertEqual(response.status_code, 406)
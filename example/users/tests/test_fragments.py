@@ -0,0 +1,103 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import TestCase
+
+from dagny.cache import get_backend
+
+
+RENDERS = []
+UPDATED = datetime.datetime(2011, 5, 1, 12, 30)
+
+
+class Entry(models.Model):
+
+    title = models.CharField(max_length=100)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        app_label = 'users'
+
+    def mark(self):
+        RENDERS.append(self.pk)
+        return ''
+
+
+LIST = Template("""{% load dagny_cache %}
+{% cachefragment entries %}<ul>
+{% cachefragment entry in entries %}<li>{{ entry.mark }}{{ entry.title }}</li>
+{% endcachefragment %}</ul>{% endcachefragment %}""")
+
+
+class FragmentCacheTest(TestCase):
+
+    def setUp(self):
+        get_backend().clear()
+        del RENDERS[:]
+        self.entries = [Entry(pk=i, title='Entry %d' % i, updated_at=UPDATED)
+                        for i in range(1000)]
+
+    def render(self, template=LIST, **context):
+        context.setdefault('entries', self.entries)
+        return template.render(Context(context))
+
+    def test_cached(self):
+        output = self.render()
+        self.assertEqual(len(RENDERS), 1000)
+        assert '<li>Entry 999</li>' in output
+        self.assertEqual(self.render(), output)
+        self.assertEqual(len(RENDERS), 1000)
+
+    def test_one_changed_row_renders_one_fragment(self):
+        self.render()
+        del RENDERS[:]
+        entry = self.entries[500]
+        entry.title = 'Changed'
+        entry.updated_at = UPDATED + datetime.timedelta(seconds=1)
+
+        output = self.render()
+        self.assertEqual(RENDERS, [500])
+        assert '<li>Changed</li>' in output
+        assert '<li>Entry 501</li>' in output
+
+    def test_loop_uses_one_get_many(self):
+        self.render()
+        backend = get_backend()
+        calls = []
+        get_many = backend.get_many
+        backend.get_many = lambda keys: calls.append(keys) or get_many(keys)
+        try:
+            self.entries[0].updated_at = UPDATED + datetime.timedelta(days=1)
+            self.render()
+        finally:
+            del backend.get_many
+        self.assertEqual(map(len, calls), [1000])
+
+    def test_template_changes_invalidate(self):
+        self.render()
+        del RENDERS[:]
+        template = Template("""{% load dagny_cache %}
+{% cachefragment entry in entries %}<p>{{ entry.mark }}</p>
+{% endcachefragment %}""")
+        self.render(template, entries=self.entries[:2])
+        self.assertEqual(RENDERS, [0, 1])
+
+    def test_version_option(self):
+        template = Template("""{% load dagny_cache %}{% cachefragment entry version="title" %}{{ entry.mark }}{% endcachefragment %}""")
+        self.render(template, entry=self.entries[0])
+        self.entries[0].updated_at = UPDATED + datetime.timedelta(days=1)
+        self.render(template, entry=self.entries[0])
+        self.assertEqual(RENDERS, [0])
+
+    def test_missing_version_field(self):
+        template = Template("""{% load dagny_cache %}{% cachefragment entry version="slug" %}{% endcachefragment %}""")
+        self.assertRaises(TemplateSyntaxError, self.render, template,
+                          entry=self.entries[0])
+
+    def test_model_without_version_field(self):
+        template = Template("""{% load dagny_cache %}{% cachefragment user %}{{ user.username }}{% endcachefragment %}""")
+        # Without a version, edits would be served stale until timeout.
+        self.assertRaises(TemplateSyntaxError, self.render, template,
+                          user=User(pk=1, username='zack'))
@@ -0,0 +1,78 @@
+from django.contrib.auth import models
+from django.template import TemplateDoesNotExist
+from django.test import TestCase
+from django.utils import unittest
+
+from dagny.warmup import precompile_templates
+from users.resources import Account, User
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+
+@unittest.skipIf(jinja2 is None, "Jinja2 is not installed")
+class JinjaRendererTest(TestCase):
+
+    def setUp(self):
+        User.template_engine = 'jinja2'
+        self.user = models.User.objects.create_user("zack",
+                                                    "z@zacharyvoase.com",
+                                                    "hello")
+
+    def tearDown(self):
+        del User.template_engine
+
+    def test_index(self):
+        response = self.client.get('/users/')
+        self.assertEqual(response.status_code, 200)
+        # No Django templates were rendered.
+        self.assertEqual(response.templates, [])
+        assert ('<a href="/users/%d/">zack</a>' % (self.user.id,)
+                in response.content)
+        assert '<a href="/users/new/">Sign Up!</a>' in response.content
+
+    def test_autoescaping(self):
+        self.user.first_name = '<b>Zack</b>'
+        self.user.save()
+        response = self.client.get('/users/%d/' % (self.user.id,))
+        assert 'First name: &lt;b&gt;Zack&lt;/b&gt;' in response.content
+
+    def test_stream(self):
+        expected = self.client.get('/users/').content
+        User.index.stream = True
+        try:
+            response = self.client.get('/users/')
+        finally:
+            del User.index.stream
+        assert not response._is_string
+        self.assertEqual(response.content, expected)
+
+    def test_iterator_filter(self):
+        from dagny.jinja import get_environment
+
+        template = get_environment().from_string(
+            "{% for user in users|iterator %}{{ user.username }}{% endfor %}")
+        users = models.User.objects.all()
+        self.assertEqual(template.render(users=users), u'zack')
+        assert users._result_cache is None
+
+    def test_action_overrides_resource(self):
+        User.show.template_engine = 'django'
+        try:
+            response = self.client.get('/users/%d/' % (self.user.id,))
+        finally:
+            del User.show.template_engine
+        self.assertEqual(response.templates[0].name, 'auth/user/show.html')
+
+    def test_precompile(self):
+        Account.template_engine = 'jinja2'
+        try:
+            compiled, failures = precompile_templates()
+        finally:
+            del Account.template_engine
+        assert ('User#index', 'auth/user/index.html') in compiled
+        self.assertEqual([(label, name) for label, name, exc in failures],
+                         [('Account#show', 'auth/account/show.html')])
+        assert isinstance(failures[0][2], TemplateDoesNotExist)
@@ -0,0 +1,78 @@
+import datetime
+import decimal
+
+from django.conf.urls.defaults import patterns
+from django.test import TestCase
+from django.utils import simplejson
+
+from dagny import Resource, action
+from dagny.renderers import JSONEncoder
+from dagny.urls import resource
+
+
+class Point(object):
+
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+
+class PointEncoder(JSONEncoder):
+    converters = dict(JSONEncoder.converters,
+                      **{Point: lambda point: [point.x, point.y]})
+
+
+class Report(Resource):
+
+    json_encoder = PointEncoder
+
+    @action
+    def show(self):
+        self.generated = datetime.datetime(2011, 5, 1, 12, 30)
+        self.total = decimal.Decimal('10.50')
+        self.origin = Point(1, 2)
+        self.secret = 'not exposed'
+
+    show.exposes = ('generated', 'total', 'origin')
+
+    @action
+    def edit(self):
+        self.form = 'not exposed either'
+
+    # There are no templates for this resource.
+    del show.render['html'], edit.render['html']
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^report/', resource('users.tests.test_json.Report', name='Report',
+                           actions=['show', 'edit'])),
+)
+
+
+class JSONRendererTest(TestCase):
+
+    urls = 'users.tests.test_json'
+
+    def test_exposed_attributes(self):
+        response = self.client.get('/report/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = simplejson.loads(response.content)
+        self.assertEqual(sorted(data), ['generated', 'origin', 'total'])
+        self.assertEqual(data['generated'], '2011-05-01T12:30:00')
+        self.assertEqual(decimal.Decimal(str(data['total'])),
+                         decimal.Decimal('10.50'))
+        self.assertEqual(data['origin'], [1, 2])
+
+    def test_single_exposed_attribute(self):
+        Report.show.exposes = 'origin'
+        try:
+            response = self.client.get('/report/?format=json')
+        finally:
+            Report.show.exposes = ('generated', 'total', 'origin')
+        self.assertEqual(simplejson.loads(response.content), [1, 2])
+
+    def test_nothing_exposed_skips(self):
+        response = self.client.get('/report/edit/',
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 406)
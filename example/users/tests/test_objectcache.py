@@ -0,0 +1,120 @@
+from django.conf.urls.defaults import patterns
+from django.contrib.auth.models import User
+from django.http import Http404, HttpResponse
+from django.test import TestCase
+
+from dagny import Resource, action
+from dagny.cache import get_backend
+from dagny.objectcache import ObjectCache, get_member
+from dagny.urls import resources
+
+
+class Member(Resource):
+
+    object_cache = ObjectCache(User, size=2, cache='default')
+
+    @action
+    def show(self, user_id):
+        try:
+            self.user = get_member(self, user_id)
+        except Http404:
+            return HttpResponse(status=404)
+        return HttpResponse(self.user.username)
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^members/', resources('users.tests.test_objectcache.Member',
+                             name='Member', actions=['show'])),
+)
+
+
+class ObjectCacheTest(TestCase):
+
+    urls = 'users.tests.test_objectcache'
+
+    def setUp(self):
+        get_backend().clear()
+        self.users = [User.objects.create(username=name)
+                      for name in ('zack', 'ben', 'chris')]
+        self.cache = ObjectCache(User, size=2)
+
+    def test_read_through(self):
+        pk = self.users[0].pk
+        with self.assertNumQueries(1):
+            self.assertEqual(self.cache.get(pk).username, 'zack')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.get(str(pk)).username, 'zack')
+
+    def test_copies_are_returned(self):
+        user = self.cache.get(self.users[0].pk)
+        user.username = 'modified'
+        self.assertEqual(self.cache.get(self.users[0].pk).username, 'zack')
+
+    def test_save_and_delete_invalidate(self):
+        pk = self.users[0].pk
+        self.cache.get(pk)
+        User.objects.get(pk=pk).save()
+        with self.assertNumQueries(1):
+            self.cache.get(pk)
+
+        self.users[0].delete()
+        self.assertRaises(User.DoesNotExist, self.cache.get, pk)
+
+    def test_bounded(self):
+        for user in self.users:
+            self.cache.get(user.pk)
+        self.assertEqual(self.cache.stats()['entries'], 2)
+        with self.assertNumQueries(1):
+            self.cache.get(self.users[0].pk)
+
+    def test_shared_cache(self):
+        pk = self.users[1].pk
+        ObjectCache(User, cache='default').get(pk)
+        # Another process, with nothing cached locally.
+        other = ObjectCache(User, cache='default')
+        with self.assertNumQueries(0):
+            self.assertEqual(other.get(pk).username, 'ben')
+
+        self.users[1].username = 'benjamin'
+        self.users[1].save()
+        self.assertEqual(other.get(pk).username, 'benjamin')
+
+    def test_racing_load_is_not_shared(self):
+        pk = self.users[1].pk
+        cache = ObjectCache(User, cache='default')
+        backend = get_backend()
+        # A load in another process reads the row, and the version...
+        cache.get(pk)
+        version = backend.get(cache.key(pk) + ':version')
+        stale = User.objects.get(pk=pk)
+        # ...a save lands...
+        self.users[1].username = 'benjamin'
+        self.users[1].save()
+        # ...and only then does the load write its (old) row.
+        backend.set(cache.key(pk), (version, stale))
+
+        self.assertEqual(ObjectCache(User, cache='default').get(pk).username,
+                         'benjamin')
+
+    def test_local_timeout(self):
+        cache = ObjectCache(User, local_timeout=0)
+        cache.get(self.users[0].pk)
+        with self.assertNumQueries(1):
+            cache.get(self.users[0].pk)
+
+    def test_stats(self):
+        self.cache.get(self.users[0].pk)
+        self.cache.get(self.users[0].pk)
+        self.cache.get(self.users[0].pk)
+        self.users[0].save()
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'],
+                          stats['invalidations']), (2, 1, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 2.0 / 3)
+
+    def test_get_member(self):
+        Member.object_cache.clear()
+        response = self.client.get('/members/%d/' % self.users[2].pk)
+        self.assertEqual(response.content, 'chris')
+        self.assertEqual(self.client.get('/members/999/').status_code, 404)
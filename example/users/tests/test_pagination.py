@@ -0,0 +1,83 @@
+from django.contrib.auth import models
+from django.http import Http404
+from django.test import TestCase
+from django.utils import simplejson
+
+from dagny.pagination import Paginator
+
+
+class PaginationTest(TestCase):
+
+    def setUp(self):
+        for i in range(25):
+            models.User.objects.create_user("user%02d" % i,
+                                            "user%02d@example.com" % i,
+                                            "hello")
+
+    def get_page(self, url):
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        usernames = [user['username']
+                     for user in simplejson.loads(response.content)]
+        return response, usernames
+
+    def test_first_page(self):
+        response, usernames = self.get_page('/users/')
+        self.assertEqual(usernames, ["user%02d" % i for i in range(20)])
+        assert response['Link'].startswith('<http://testserver/users/?cursor=')
+        assert response['Link'].endswith('>; rel="next"')
+
+    def test_following_next_link(self):
+        response, _ = self.get_page('/users/')
+        next_url = response['Link'][1:response['Link'].index('>')]
+        response, usernames = self.get_page(next_url)
+        self.assertEqual(usernames, ["user%02d" % i for i in range(20, 25)])
+        assert not response.has_header('Link')
+
+    def test_limit(self):
+        response, usernames = self.get_page('/users/?limit=3')
+        self.assertEqual(usernames, ['user00', 'user01', 'user02'])
+        assert '&limit=3' in response['Link'] or '?limit=3' in response['Link']
+
+    def test_limit_is_capped(self):
+        paginator = Paginator(ordering=('username',), per_page=2,
+                              max_per_page=5)
+        self.assertEqual(paginator._per_page(_Request(limit='1000')), 5)
+        self.assertEqual(paginator._per_page(_Request(limit='0')), 1)
+        self.assertEqual(paginator._per_page(_Request(limit='abc')), 2)
+
+    def test_descending_ordering(self):
+        paginator = Paginator(ordering=('-username',), per_page=10)
+        queryset = models.User.objects.all()
+        page = paginator.page(_Request(), queryset)
+        self.assertEqual([user.username for user in page],
+                         ["user%02d" % i for i in range(24, 14, -1)])
+        page = paginator.page(_Request(cursor=page.next_cursor), queryset)
+        self.assertEqual([user.username for user in page],
+                         ["user%02d" % i for i in range(14, 4, -1)])
+
+    def test_html_next_link(self):
+        response = self.client.get('/users/', HTTP_ACCEPT='text/html')
+        assert 'rel="next"' in response.content
+
+    def test_invalid_cursor(self):
+        paginator = Paginator(ordering=('username',))
+        for cursor in ('garbage', 'WzFd', 'eyJhIjogMX0'):
+            self.assertRaises(Http404, paginator.page,
+                              _Request(cursor=cursor),
+                              models.User.objects.all())
+
+
+class _Request(object):
+
+    """A minimal stand-in for a request, carrying only query parameters."""
+
+    path = '/users/'
+
+    def __init__(self, **params):
+        from django.http import QueryDict
+        self.GET = QueryDict('', mutable=True)
+        self.GET.update(params)
+
+    def build_absolute_uri(self, location):
+        return 'http://testserver' + location
@@ -0,0 +1,53 @@
+from django.contrib.auth import models
+from django.test import TestCase
+from django.utils import unittest
+
+from users.resources import User
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+
+class FragmentRendererTest(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user("zack",
+                                                    "z@zacharyvoase.com",
+                                                    "hello")
+        self.url = '/users/%d/' % (self.user.id,)
+
+    def test_full_page(self):
+        response = self.client.get(self.url)
+        assert '<title>' in response.content
+        assert 'Username: zack' in response.content
+        self.assertEqual(response['Vary'], 'Accept, X-PJAX')
+
+    def test_pjax_header(self):
+        response = self.client.get(self.url, HTTP_X_PJAX='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'].split(';')[0], 'text/html')
+        assert 'Username: zack' in response.content
+        assert '<title>' not in response.content
+
+    def test_format_parameter(self):
+        response = self.client.get(self.url + '?format=fragment')
+        assert 'Username: zack' in response.content
+        assert '<title>' not in response.content
+
+    def test_missing_partial_falls_back(self):
+        # There's no `auth/user/_index.html`, so the full page is rendered.
+        response = self.client.get('/users/', HTTP_X_PJAX='true')
+        self.assertEqual(response.status_code, 200)
+        assert '<title>' in response.content
+
+    @unittest.skipIf(jinja2 is None, "Jinja2 is not installed")
+    def test_jinja(self):
+        User.template_engine = 'jinja2'
+        try:
+            response = self.client.get(self.url, HTTP_X_PJAX='true')
+        finally:
+            del User.template_engine
+        assert 'Username: zack' in response.content
+        assert '<title>' not in response.content
@@ -0,0 +1,94 @@
+from django.contrib.auth import models
+from django.test import TestCase
+from django.utils import simplejson
+
+from dagny.serializers import Serializer
+
+
+class SerializerTest(TestCase):
+
+    def setUp(self):
+        self.user = models.User.objects.create_user("zack",
+                                                    "z@zacharyvoase.com",
+                                                    "hello")
+        self.user.first_name = "Zachary"
+        self.user.last_name = "Voase"
+        self.user.save()
+        self.user.groups.create(name="Admins")
+        self.user.groups.create(name="Staff")
+
+    def test_related_fields(self):
+        serializer = Serializer(
+            'username',
+            ('name', 'get_full_name'),
+            ('groups', 'groups', Serializer('name')),
+        )
+        self.assertEqual(serializer.serialize(self.user), {
+            'username': 'zack',
+            'name': 'Zachary Voase',
+            'groups': [{'name': 'Admins'}, {'name': 'Staff'}],
+        })
+
+    def test_null_links(self):
+        class Obj(object):
+            def __init__(self, **attrs):
+                self.__dict__.update(attrs)
+
+        serializer = Serializer(('group', 'profile.group.name'),
+                                ('title', 'profile.get_title'))
+        with_group = Obj(profile=Obj(group=Obj(name='Admins'),
+                                     get_title=lambda: 'Mr'))
+        # A `None` link, whether on the first object or a later one, makes
+        # the value `None`; callables are still found past it.
+        self.assertEqual(serializer.serialize_many([
+            Obj(profile=None),
+            with_group,
+            Obj(profile=Obj(group=None, get_title=lambda: 'Dr')),
+        ]), [{'group': None, 'title': None},
+             {'group': 'Admins', 'title': 'Mr'},
+             {'group': None, 'title': 'Dr'}])
+        serializer = Serializer(('group', 'profile.group.name'),
+                                ('title', 'profile.get_title'))
+        self.assertEqual(list(serializer.rows([with_group,
+                                               Obj(profile=None)])),
+                         [('Admins', 'Mr'), (None, None)])
+
+    def test_keyword_paths(self):
+        self.assertRaises(ValueError, Serializer, 'class')
+        self.assertRaises(ValueError, Serializer, ('source', 'from.x'))
+
+    def test_apply(self):
+        serializer = Serializer('username')
+        users = models.User.objects.all()
+        self.assertEqual(serializer.apply(self.user), {'username': 'zack'})
+        self.assertEqual(serializer.apply(users), [{'username': 'zack'}])
+        self.assertEqual(serializer.apply(list(users)), [{'username': 'zack'}])
+        self.assertEqual(serializer.apply([1, 2]), [1, 2])
+        self.assertEqual(serializer.apply('zack'), 'zack')
+
+    def test_json_show(self):
+        response = self.client.get('/users/%d/' % self.user.id,
+                                   HTTP_ACCEPT='application/json')
+        self.assertEqual(simplejson.loads(response.content), {
+            'username': 'zack',
+            'first_name': 'Zachary',
+            'last_name': 'Voase',
+        })
+
+    def test_json_index(self):
+        response = self.client.get('/users/', HTTP_ACCEPT='application/json')
+        self.assertEqual(simplejson.loads(response.content), [{
+            'username': 'zack',
+            'first_name': 'Zachary',
+            'last_name': 'Voase',
+        }])
+
+    def test_xml_show(self):
+        response = self.client.get('/users/%d/' % self.user.id,
+                                   HTTP_ACCEPT='application/xml')
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertEqual(response.content,
+                         '<?xml version="1.0" encoding="utf-8"?>\n'
+                         '<user><first_name>Zachary</first_name>'
+                         '<last_name>Voase</last_name>'
+                         '<username>zack</username></user>')
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import get_cache
+from django.http import HttpResponse
+from django.test import TestCase
+
+from dagny import cache, conneg
+from dagny.shm import SharedMemoryCache
+
+
+class SharedMemoryCacheTest(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_and_set(self):
+        shm = SharedMemoryCache(self.path, size=64 * 1024)
+        self.assertEqual(shm.get('a'), None)
+        assert shm.set('a', {'value': 1})
+        self.assertEqual(shm.get('a'), {'value': 1})
+        shm.delete('a')
+        self.assertEqual(shm.get('a', 'missing'), 'missing')
+
+    def test_add_and_incr(self):
+        shm = SharedMemoryCache(self.path, size=64 * 1024)
+        assert shm.add('counter', 1)
+        assert not shm.add('counter', 5)
+        self.assertEqual(shm.incr('counter'), 2)
+        self.assertEqual(shm.get('counter'), 2)
+        self.assertRaises(ValueError, shm.incr, 'missing')
+
+    def test_timeout(self):
+        shm = SharedMemoryCache(self.path, size=64 * 1024)
+        shm.set('a', 1, timeout=-1)
+        self.assertEqual(shm.get('a'), None)
+        assert shm.add('a', 2, timeout=60)
+        self.assertEqual(shm.get('a'), 2)
+
+    def test_least_recently_used_are_evicted(self):
+        shm = SharedMemoryCache(self.path, size=4 * 256, slot_size=256,
+                                ways=4)
+        self.assertEqual((shm.sets, shm.capacity), (1, 4))
+        for key in 'abcd':
+            shm.set(key, key)
+        shm.get('a')
+        shm.set('e', 'e')
+
+        self.assertEqual([shm.get(key) for key in 'abcde'],
+                         ['a', None, 'c', 'd', 'e'])
+        self.assertEqual(shm.stats()['evictions'], 1)
+
+    def test_oversize_values_are_not_stored(self):
+        shm = SharedMemoryCache(self.path, size=4 * 256, slot_size=256,
+                                ways=4)
+        shm.set('a', 'small')
+        assert not shm.set('a', 'x' * 1000)
+        self.assertEqual(shm.get('a'), None)
+        self.assertEqual(shm.stats()['oversize'], 1)
+
+    def test_stats(self):
+        shm = SharedMemoryCache(self.path, size=64 * 1024)
+        shm.set('a', 1)
+        shm.get('a')
+        shm.get('b')
+        stats = shm.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['sets']),
+                         (1, 1, 1))
+        self.assertEqual(stats['entries'], 1)
+        shm.clear()
+        self.assertEqual(shm.stats()['entries'], 0)
+
+    def test_shared_between_processes(self):
+        shm = SharedMemoryCache(self.path, size=64 * 1024)
+        shm.set('parent', 1)
+        pid = os.fork()
+        if pid == 0:
+            # A fresh instance, as in a separately started process.
+            child = SharedMemoryCache(self.path, size=64 * 1024)
+            child.set('child', child.get('parent') + 1)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(shm.get('child'), 2)
+        self.assertEqual(shm.stats()['hits'], 2)
+
+    def test_different_geometry_is_refused(self):
+        SharedMemoryCache(self.path, size=64 * 1024).set('a', 1)
+        other = SharedMemoryCache(self.path, size=64 * 1024, slot_size=1024)
+        self.assertRaises(ValueError, other.get, 'a')
+
+    def test_django_backend(self):
+        backend = get_cache('dagny.shm.SharedMemoryBackend',
+                            LOCATION=self.path, TIMEOUT=60,
+                            OPTIONS={'SIZE': 64 * 1024})
+        backend.set('a', 1)
+        self.assertEqual(backend.get('a'), 1)
+        self.assertEqual(backend.get_many(['a', 'b']), {'a': 1})
+        self.assertEqual(backend.incr('a', 10), 11)
+        self.assertEqual(backend.decr('a'), 10)
+        assert not backend.add('a', 2)
+        backend.delete('a')
+        assert not backend.has_key('a')
+
+        cache._backends['shm'] = backend
+        try:
+            response_cache = cache.ResponseCache(cache='shm')
+            response_cache.set('dagny:response:test', HttpResponse('cached'))
+            response, stale = response_cache.get('dagny:response:test')
+            self.assertEqual((response.content, stale), ('cached', False))
+        finally:
+            del cache._backends['shm']
+
+    def test_shared_match_cache(self):
+        shm = SharedMemoryCache(self.path, size=64 * 1024)
+        conneg.SHARED_MATCH_CACHE = shm
+        try:
+            header = 'application/json,text/html;q=0.5'
+            self.assertEqual(conneg.match_accept(header, ['json', 'html']),
+                             ['json', 'html'])
+            # Another worker finds the result without matching it again.
+            del conneg._match_cache[(header, ('json', 'html'))]
+            self.assertEqual(conneg.match_accept(header, ['json', 'html']),
+                             ['json', 'html'])
+            self.assertEqual(shm.stats()['hits'], 1)
+        finally:
+            conneg.SHARED_MATCH_CACHE = None
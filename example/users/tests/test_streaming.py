@@ -0,0 +1,141 @@
+from django.conf.urls.defaults import patterns
+from django.contrib.auth import models
+from django.template import Context, Template
+from django.test import TestCase
+from django.utils import simplejson
+
+from dagny import Resource, action
+from dagny.renderer import Skip
+from dagny.renderers import stream_template
+from dagny.serializers import Serializer
+from dagny.urls import resource
+
+
+class Feed(Resource):
+
+    serializer = Serializer('username')
+
+    @action
+    def show(self):
+        self.users = models.User.objects.order_by('username')
+
+    show.exposes = 'users'
+    show.stream = True
+
+    @show.render.rss
+    def show(self):
+        if self.request.GET.get('skip'):
+            raise Skip
+        yield '<rss>'
+        for user in self.users:
+            yield '<item>%s</item>' % (user.username,)
+        yield '</rss>'
+
+    # There are no templates for this resource.
+    del show.render['html']
+
+
+# Used as the URLconf for these tests.
+urlpatterns = patterns('',
+    (r'^feed/', resource('users.tests.test_streaming.Feed', name='Feed',
+                         actions=['show'])),
+)
+
+
+class StreamingTest(TestCase):
+
+    urls = 'users.tests.test_streaming'
+
+    def setUp(self):
+        for username in ('ben', 'zack'):
+            models.User.objects.create_user(username,
+                                            "%s@example.com" % username,
+                                            "hello")
+
+    def test_json_array(self):
+        response = self.client.get('/feed/', HTTP_ACCEPT='application/json')
+        assert not response._is_string
+        self.assertEqual(simplejson.loads(response.content),
+                         [{'username': 'ben'}, {'username': 'zack'}])
+
+    def test_empty_json_array(self):
+        models.User.objects.all().delete()
+        response = self.client.get('/feed/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.content, '[]')
+
+    def test_ndjson(self):
+        response = self.client.get('/feed/',
+                                   HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(map(simplejson.loads, response.content.splitlines()),
+                         [{'username': 'ben'}, {'username': 'zack'}])
+
+    def test_generator_backend(self):
+        response = self.client.get('/feed/',
+                                   HTTP_ACCEPT='application/rss+xml')
+        assert not response._is_string
+        self.assertEqual(response['Content-Type'], 'application/rss+xml')
+        self.assertEqual(response.content,
+                         '<rss><item>ben</item><item>zack</item></rss>')
+
+    def test_generator_backend_can_skip(self):
+        response = self.client.get('/feed/?skip=1',
+                                   HTTP_ACCEPT=('application/rss+xml,'
+                                                'application/json;q=0.5'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class HTMLStreamingTest(TestCase):
+
+    def setUp(self):
+        for username in ('ben', 'zack'):
+            models.User.objects.create_user(username,
+                                            "%s@example.com" % username,
+                                            "hello")
+
+    def test_matches_unstreamed(self):
+        from users.resources import User
+
+        expected = self.client.get('/users/').content
+        User.index.stream = True
+        try:
+            response = self.client.get('/users/')
+        finally:
+            del User.index.stream
+        assert not response._is_string
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        self.assertEqual(response.content, expected)
+
+    def test_for_loop_over_queryset(self):
+        template = Template("{% for user in users %}"
+                            "{{ forloop.counter }}/{{ forloop.revcounter }} "
+                            "{{ user.username }}{% if not forloop.last %}, "
+                            "{% endif %}{% empty %}None{% endfor %}")
+        users = models.User.objects.order_by('username')
+        # One query for the count, and one for the rows.
+        with self.assertNumQueries(2):
+            output = u''.join(stream_template(template,
+                                              Context({'users': users})))
+        self.assertEqual(output, u'1/2 ben, 2/1 zack')
+        # The queryset was not loaded into memory.
+        assert users._result_cache is None
+
+        output = u''.join(stream_template(template, Context({'users': []})))
+        self.assertEqual(output, u'None')
+
+    def test_extends_and_blocks(self):
+        parent = Template("<{% block a %}A{% endblock %}|"
+                          "{% block b %}B{% endblock %}>")
+        child = Template("{% extends parent %}"
+                         "{% block b %}{{ block.super }}b{% endblock %}")
+        context = Context({'parent': parent})
+        self.assertEqual(u''.join(stream_template(child, context)),
+                         child.render(Context({'parent': parent})))
+        self.assertEqual(u''.join(stream_template(child, context)),
+                         u'<A|Bb>')
+
+    def test_chunking(self):
+        template = Template("{% for i in items %}{{ i }}{% endfor %}")
+        context = Context({'items': ['x' * 5000] * 3})
+        self.assertEqual(map(len, stream_template(template, context)),
+                         [10000, 5000])
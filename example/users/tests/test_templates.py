@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.test import TestCase
+
+from dagny import renderers
+from users.resources import User
+
+
+class TemplateCacheTest(TestCase):
+
+    def setUp(self):
+        self.template_debug = settings.TEMPLATE_DEBUG
+        renderers.clear_template_cache()
+
+    def tearDown(self):
+        settings.TEMPLATE_DEBUG = self.template_debug
+        renderers.clear_template_cache()
+
+    def test_template_names_are_cached(self):
+        self.assertEqual(renderers.get_template_name(User.index, User),
+                         'auth/user/index.html')
+        self.assertEqual(renderers._template_names, {
+            (User, User.index): 'auth/user/index.html'})
+
+    def test_templates_are_cached(self):
+        settings.TEMPLATE_DEBUG = False
+        response = self.client.get('/users/')
+        self.assertEqual(response.status_code, 200)
+        template = renderers._templates['auth/user/index.html']
+        self.client.get('/users/')
+        assert renderers.load_template('auth/user/index.html') is template
+
+    def test_no_caching_with_template_debug(self):
+        settings.TEMPLATE_DEBUG = True
+        response = self.client.get('/users/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(renderers._templates, {})
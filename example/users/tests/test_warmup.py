@@ -0,0 +1,92 @@
+from StringIO import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from dagny import conneg, renderers
+from dagny.urls.router import iter_routes
+from dagny.warmup import ACCEPT_HEADERS, precompile_templates, warmup
+from users import resources
+
+
+class IterRoutesTest(TestCase):
+
+    def test_finds_all_dagny_routes(self):
+        routes = dict((route.name, route) for route in iter_routes())
+        self.assertEqual(routes['User#show'].resource, resources.User)
+        self.assertEqual(routes['User#show'].regex, r'^users/(\d+)/$')
+        self.assertEqual(routes['AccountRails#show'].resource,
+                         resources.Account)
+        # The admin's patterns are not Dagny routes.
+        assert 'admin:index' not in routes
+        assert 'index' not in routes
+
+
+class WarmupTest(TestCase):
+
+    def test_warmup_builds_negotiation_table(self):
+        conneg._match_cache.clear()
+        routes = warmup(freeze=False)
+
+        assert routes
+        shortcodes = tuple(resources.User.index.render._keys())
+        for header in ACCEPT_HEADERS:
+            assert (header, shortcodes) in conneg._match_cache
+
+
+class PrecompileTemplatesTest(TestCase):
+
+    def setUp(self):
+        self.template_debug = settings.TEMPLATE_DEBUG
+        renderers.clear_template_cache()
+
+    def tearDown(self):
+        settings.TEMPLATE_DEBUG = self.template_debug
+        renderers.clear_template_cache()
+
+    def test_compiles_get_templates(self):
+        compiled, failures = precompile_templates()
+        self.assertEqual(failures, [])
+        assert ('User#index', 'auth/user/index.html') in compiled
+        assert ('User#edit', 'auth/user/edit.html') in compiled
+        # Non-GET actions conventionally redirect, so have no templates.
+        assert 'User#create' not in dict(compiled)
+        # Partials for the fragment backend are compiled where they exist.
+        assert ('User#show', 'auth/user/_show.html') in compiled
+        assert ('User#index', 'auth/user/_index.html') not in compiled
+
+    def test_named_fragment_template_is_required(self):
+        resources.User.show.fragment_template_name = 'auth/user/_missing.html'
+        try:
+            compiled, failures = precompile_templates()
+        finally:
+            del resources.User.show.fragment_template_name
+        self.assertEqual([(label, name) for label, name, exc in failures],
+                         [('User#show', 'auth/user/_missing.html')])
+
+    def test_failures(self):
+        compiled, failures = precompile_templates(
+            urlconf='users.tests.test_checks')
+        self.assertEqual([(label, name) for label, name, exc in failures],
+                         [('Broken#edit', 'broken/edit.html'),
+                          ('Broken#index', 'broken/index.html'),
+                          ('Broken#show', 'broken/show.html')])
+
+    def test_warmup_fills_template_cache(self):
+        settings.TEMPLATE_DEBUG = False
+        warmup(freeze=False)
+        assert 'auth/user/show.html' in renderers._templates
+
+    def test_command(self):
+        stdout = StringIO()
+        call_command('precompiletemplates', stdout=stdout, stderr=StringIO(),
+                     verbosity=2)
+        assert 'Compiled auth/user/show.html (User#show)' in stdout.getvalue()
+
+        # `CommandError`s are turned into an exit status by `call_command()`.
+        stderr = StringIO()
+        self.assertRaises(SystemExit, call_command, 'precompiletemplates',
+                          urlconf='users.tests.test_checks',
+                          stderr=stderr, stdout=StringIO())
+        assert 'broken/index.html (Broken#index)' in stderr.getvalue()
@@ -3,6 +3,7 @@
 
 from dagny.action import Action as action
 from dagny.resource import Resource
+import dagny.pagination
 import dagny.renderers
 
 __all__ = ['Resource', 'action']
@@ -156,13 +156,10 @@ class Action(object):
         def deco_wrapper(action_func):
             @wraps(action_func)
             def action_wrapper(self, *args):
-                @wraps(action_func)
-                def adapter(request, *adapter_args, **params):
-                    self.request = request
-                    self.args = adapter_args
-                    self.params = params
-                    return action_func(self, *self.args)
-                return decorator(adapter)(self.request, *args, **self.params)
+                return call_decorated(
+                    decorator, action_func, self, args,
+                    lambda: action_func(self, *self.args))
+            DECORATED[action_wrapper] = (decorator, action_func)
             return action_wrapper
         return deco_wrapper
 
@@ -171,15 +168,66 @@ class Action(object):
         self.name = method.__name__
         self.render = self.RENDERER._bind(self)
 
+        # Decorators applied with `deco()` are taken off the method, to be
+        # applied around the response cache and conditional request handling
+        # too; otherwise a cache hit or a `304` would skip them.
+        self.decorators = []
+        self.body = method
+        while self.body in DECORATED:
+            decorator, self.body = DECORATED[self.body]
+            self.decorators.append(decorator)
+
     def __repr__(self):
         return "<Action '#%s' at 0x%x>" % (self.name, id(self))
 
+    def etag(self, function):
+
+        """
+        Declare a function computing the `ETag` of this action's resource.
+
+        Use it as a decorator, like a renderer backend; the function takes the
+        same arguments as the action. See `dagny.conditional`.
+        """
+
+        self.etag_function = function
+        return self
+
+    def last_modified(self, function):
+        """Declare a function computing the resource's modification time."""
+
+        self.last_modified_function = function
+        return self
+
     def __get__(self, resource, resource_cls):
         if isinstance(resource, Resource):
             return BoundAction(self, resource, resource_cls)
         return self
 
 
+# Maps the functions `Action.deco()` returns to their decorator and the
+# function they wrap.
+DECORATED = {}
+
+
+def call_decorated(decorator, action_func, resource, args, call):
+
+    """
+    Call a function through a view decorator, as if it were a view.
+
+    The decorator sees a view taking the resource's request, `args` and
+    params; when it calls that view (perhaps with different ones), they're
+    stored on the resource and `call()` is called.
+    """
+
+    @wraps(action_func)
+    def adapter(request, *adapter_args, **params):
+        resource.request = request
+        resource.args = adapter_args
+        resource.params = params
+        return call()
+    return decorator(adapter)(resource.request, *args, **resource.params)
+
+
 class BoundAction(object):
 
     """An action which has been bound to a specific resource instance."""
@@ -194,7 +242,31 @@ class BoundAction(object):
         return "<BoundAction '%s#%s' at 0x%x>" % (self.resource_name, self.action.name, id(self))
 
     def __call__(self):
-        response = self.action.method(self.resource, *self.resource.args)
+        respond = self.respond
+        for decorator in reversed(self.action.decorators):
+            respond = self._decorated(decorator, respond)
+        return respond()
+
+    def _decorated(self, decorator, respond):
+        return lambda: call_decorated(decorator, self.action.body,
+                                      self.resource, self.resource.args,
+                                      respond)
+
+    def respond(self):
+        """Produce the response, unless it's cached or the request conditional."""
+
+        from dagny.cache import cached_response
+        from dagny.cachecontrol import add_cache_headers
+        from dagny.conditional import conditional_response
+        response = conditional_response(
+            self, lambda: cached_response(self, self.run))
+        add_cache_headers(self.action, self.resource, response)
+        return response
+
+    def run(self):
+        """Run the action, and render it if it doesn't return a response."""
+
+        response = self.action.body(self.resource, *self.resource.args)
         if response:
             return response
         return self.render()
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+
+"""
+A view which runs several resource requests in a single round trip.
+
+Pages which load lots of small resources (for example, a client-side app
+fetching a dozen `show` representations) pay a full HTTP round trip and a full
+trip through the middleware stack for each one. The `batch()` view accepts a
+JSON list of requests, dispatches each of them in-process to the Dagny
+resource routed at its path, and returns all the responses in one JSON
+document.
+
+Hook it up in your URLconf:
+
+    urlpatterns = patterns('',
+        (r'^batch/$', 'dagny.batch.batch', {'max_requests': 50}),
+        # ...
+    )
+
+And `POST` it a list of requests:
+
+    [{"method": "GET", "path": "/users/1/",
+      "headers": {"Accept": "application/json"}},
+     {"method": "PUT", "path": "/users/2/",
+      "headers": {"Content-Type": "application/x-www-form-urlencoded"},
+      "body": "first_name=Zachary"}]
+
+Only `path` is required; `method` defaults to `GET`. A `body` which is not a
+string is encoded as JSON. The response is a list of
+`{"status": ..., "headers": {...}, "body": "..."}` objects, in the same order.
+Bodies which are not valid UTF-8 are base64-encoded, and have an additional
+`"encoding": "base64"` key.
+
+Sub-requests share the batch request's session, user, cookies and database
+connection, but not its `Accept` or `Content-*` headers. They do not pass
+through the middleware stack, since the batch request itself already has.
+Only paths routed to Dagny resources can be requested.
+
+With `parallel=True`, runs of consecutive `GET` and `HEAD` requests are run in
+threads, each with its own database connection and its own copy of the user
+and session (loaded from the session store, so changes to it are discarded).
+Their reads happen outside the batch request's transaction, so a run which
+follows uncommitted writes from earlier in the batch is run in order instead.
+"""
+
+import base64
+import logging
+import threading
+import urlparse
+from StringIO import StringIO
+
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.urlresolvers import Resolver404, resolve
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         HttpResponseNotAllowed)
+from django.utils import simplejson
+
+from dagny.cache import copy_request
+from dagny.resource import Resource
+
+__all__ = ['batch']
+
+logger = logging.getLogger('dagny.batch')
+
+
+# Default maximum number of requests in a single batch.
+MAX_REQUESTS = 20
+
+# Request headers which describe the batch request itself, and so are never
+# passed on to the sub-requests.
+ENTITY_HEADERS = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_ACCEPT',
+                  'HTTP_ACCEPT_ENCODING', 'HTTP_X_REQUESTED_WITH')
+
+# Request methods which may be run in parallel, if enabled.
+PARALLEL_METHODS = ('GET', 'HEAD')
+
+
+def batch(request, max_requests=MAX_REQUESTS, parallel=False, max_workers=4):
+
+    """
+    Run a JSON list of resource requests, and return all of their responses.
+
+    :param max_requests:
+        The maximum number of requests allowed in a single batch. Larger
+        batches are rejected with a 413 response.
+    :param parallel:
+        If `True`, runs of consecutive `GET` and `HEAD` requests are executed
+        concurrently, in up to `max_workers` threads. Note that each thread
+        will use its own database connection, and its own copy of the session.
+        Other requests are always run one at a time, in order.
+    """
+
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+
+    try:
+        entries = simplejson.loads(request.raw_post_data)
+    except ValueError:
+        return HttpResponseBadRequest("Batch body must be valid JSON")
+    if not (isinstance(entries, list) and
+            all(isinstance(entry, dict) and
+                isinstance(entry.get('path'), basestring)
+                for entry in entries)):
+        return HttpResponseBadRequest(
+            "Batch body must be a list of objects with a 'path'")
+    if len(entries) > max_requests:
+        return HttpResponse("A batch may contain at most %d requests" % (
+            max_requests,), status=413, content_type='text/plain')
+
+    if parallel:
+        results = run_grouped(request, entries, max_workers)
+    else:
+        results = [run_entry(request, entry) for entry in entries]
+
+    return HttpResponse(simplejson.dumps(results),
+                        content_type='application/json')
+
+
+def run_grouped(request, entries, max_workers):
+    """Run entries in order, parallelizing runs of safe requests."""
+
+    results = []
+    group = []
+    for entry in entries + [None]:
+        if entry is not None and entry_method(entry) in PARALLEL_METHODS:
+            group.append(entry)
+            continue
+
+        if group:
+            results.extend(run_parallel(request, group, max_workers))
+            group = []
+        if entry is not None:
+            results.append(run_entry(request, entry))
+    return results
+
+
+def run_parallel(request, entries, max_workers):
+    """Run entries in up to `max_workers` threads, preserving their order."""
+
+    from django.db import connections, transaction
+
+    # Other threads' connections can't see uncommitted writes on this one.
+    dirty = any(transaction.is_dirty(using=alias) for alias in connections)
+    if len(entries) == 1 or max_workers <= 1 or dirty:
+        return [run_entry(request, entry) for entry in entries]
+
+    # Each thread gets its own copy of the request's user and session, made
+    # here, since loading them uses this thread's connection.
+    requests = [copy_request(request) for entry in entries]
+    results = [None] * len(entries)
+    indices = iter(range(len(entries)))
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    index = next(indices, None)
+                if index is None:
+                    break
+                results[index] = run_entry(requests[index], entries[index])
+        finally:
+            for connection in connections.all():
+                connection.close()
+
+    threads = [threading.Thread(target=worker)
+               for _ in xrange(min(max_workers, len(entries)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_entry(request, entry):
+    """Run a single batch entry, returning its serializable result."""
+
+    try:
+        subrequest = make_subrequest(request, entry)
+        match = resolve(subrequest.path_info,
+                        urlconf=getattr(request, 'urlconf', None))
+        if not (isinstance(match.func, type) and
+                issubclass(match.func, Resource)):
+            raise Http404
+        response = match.func(subrequest, *match.args, **match.kwargs)
+    except (Http404, Resolver404):
+        response = HttpResponse(status=404)
+    except PermissionDenied:
+        response = HttpResponse(status=403)
+    except Exception:
+        logger.exception("Error in batch request: %s %s",
+                         entry_method(entry), entry['path'])
+        response = HttpResponse(status=500)
+    return serialize_response(response)
+
+
+def make_subrequest(request, entry):
+
+    """
+    Build a request for a batch entry, derived from the batch request.
+
+    The sub-request has the same environment (and so the same cookies and
+    authentication headers) as the batch request, with the method, path,
+    query string, body and headers taken from the entry. It also shares the
+    batch request's session and user.
+    """
+
+    path, _, query_string = entry['path'].partition('?')
+    script_name = request.META.get('SCRIPT_NAME', '')
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    body = entry.get('body', '')
+    headers = dict((key.lower(), value)
+                   for key, value in (entry.get('headers') or {}).items())
+    if not isinstance(body, basestring):
+        body = simplejson.dumps(body)
+        headers.setdefault('content-type', 'application/json')
+    if isinstance(body, unicode):
+        body = body.encode('utf-8')
+
+    environ = dict((key, value) for key, value in request.environ.items()
+                   if key not in ENTITY_HEADERS)
+    environ.update({
+        'REQUEST_METHOD': entry_method(entry),
+        'PATH_INFO': urlparse.unquote(path),
+        'QUERY_STRING': query_string,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': StringIO(body),
+    })
+    for header, value in headers.items():
+        key = header.upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = 'HTTP_' + key
+        environ[key] = str(value)
+
+    subrequest = WSGIRequest(environ)
+    for attr in ('session', 'user', 'urlconf'):
+        if hasattr(request, attr):
+            setattr(subrequest, attr, getattr(request, attr))
+    return subrequest
+
+
+def serialize_response(response):
+    """Convert a response into a JSON-serializable dict."""
+
+    result = {
+        'status': response.status_code,
+        'headers': dict(response.items()),
+    }
+    body = response.content
+    try:
+        result['body'] = body.decode('utf-8')
+    except UnicodeDecodeError:
+        result['body'] = base64.b64encode(body)
+        result['encoding'] = 'base64'
+    return result
+
+
+def entry_method(entry):
+    return str(entry.get('method') or 'GET').upper()
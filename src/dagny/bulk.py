@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+
+"""
+Helpers for implementing bulk actions.
+
+Passing `bulk=True` to `resources()` routes three extra actions on the
+collection URL:
+
+    Method          | Action         | Body
+    ----------------+----------------+-------------------------------
+    POST            | `bulk_create`  | a JSON list of objects
+    PUT, PATCH      | `bulk_update`  | a JSON list of objects with ids
+    DELETE          | `bulk_destroy` | a JSON list of ids, or `?ids=`
+
+The functions in this module do the heavy lifting for those actions. They
+validate each item with a `ModelForm`, write to the database in chunks (each
+in its own transaction), and return a list of per-item results, in the same
+order as the input:
+
+    class User(Resource):
+
+        @action
+        def bulk_create(self):
+            try:
+                items = bulk.parse_items(self.request)
+            except ValueError:
+                return HttpResponseBadRequest()
+            self.results = bulk.create_all(UserForm, items)
+
+Each result is a dict with a `status` (an HTTP status code for that item),
+the item's `id`, where known, and a dict of `errors` for items which failed
+validation. Items which clash with an earlier item in the same request (on a
+unique field, or by updating the same id) fail validation too; a chunk which
+still violates a database constraint when written (because of a concurrent
+request, say) is rolled back, and each of its items gets a `409 Conflict`.
+"""
+
+from django.db import IntegrityError, transaction
+from django.forms.models import model_to_dict
+from django.utils import simplejson
+from django.utils.encoding import force_unicode
+
+__all__ = ['parse_items', 'parse_ids', 'create_all', 'update_all',
+           'destroy_all']
+
+
+# Number of items written per query/transaction.
+CHUNK_SIZE = 500
+
+
+def parse_items(request):
+    """Parse a JSON list from the request body, raising `ValueError` if not."""
+
+    items = simplejson.loads(request.raw_post_data)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON list in the request body")
+    return items
+
+
+def parse_ids(request):
+
+    """
+    Get a list of ids from a JSON list body, or from an `ids` query parameter.
+
+    The query parameter may be repeated (`?ids=1&ids=2`), comma-separated
+    (`?ids=1,2`), or both.
+    """
+
+    if request.raw_post_data.strip():
+        return parse_items(request)
+    ids = []
+    for value in request.GET.getlist('ids'):
+        ids.extend(id for id in value.split(',') if id)
+    return ids
+
+
+def create_all(form_class, items, chunk_size=CHUNK_SIZE, using=None):
+
+    """
+    Validate and create an object for each item, using a `ModelForm` class.
+
+    Valid objects are inserted `chunk_size` at a time, in a transaction per
+    chunk. Where the manager supports it (Django 1.4+), each chunk is written
+    with a single `bulk_create()` query; most databases don't report the new
+    objects' ids in that case, so their results have no `id`.
+    """
+
+    results = [None] * len(items)
+    pending = []
+    # The values of unique fields seen so far, since each form only checks
+    # them against the database.
+    seen = set()
+    for index, item in enumerate(items):
+        form = _bind(form_class, item, results, index)
+        if form is None:
+            continue
+        obj = form.save(commit=False)
+        errors = _check_unique(obj, seen)
+        if errors:
+            results[index] = {'status': 400, 'errors': errors}
+        else:
+            pending.append((index, obj))
+
+    for chunk in _chunks(pending, chunk_size):
+        objects = [obj for _, obj in chunk]
+        model = objects[0].__class__
+        try:
+            with transaction.commit_on_success(using=using):
+                if hasattr(model._default_manager, 'bulk_create'):
+                    model._default_manager.db_manager(using).bulk_create(
+                        objects)
+                else:
+                    for obj in objects:
+                        obj.save(using=using)
+        except IntegrityError:
+            _conflict(results, [index for index, _ in chunk])
+            continue
+        for index, obj in chunk:
+            results[index] = {'status': 201}
+            if obj.pk is not None:
+                results[index]['id'] = obj.pk
+    return results
+
+
+def update_all(form_class, queryset, items, partial=False,
+               chunk_size=CHUNK_SIZE, using=None, id_key='id'):
+
+    """
+    Validate and apply updates to the objects identified in each item.
+
+    Each item must have an `id_key` identifying an object in `queryset`. The
+    objects are fetched `chunk_size` at a time with `in_bulk()`, and saved in a
+    transaction per chunk. If `partial` is true (e.g. for a `PATCH`), each item
+    only needs to contain the fields which are changing.
+    """
+
+    if using is not None:
+        queryset = queryset.using(using)
+    results = [None] * len(items)
+    pk_field = queryset.model._meta.pk
+    # Items for the same id would share an instance, so only one could win.
+    seen_ids = set()
+    for chunk in _chunks(list(enumerate(items)), chunk_size):
+        ids = {}
+        for index, item in chunk:
+            try:
+                id = pk_field.to_python(item[id_key])
+            except Exception:
+                results[index] = _error("Expected an object with a valid "
+                                        "%r" % (id_key,))
+                continue
+            if id in seen_ids:
+                results[index] = _error("Repeats the %r of an earlier "
+                                        "object" % (id_key,))
+                results[index]['id'] = id
+                continue
+            seen_ids.add(id)
+            ids[index] = id
+        instances = queryset.in_bulk(ids.values())
+
+        pending = []
+        for index, item in chunk:
+            if index not in ids:
+                continue
+            instance = instances.get(ids[index])
+            if instance is None:
+                results[index] = {'status': 404, 'id': ids[index]}
+                continue
+            data = item
+            if partial:
+                data = model_to_dict(instance)
+                data.update(item)
+            form = _bind(form_class, data, results, index, instance=instance)
+            if form is not None:
+                pending.append((index, form.save(commit=False)))
+
+        try:
+            with transaction.commit_on_success(using=using):
+                for index, obj in pending:
+                    obj.save(using=using)
+        except IntegrityError:
+            _conflict(results, [index for index, _ in pending])
+            for index, obj in pending:
+                results[index]['id'] = obj.pk
+            continue
+        for index, obj in pending:
+            results[index] = {'status': 200, 'id': obj.pk}
+    return results
+
+
+def destroy_all(queryset, ids, chunk_size=CHUNK_SIZE, using=None):
+
+    """
+    Delete the objects in `queryset` with the given ids.
+
+    Deletion happens `chunk_size` ids at a time, with one `DELETE` (plus any
+    cascades) in a transaction per chunk. Ids which don't exist get a 404
+    result.
+    """
+
+    if using is not None:
+        queryset = queryset.using(using)
+    pk_field = queryset.model._meta.pk
+    results = []
+    for chunk in _chunks(list(ids), chunk_size):
+        pks = []
+        for id in chunk:
+            try:
+                pks.append(pk_field.to_python(id))
+            except Exception:
+                pks.append(None)
+
+        valid = [pk for pk in pks if pk is not None]
+        existing = set(queryset.filter(pk__in=valid)
+                       .values_list('pk', flat=True))
+        if existing:
+            with transaction.commit_on_success(using=using):
+                queryset.filter(pk__in=existing).delete()
+        for id, pk in zip(chunk, pks):
+            if pk in existing:
+                results.append({'status': 204, 'id': pk})
+            else:
+                results.append({'status': 404, 'id': id})
+    return results
+
+
+def _bind(form_class, data, results, index, **kwargs):
+    """Bind and validate a form, recording a result if it's invalid."""
+
+    if not isinstance(data, dict):
+        results[index] = _error("Expected an object")
+        return None
+    form = form_class(data, **kwargs)
+    if not form.is_valid():
+        results[index] = {
+            'status': 400,
+            'errors': dict((field, map(force_unicode, errors))
+                           for field, errors in form.errors.items()),
+        }
+        if kwargs.get('instance') is not None:
+            results[index]['id'] = kwargs['instance'].pk
+        return None
+    return form
+
+
+def _check_unique(obj, seen):
+
+    """
+    Check a new object's unique fields against those in `seen`.
+
+    Returns a dict of errors, like a form's, if any clash; otherwise the
+    object's values are added to `seen`.
+    """
+
+    values = []
+    for model_class, fields in obj._get_unique_checks()[0]:
+        value = tuple(getattr(obj, obj._meta.get_field(name).attname)
+                      for name in fields)
+        if None in value:
+            continue  # NULLs never clash.
+        if (model_class, fields, value) in seen:
+            field = fields[0] if len(fields) == 1 else '__all__'
+            return {field: [force_unicode(
+                obj.unique_error_message(model_class, fields))]}
+        values.append((model_class, fields, value))
+    seen.update(values)
+    return None
+
+
+def _conflict(results, indexes):
+    """Record a `409 Conflict` for each item of a chunk which failed to save."""
+
+    for index in indexes:
+        results[index] = {'status': 409, 'errors': {'__all__': [
+            "Conflicts with another object; none of its chunk was saved"]}}
+
+
+def _error(message):
+    return {'status': 400, 'errors': {'__all__': [message]}}
+
+
+def _chunks(seq, size):
+    for start in xrange(0, len(seq), size):
+        yield seq[start:start + size]
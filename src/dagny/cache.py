@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+
+"""
+Server-side caching of rendered responses, per action.
+
+Declare a `ResponseCache` on the actions whose responses can be reused:
+
+    from dagny.cache import ResponseCache
+
+    class User(Resource):
+
+        @action
+        def index(self):
+            self.users = paginate(self, models.User.objects.all())
+
+        index.cache = ResponseCache(timeout=300)
+
+        @action
+        def show(self, user_id):
+            self.user = get_object_or_404(models.User, id=int(user_id))
+
+        show.cache = ResponseCache(timeout=300, vary_on=('user',))
+
+A `GET` (or `HEAD`) to a cached action is first looked up in Django's cache
+framework; on a hit, the stored response is returned without running the
+action or its renderer. Responses are stored by the request path (with its
+query string), the renderer shortcodes tried up to the one which rendered the
+response (so that the many equivalent `Accept` headers browsers send share one
+entry, while backends which raise `Skip` can't mix representations up), and
+the values of anything declared in `vary_on`. Only `200 OK` responses with a
+complete body are stored; streaming responses are not.
+
+Requests from logged-in users skip the cache altogether, unless it varies on
+`'user'`, since their responses may be personal. Decorators applied with
+`action.deco()` (like `login_required`) run before the cache is consulted, but
+any access checks in the action itself only run on a miss: put them in a
+decorator, or vary on `'user'`.
+
+Successful unsafe requests (`POST`, `PUT`, `DELETE`) to any action on the
+resource invalidate its cached responses automatically:
+
+*   A request to a member URL (e.g. `update` or `destroy`) invalidates the
+    entries for that member, and for the collection.
+*   A `create` invalidates the entries for the collection.
+*   Other requests to the collection URL (e.g. `bulk_update`) invalidate the
+    entries for the collection and every member.
+
+Invalidation works by bumping generation counters which are part of each
+entry's key, so it costs one cache operation per counter, however many
+entries are affected; stale entries are simply never read again, and expire
+in their own time. The counters are kept in the same cache as the entries.
+
+When a popular entry expires, every request for it misses at once. Pass
+`coalesce=True` to have concurrent misses for the same key share one run of
+the action: within a process, the first request runs it and the others wait
+for a copy of its response; across processes, the first takes a lock in the
+cache, and the others wait for the entry to appear there.
+
+For expensive actions, pass `stale_while_revalidate` too: for that many
+seconds after an entry's `timeout`, it's still served straight away, while a
+single background thread runs the action again and replaces it.
+"""
+
+import copy
+import cPickle as pickle
+import hashlib
+import logging
+import threading
+import time
+
+from django.utils.encoding import smart_str
+
+__all__ = ['ResponseCache', 'cached_response', 'invalidate']
+
+
+# Actions which act on a resource's collection URL, rather than a member.
+COLLECTION_ACTIONS = frozenset(['index', 'new', 'create', 'bulk_create',
+                                'bulk_update', 'bulk_destroy'])
+
+# Collection actions which only add members, leaving existing ones alone.
+CREATE_ACTIONS = frozenset(['create', 'bulk_create'])
+
+KEY_PREFIX = 'dagny'
+
+logger = logging.getLogger('dagny.cache')
+
+
+class ResponseCache(object):
+
+    """
+    A cache policy for the responses of an action.
+
+    :param timeout:
+        How long to keep responses, in seconds. Defaults to the cache
+        backend's own default timeout.
+    :param vary_on:
+        A sequence of extra inputs to key responses on. Each may be `'user'`
+        (the ID of the logged-in user), the name of a request header (e.g.
+        `'Accept-Language'`), or a function taking the request and returning
+        a string.
+    :param cache:
+        The alias of the Django cache to use (from the `CACHES` setting).
+    :param coalesce:
+        Whether concurrent misses for the same entry should wait for a single
+        run of the action, rather than each running it.
+    :param coalesce_timeout:
+        The longest (in seconds) a request will wait for another's run before
+        running the action itself.
+    :param stale_while_revalidate:
+        How long (in seconds) after `timeout` to keep serving a stale
+        response, while it's refreshed in the background.
+    """
+
+    def __init__(self, timeout=None, vary_on=(), cache='default',
+                 coalesce=False, coalesce_timeout=10,
+                 stale_while_revalidate=None):
+        self.timeout = timeout
+        self.vary_on = tuple(vary_on)
+        self.cache_alias = cache
+        self.coalesce = coalesce
+        self.coalesce_timeout = coalesce_timeout
+        self.stale_while_revalidate = stale_while_revalidate
+
+    def __repr__(self):
+        return "<ResponseCache timeout=%r vary_on=%r>" % (self.timeout,
+                                                           self.vary_on)
+
+    def key(self, bound_action, shortcode=None):
+
+        """
+        Return the cache key for a response to a request to a bound action.
+
+        The renderer tries each matching shortcode in turn, so a response
+        rendered by `shortcode` is keyed on the matches up to and including
+        it; any request which would try those same ones first gets the same
+        response. A response which wasn't rendered by one of the matches (it
+        was returned by the action, or by the HTML fallback) is keyed on all
+        of them.
+        """
+
+        return self._keys(bound_action, [shortcode])[0]
+
+    def keys(self, bound_action):
+        """Return every key a response to a request might be stored under."""
+
+        matches = self._matches(bound_action)
+        return self._keys(bound_action, matches + [None])
+
+    def _matches(self, bound_action):
+        return bound_action.action.render._match(bound_action.action,
+                                                 bound_action.resource)
+
+    def _keys(self, bound_action, shortcodes):
+        request = bound_action.resource.request
+        matches = self._matches(bound_action)
+        parts = [request.get_full_path()]
+        parts.extend(self._vary_value(request, vary)
+                     for vary in self.vary_on)
+        parts.extend(str(generation) for generation in
+                     get_generations(bound_action, self.cache_alias))
+
+        keys = []
+        for shortcode in shortcodes:
+            if shortcode in matches:
+                tried = matches[:matches.index(shortcode) + 1]
+            else:
+                # `None` can't be a shortcode, so this never collides with the
+                # key for a response rendered by the last match.
+                tried = matches + [None]
+            digest = hashlib.md5('\0'.join(map(smart_str, parts + tried)))
+            keys.append('%s:response:%s:%s' % (KEY_PREFIX, label(bound_action),
+                                               digest.hexdigest()))
+        return keys
+
+    def lookup(self, bound_action):
+
+        """
+        Find the stored response for a request to a bound action.
+
+        Returns its key, the response (or `None`), and whether it's stale.
+        """
+
+        keys = self.keys(bound_action)
+        entries = get_backend(self.cache_alias).get_many(keys)
+        for key in keys:
+            if key in entries:
+                return (key,) + self._unpack(entries[key])
+        return None, None, False
+
+    def rendered_key(self, bound_action, keys):
+
+        """
+        Pick the key, from `keys()`, for the response an action just produced.
+
+        `keys` must be taken before the action runs, so that an invalidation
+        while it's running can't have its old response stored as current.
+        """
+
+        matches = self._matches(bound_action)
+        shortcode = getattr(bound_action.resource, '_rendered_by', None)
+        if shortcode in matches:
+            return keys[matches.index(shortcode)]
+        return keys[-1]
+
+    def shares(self, request):
+
+        """
+        Whether a request may be served from (and stored in) the cache.
+
+        Responses to logged-in users may depend on who they are, so they're
+        only cached if the cache varies on `'user'`.
+        """
+
+        if 'user' in self.vary_on:
+            return True
+        user = getattr(request, 'user', None)
+        return user is None or not user.is_authenticated()
+
+    def _vary_value(self, request, vary):
+        if callable(vary):
+            return vary(request)
+        if vary == 'user':
+            user = getattr(request, 'user', None)
+            if user is None or not user.is_authenticated():
+                return ''
+            return user.pk
+        return request.META.get(
+            'HTTP_' + vary.upper().replace('-', '_'), '')
+
+    def get(self, key):
+        """Return the response stored for a key (or `None`), and if it's stale."""
+
+        return self._unpack(get_backend(self.cache_alias).get(key))
+
+    def _unpack(self, entry):
+        # With `stale_while_revalidate`, entries are stored along with the
+        # time they go stale; the backend only expires them after that.
+        if isinstance(entry, tuple):
+            fresh_until, response = entry
+            return response, time.time() >= fresh_until
+        return entry, False
+
+    def set(self, key, response):
+        if not (response.status_code == 200 and response._is_string):
+            return
+        backend = get_backend(self.cache_alias)
+        if self.stale_while_revalidate is None:
+            backend.set(key, response, self.timeout)
+            return
+        timeout = self.timeout
+        if timeout is None:
+            timeout = backend.default_timeout
+        backend.set(key, (time.time() + timeout, response),
+                    timeout + self.stale_while_revalidate)
+
+    def refresh(self, key, bound_action):
+
+        """
+        Replace a stale entry in a background thread.
+
+        Only one refresh runs for each entry at a time, across processes.
+        Returns the thread, or `None` if a refresh is already underway.
+        """
+
+        lock_key = key + ':refresh'
+        if not get_backend(self.cache_alias).add(lock_key, 1,
+                                                 REFRESH_LOCK_TIMEOUT):
+            return None
+        # The request's own thread (and its middleware) carries on using it.
+        request = copy_request(bound_action.resource.request)
+        thread = threading.Thread(target=self._refresh,
+                                  args=(key, lock_key, bound_action, request))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _refresh(self, key, lock_key, bound_action, request):
+        from django.db import close_connection
+
+        # Run the action on a new resource instance, since the request's own
+        # one is still in use.
+        old = bound_action.resource
+        resource = bound_action.resource_cls._new(request, *old.args,
+                                                  **old.params)
+        resource._called_yet = True
+        try:
+            new_action = getattr(resource, bound_action.name)
+            keys = self.keys(new_action)
+            response = new_action.run()
+            new_key = self.rendered_key(new_action, keys)
+            self.set(new_key, response)
+            if new_key != key:
+                # It was rendered differently this time; don't leave the old
+                # entry to be refreshed again.
+                get_backend(self.cache_alias).delete(key)
+        except Exception:
+            logger.exception("Error refreshing cached response: %s",
+                             request.get_full_path())
+        finally:
+            get_backend(self.cache_alias).delete(lock_key)
+            close_connection()
+
+    def fill(self, bound_action, run):
+
+        """
+        Run the action for a cache miss, and store its response.
+
+        Concurrent misses are coalesced by the key for all the request's
+        matches, since only requests which would try the same renderers can
+        share a response before it's known which one renders it.
+        """
+
+        if not self.coalesce:
+            return self._run(bound_action, run)
+        key = self.key(bound_action)
+        return coalesced(key, lambda: self._fill_locked(key, bound_action, run),
+                         self.coalesce_timeout)
+
+    def _run(self, bound_action, run):
+        keys = self.keys(bound_action)
+        response = run()
+        self.set(self.rendered_key(bound_action, keys), response)
+        return response
+
+    def _fill_locked(self, key, bound_action, run):
+        # Only one process runs the action for a key at a time; the rest poll
+        # for its entry while the lock is held.
+        backend = get_backend(self.cache_alias)
+        lock_key = key + ':lock'
+        if not backend.add(lock_key, 1, self.coalesce_timeout):
+            deadline = time.time() + self.coalesce_timeout
+            while time.time() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                response = self.lookup(bound_action)[1]
+                if response is not None:
+                    return response
+                if backend.get(lock_key) is None:
+                    break
+            return self._run(bound_action, run)
+
+        try:
+            return self._run(bound_action, run)
+        finally:
+            backend.delete(lock_key)
+
+
+# How often (in seconds) to check for an entry being filled by another process.
+LOCK_POLL_INTERVAL = 0.05
+
+# The longest (in seconds) a background refresh may hold its lock.
+REFRESH_LOCK_TIMEOUT = 60
+
+
+class Flight(object):
+
+    """A run of an action which concurrent identical requests are waiting on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+
+
+# In-flight runs by cache key, for this process.
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def copy_request(request):
+
+    """
+    Copy a request, for another thread to use while the original is in use.
+
+    The copy has its own `META`, its own copy of `user`, and its own `session`
+    (loaded afresh from the session store, so changes made but not yet saved
+    by the original request aren't seen).
+    """
+
+    clone = copy.copy(request)
+    clone.META = dict(request.META)
+    if hasattr(request, 'environ'):
+        clone.environ = clone.META
+    user = getattr(request, 'user', None)
+    if user is not None:
+        clone.user = copy.copy(user)
+    session = getattr(request, 'session', None)
+    if session is not None:
+        from django.conf import settings
+        from django.utils.importlib import import_module
+
+        engine = import_module(settings.SESSION_ENGINE)
+        clone.session = engine.SessionStore(session.session_key)
+    return clone
+
+
+def coalesced(key, run, timeout):
+
+    """
+    Call `run()` once for all the concurrent callers with the same key.
+
+    The first caller runs it; the others wait (for up to `timeout` seconds)
+    and get a copy of its response. If that response can't be shared (it's
+    streaming, or `run()` raised an exception), or the wait times out, they
+    call `run()` themselves.
+    """
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = Flight()
+
+    if not leader:
+        flight.done.wait(timeout)
+        if flight.response is not None:
+            return copy_response(flight.response)
+        return run()
+
+    try:
+        response = run()
+        if response._is_string:
+            # Copy now, since the leader's response may be modified on its
+            # way out (by middleware, say) while followers are copying it.
+            flight.response = copy_response(response)
+        return response
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def copy_response(response):
+    return pickle.loads(pickle.dumps(response, pickle.HIGHEST_PROTOCOL))
+
+
+# How long (in seconds) generation counters are kept. They must outlive every
+# entry keyed on them; this is the longest relative timeout memcached allows.
+GENERATION_TIMEOUT = 60 * 60 * 24 * 30
+
+# Cache backends by alias.
+_backends = {}
+
+
+def get_backend(alias='default'):
+    backend = _backends.get(alias)
+    if backend is None:
+        from django.core.cache import get_cache
+        backend = _backends[alias] = get_cache(alias)
+    return backend
+
+
+def cached_response(bound_action, run):
+
+    """
+    Produce the response for a bound action, using its `cache` if it has one.
+
+    `run` is called to run the action and its renderer as usual. This is
+    called by `BoundAction.__call__()`; it also invalidates cached responses
+    after successful unsafe requests.
+    """
+
+    request = bound_action.resource.request
+    if request.method in ('GET', 'HEAD'):
+        cache = getattr(bound_action.action, 'cache', None)
+        if cache is None or not cache.shares(request):
+            return run()
+        key, response, stale = cache.lookup(bound_action)
+        if response is None:
+            response = cache.fill(bound_action, run)
+        elif stale:
+            cache.refresh(key, bound_action)
+        return response
+
+    response = run()
+    if response.status_code < 400 and cache_aliases(bound_action.resource_cls):
+        invalidate(bound_action)
+    return response
+
+
+# The aliases of the caches each resource class's actions use.
+_cache_aliases = {}
+
+
+def cache_aliases(resource_cls):
+    try:
+        return _cache_aliases[resource_cls]
+    except KeyError:
+        pass
+
+    from dagny.action import Action
+
+    aliases = set()
+    for name in dir(resource_cls):
+        attribute = getattr(resource_cls, name, None)
+        if isinstance(attribute, Action):
+            cache = getattr(attribute, 'cache', None)
+            if cache is not None:
+                aliases.add(cache.cache_alias)
+    result = _cache_aliases[resource_cls] = frozenset(aliases)
+    return result
+
+
+def label(bound_action):
+    resource_cls = bound_action.resource_cls
+    return '%s.%s' % (resource_cls.__module__, resource_cls.__name__)
+
+
+def generation_keys(bound_action):
+
+    """
+    Return the keys of the generation counters for a request's entries.
+
+    Collection actions depend on the collection's counter; member actions on
+    the counter for all members and the one for their own member (identified
+    by the positional arguments from the URL).
+    """
+
+    prefix = '%s:generation:%s' % (KEY_PREFIX, label(bound_action))
+    if is_collection(bound_action):
+        return [prefix]
+    member = hashlib.md5(
+        '\0'.join(map(smart_str, bound_action.resource.args))).hexdigest()
+    return [prefix + ':members', prefix + ':member:' + member]
+
+
+def is_collection(bound_action):
+    return (bound_action.name in COLLECTION_ACTIONS or
+            not bound_action.resource.args)
+
+
+def get_generations(bound_action, alias='default'):
+    """Return the current values of a request's generation counters."""
+
+    backend = get_backend(alias)
+    keys = generation_keys(bound_action)
+    values = backend.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    if missing:
+        # Start from the current time, rather than 0, so that entries from
+        # before a counter was evicted can't come back to life.
+        initial = int(time.time() * 1000000)
+        for key in missing:
+            if not backend.add(key, initial, GENERATION_TIMEOUT):
+                initial = backend.get(key, initial)
+            values[key] = initial
+    return [values[key] for key in keys]
+
+
+def invalidate(bound_action):
+
+    """
+    Invalidate the cached responses affected by an unsafe request.
+
+    See the module documentation for what's invalidated.
+    """
+
+    prefix = '%s:generation:%s' % (KEY_PREFIX, label(bound_action))
+    keys = [prefix]
+    if not is_collection(bound_action):
+        keys.append(generation_keys(bound_action)[-1])
+    elif bound_action.name not in CREATE_ACTIONS:
+        keys.append(prefix + ':members')
+
+    # Counters are set afresh, rather than `incr()`ed, since some backends'
+    # `incr()` resets the timeout to their default.
+    now = int(time.time() * 1000000)
+    for alias in cache_aliases(bound_action.resource_cls):
+        backend = get_backend(alias)
+        values = backend.get_many(keys)
+        backend.set_many(dict((key, max(now, values.get(key, 0) + 1))
+                              for key in keys), GENERATION_TIMEOUT)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+"""
+`Cache-Control` and `Vary` headers for the responses to actions.
+
+A resource's representations are chosen by content negotiation, so a response
+can only be stored by a shared cache (a CDN, or a caching proxy) if it says
+which request headers it depends on. Every response to an action with more
+than one renderer backend therefore carries `Vary: Accept`, along with any
+headers declared in the action's `ResponseCache(vary_on=...)` (`'user'`
+becomes `Vary: Cookie`).
+
+With that in place, declare a cache policy on a resource, or on individual
+actions (which override the resource's):
+
+    from dagny.cachecontrol import CacheControl
+
+    class Article(Resource):
+
+        cache_control = CacheControl(public=True, max_age=60, s_maxage=600,
+                                     stale_if_error=86400)
+
+        @action
+        def edit(self, article_id):
+            # ...
+
+        edit.cache_control = CacheControl(private=True, no_cache=True)
+
+The policy is added to successful (and cacheable error) responses to `GET` and
+`HEAD` requests, and to `304 Not Modified` responses, unless the response
+already has a `Cache-Control` header. Headers are added by
+`BoundAction.__call__()`, so they apply to responses the action returns
+itself, as well as to rendered ones.
+"""
+
+__all__ = ['CacheControl', 'vary_headers']
+
+
+# Status codes which are cacheable by default (RFC 7231, section 6.1).
+CACHEABLE_STATUSES = frozenset([200, 203, 204, 300, 301, 404, 405, 410, 414,
+                                501])
+
+
+class CacheControl(object):
+
+    """
+    A `Cache-Control` policy.
+
+        >>> CacheControl(public=True, max_age=60, stale_if_error=3600)
+        <CacheControl public, max-age=60, stale-if-error=3600>
+
+    :param public, private:
+        Whether shared caches may store the response.
+    :param max_age:
+        How long (in seconds) any cache may consider the response fresh.
+    :param s_maxage:
+        Overrides `max_age` for shared caches.
+    :param stale_while_revalidate, stale_if_error:
+        How long (in seconds) caches may serve the response once stale, while
+        they revalidate it in the background or when the origin is failing
+        (RFC 5861).
+    :param no_cache, no_store, must_revalidate:
+        The directives of the same names.
+    :param vary:
+        Extra request headers the response depends on, for the `Vary` header.
+    """
+
+    def __init__(self, public=False, private=False, max_age=None,
+                 s_maxage=None, stale_while_revalidate=None,
+                 stale_if_error=None, no_cache=False, no_store=False,
+                 must_revalidate=False, vary=()):
+        if public and private:
+            raise ValueError("A response can't be both public and private")
+        directives = [('public', public), ('private', private),
+                      ('no_cache', no_cache), ('no_store', no_store),
+                      ('must_revalidate', must_revalidate),
+                      ('max_age', max_age), ('s_maxage', s_maxage),
+                      ('stale_while_revalidate', stale_while_revalidate),
+                      ('stale_if_error', stale_if_error)]
+        self.directives = [(name, value) for name, value in directives
+                           if value not in (None, False)]
+        self.vary = tuple(vary)
+
+    def __repr__(self):
+        return "<CacheControl %s>" % (self.header,)
+
+    @property
+    def header(self):
+        """The value of the `Cache-Control` header for this policy."""
+
+        return ', '.join(
+            name.replace('_', '-') + ('' if value is True else '=%s' % value)
+            for name, value in self.directives)
+
+
+def get_cache_control(action, resource):
+    """Return the `cache_control` of the action, or else of the resource."""
+
+    return (getattr(action, 'cache_control', None) or
+            getattr(resource, 'cache_control', None))
+
+
+def vary_headers(action, resource):
+
+    """
+    Return the request headers an action's responses depend on.
+
+        >>> from dagny import Resource
+        >>> from dagny.action import Action as action
+        >>> class Article(Resource):
+        ...     @action
+        ...     def show(self):
+        ...         pass
+        ...     @action
+        ...     def edit(self):
+        ...         pass
+
+        >>> vary_headers(Article.show, Article)
+        ['Accept', 'X-PJAX']
+
+    An action with a single renderer backend has no `Vary: Accept`, since it
+    can only produce one representation:
+
+        >>> for shortcode in Article.edit.render._keys():
+        ...     if shortcode != 'html':
+        ...         del Article.edit.render[shortcode]
+        >>> vary_headers(Article.edit, Article)
+        []
+
+    """
+
+    headers = []
+    shortcodes = action.render._keys()
+    if len(shortcodes) > 1:
+        headers.append('Accept')
+    if 'fragment' in shortcodes:
+        # PJAX requests are answered with just a fragment of the page.
+        headers.append('X-PJAX')
+    cache = getattr(action, 'cache', None)
+    for vary in getattr(cache, 'vary_on', ()):
+        if vary == 'user':
+            headers.append('Cookie')
+        elif isinstance(vary, basestring):
+            headers.append(vary)
+    policy = get_cache_control(action, resource)
+    if policy is not None:
+        headers.extend(policy.vary)
+    return headers
+
+
+def add_cache_headers(action, resource, response):
+
+    """
+    Add `Vary` and `Cache-Control` headers to the response to an action.
+
+    A `304 Not Modified` gets them too, since it must repeat the headers the
+    `200 OK` would have had (RFC 7232, section 4.1).
+    """
+
+    from django.utils.cache import patch_vary_headers
+
+    headers = vary_headers(action, resource)
+    if headers:
+        patch_vary_headers(response, headers)
+
+    policy = get_cache_control(action, resource)
+    if (policy is not None and policy.directives and
+            resource.request.method in ('GET', 'HEAD') and
+            (response.status_code in CACHEABLE_STATUSES or
+             response.status_code == 304) and
+            not response.has_header('Cache-Control')):
+        response['Cache-Control'] = policy.header
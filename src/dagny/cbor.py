@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+
+"""
+A small, self-contained CBOR (RFC 7049) encoder and decoder.
+
+[CBOR](http://cbor.io/) is a binary data format with the same data model as
+JSON, but which is smaller on the wire and much cheaper to parse. Dagny uses
+it for the generic `cbor` renderer backend (`application/cbor`), which
+represents the same exposed data as the JSON backend:
+
+    >>> data = {'username': u'zack', 'id': 1, 'tags': [True, None, 1.5]}
+    >>> encoded = dumps(data)
+    >>> len(encoded) < len('{"username": "zack", "id": 1, '
+    ...                    '"tags": [true, null, 1.5]}')
+    True
+    >>> loads(encoded) == data
+    True
+
+Type mapping:
+
+*   `int` and `long` become integers (with bignum tags beyond 64 bits).
+*   `unicode` and `str` become text strings; `str` is assumed to be UTF-8, as
+    it is for JSON. Use `bytearray` for binary data, which becomes a byte
+    string (and is decoded as `str`).
+*   `float` becomes a double-precision float.
+*   `True`, `False` and `None` become the corresponding simple values.
+*   Lists, tuples and other iterables become arrays; dicts become maps.
+*   Timezone-aware `datetime` values are converted to UTC and become tagged
+    (tag 0) RFC 3339 strings, ending in `Z`. Naive `datetime`s (which is all
+    of them without time zone support), dates and times become plain ISO 8601
+    strings, since tag 0 requires an offset.
+*   `Decimal`s become decimal fractions (tag 4), and `UUID`s tagged (tag 37)
+    byte strings.
+
+Other types can be handled by passing a `default` function, which should
+convert a value into something encodable (e.g. `JSONEncoder().default`).
+"""
+
+import datetime
+import decimal
+import struct
+import uuid
+
+__all__ = ['dumps', 'loads', 'CBORDecodeError']
+
+
+class CBORDecodeError(ValueError):
+    """The data being decoded is not valid (or supported) CBOR."""
+
+
+# Major types, shifted into the top three bits of the initial byte.
+UNSIGNED, NEGATIVE, BYTES, TEXT, ARRAY, MAP, TAG, SIMPLE = [
+    major << 5 for major in xrange(8)]
+
+FALSE, TRUE, NULL = '\xf4', '\xf5', '\xf6'
+BREAK = 0xff
+
+_UINT8 = struct.Struct('>B')
+_UINT16 = struct.Struct('>H')
+_UINT32 = struct.Struct('>I')
+_UINT64 = struct.Struct('>Q')
+_FLOAT32 = struct.Struct('>f')
+_FLOAT64 = struct.Struct('>d')
+
+
+def dumps(obj, default=None):
+
+    """
+    Encode `obj` as a CBOR byte string.
+
+        >>> dumps([1, -1, u'a', 'b', bytearray('c')])
+        '\\x85\\x01 aaabAc'
+
+    """
+
+    chunks = []
+    _encode(obj, chunks.append, default)
+    return ''.join(chunks)
+
+
+# Encoded forms of recently-seen map keys. Representations repeat the same
+# keys for every object in a collection, so this saves re-encoding them.
+_key_cache = {}
+KEY_CACHE_SIZE = 1024
+
+
+def _head(major, length):
+    """Encode the initial byte(s) for a major type and length/value."""
+
+    if length < 24:
+        return chr(major | length)
+    elif length < 0x100:
+        return chr(major | 24) + _UINT8.pack(length)
+    elif length < 0x10000:
+        return chr(major | 25) + _UINT16.pack(length)
+    elif length < 0x100000000:
+        return chr(major | 26) + _UINT32.pack(length)
+    return chr(major | 27) + _UINT64.pack(length)
+
+
+def _encode_int(value, write, default):
+    if value >= 0:
+        if value < 0x10000000000000000:
+            write(_head(UNSIGNED, value))
+        else:
+            _encode_bignum(2, value, write)
+    else:
+        value = -1 - value
+        if value < 0x10000000000000000:
+            write(_head(NEGATIVE, value))
+        else:
+            _encode_bignum(3, value, write)
+
+
+def _encode_bignum(tag, value, write):
+    digits = '%x' % (value,)
+    data = ('0' * (len(digits) % 2) + digits).decode('hex')
+    write(_head(TAG, tag) + _head(BYTES, len(data)) + data)
+
+
+def _encode_text(value, write, default):
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    length = len(value)
+    if length < 24:
+        write(chr(TEXT | length) + value)
+    else:
+        write(_head(TEXT, length) + value)
+
+
+def _encode_bytes(value, write, default):
+    write(_head(BYTES, len(value)))
+    write(str(value))
+
+
+def _encode_float(value, write, default):
+    write('\xfb' + _FLOAT64.pack(value))
+
+
+def _encode_bool(value, write, default):
+    write(TRUE if value else FALSE)
+
+
+def _encode_none(value, write, default):
+    write(NULL)
+
+
+def _encode_array(value, write, default):
+    write(_head(ARRAY, len(value)))
+    for item in value:
+        _encode(item, write, default)
+
+
+def _encode_map(value, write, default):
+    write(_head(MAP, len(value)))
+    for key, item in value.iteritems():
+        encoded_key = _key_cache.get(key)
+        if encoded_key is None:
+            chunks = []
+            _encode(key, chunks.append, default)
+            encoded_key = ''.join(chunks)
+            if isinstance(key, basestring):
+                if len(_key_cache) >= KEY_CACHE_SIZE:
+                    _key_cache.clear()
+                _key_cache[key] = encoded_key
+        write(encoded_key)
+        _encode(item, write, default)
+
+
+def _encode_datetime(value, write, default):
+    offset = value.utcoffset()
+    if offset is None:
+        _encode_text(value.isoformat(), write, default)
+        return
+    utc = (value - offset).replace(tzinfo=None)
+    write('\xc0')  # Tag 0: RFC 3339 date/time string.
+    _encode_text(utc.isoformat() + 'Z', write, default)
+
+
+def _encode_isoformat(value, write, default):
+    _encode_text(value.isoformat(), write, default)
+
+
+def _encode_decimal(value, write, default):
+    sign, digits, exponent = value.as_tuple()
+    if not isinstance(exponent, (int, long)):
+        raise ValueError("Can't encode %r as CBOR" % (value,))
+    mantissa = int(''.join(map(str, digits)) or '0')
+    write('\xc4\x82')  # Tag 4: decimal fraction, [exponent, mantissa].
+    _encode_int(exponent, write, default)
+    _encode_int(-mantissa if sign else mantissa, write, default)
+
+
+def _encode_uuid(value, write, default):
+    write('\xd8\x25')  # Tag 37: UUID.
+    _encode_bytes(value.bytes, write, default)
+
+
+ENCODERS = {
+    int: _encode_int,
+    long: _encode_int,
+    bool: _encode_bool,
+    unicode: _encode_text,
+    str: _encode_text,
+    bytearray: _encode_bytes,
+    float: _encode_float,
+    type(None): _encode_none,
+    list: _encode_array,
+    tuple: _encode_array,
+    dict: _encode_map,
+    datetime.datetime: _encode_datetime,
+    datetime.date: _encode_isoformat,
+    datetime.time: _encode_isoformat,
+    decimal.Decimal: _encode_decimal,
+    uuid.UUID: _encode_uuid,
+}
+
+
+def _encode(obj, write, default, _encoders=ENCODERS):
+    encoder = _encoders.get(type(obj))
+    if encoder is not None:
+        return encoder(obj, write, default)
+
+    for cls, encoder in ENCODERS.iteritems():
+        if isinstance(obj, cls):
+            return encoder(obj, write, default)
+    if hasattr(obj, '__iter__'):
+        return _encode_array(list(obj), write, default)
+    if default is not None:
+        return _encode(default(obj), write, default)
+    raise TypeError("%r is not CBOR serializable" % (obj,))
+
+
+def loads(data):
+
+    """
+    Decode a CBOR byte string.
+
+        >>> loads('\\x83\\x01\\x20\\x61a')
+        [1, -1, u'a']
+
+    Raises `CBORDecodeError` if `data` is invalid, or has trailing bytes.
+    """
+
+    try:
+        value, offset = _decode(data, 0)
+    except (IndexError, struct.error):
+        raise CBORDecodeError("Unexpected end of data")
+    if offset != len(data):
+        raise CBORDecodeError("Trailing data at offset %d" % (offset,))
+    return value
+
+
+def _decode_length(data, offset, info):
+    """Decode the argument of a data item; return `(value, offset)`."""
+
+    if info < 24:
+        return info, offset
+    elif info == 24:
+        return ord(data[offset]), offset + 1
+    elif info == 25:
+        return _UINT16.unpack_from(data, offset)[0], offset + 2
+    elif info == 26:
+        return _UINT32.unpack_from(data, offset)[0], offset + 4
+    elif info == 27:
+        return _UINT64.unpack_from(data, offset)[0], offset + 8
+    elif info == 31:
+        return None, offset  # Indefinite length.
+    raise CBORDecodeError("Invalid additional information %d" % (info,))
+
+
+def _decode(data, offset):
+    initial = ord(data[offset])
+    offset += 1
+    major, info = initial & 0xe0, initial & 0x1f
+
+    if major == SIMPLE:
+        return _decode_simple(data, offset, info)
+
+    length, offset = _decode_length(data, offset, info)
+    if major == UNSIGNED:
+        return length, offset
+    elif major == NEGATIVE:
+        return -1 - length, offset
+    elif major in (BYTES, TEXT):
+        if length is None:
+            chunks = []
+            while ord(data[offset]) != BREAK:
+                chunk, offset = _decode(data, offset)
+                chunks.append(chunk)
+            value, offset = chunks[0][:0].join(chunks), offset + 1
+        else:
+            value, offset = data[offset:offset + length], offset + length
+            if len(value) != length:
+                raise CBORDecodeError("Unexpected end of data")
+            if major == TEXT:
+                value = value.decode('utf-8')
+        return value, offset
+    elif major == ARRAY:
+        items = []
+        while (len(items) < length if length is not None
+               else ord(data[offset]) != BREAK):
+            item, offset = _decode(data, offset)
+            items.append(item)
+        return items, offset + (length is None)
+    elif major == MAP:
+        items = {}
+        count = 0
+        while (count < length if length is not None
+               else ord(data[offset]) != BREAK):
+            key, offset = _decode(data, offset)
+            items[key], offset = _decode(data, offset)
+            count += 1
+        return items, offset + (length is None)
+
+    # major == TAG
+    value, offset = _decode(data, offset)
+    return _decode_tag(length, value), offset
+
+
+def _decode_tag(tag, value):
+    if tag in (2, 3):
+        number = int(value.encode('hex') or '0', 16)
+        return number if tag == 2 else -1 - number
+    elif tag == 4:
+        exponent, mantissa = value
+        return decimal.Decimal(mantissa).scaleb(exponent)
+    elif tag == 37:
+        return uuid.UUID(bytes=value)
+    # Other tags (including date/time strings) are returned untagged.
+    return value
+
+
+def _decode_simple(data, offset, info):
+    if info == 20:
+        return False, offset
+    elif info == 21:
+        return True, offset
+    elif info in (22, 23):
+        return None, offset
+    elif info == 25:
+        return _decode_half(_UINT16.unpack_from(data, offset)[0]), offset + 2
+    elif info == 26:
+        return _FLOAT32.unpack_from(data, offset)[0], offset + 4
+    elif info == 27:
+        return _FLOAT64.unpack_from(data, offset)[0], offset + 8
+    elif info < 20:
+        return info, offset
+    raise CBORDecodeError("Unsupported simple value %d" % (info,))
+
+
+def _decode_half(half):
+    exponent = (half >> 10) & 0x1f
+    mantissa = half & 0x3ff
+    if exponent == 0:
+        value = mantissa * 2.0 ** -24
+    elif exponent == 0x1f:
+        value = float('nan') if mantissa else float('inf')
+    else:
+        value = (mantissa + 1024) * 2.0 ** (exponent - 25)
+    return -value if half & 0x8000 else value
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+"""
+Sanity checks for routed resources.
+
+A lot of resource misconfigurations only show up at runtime, and usually only
+under real traffic: as 404s and 405s for actions which don't exist, 406s or
+500s from broken renderers, slow renderer fallbacks, or missing templates.
+The checks in this module inspect every Dagny route in a URLconf up front, so
+that you can run them before deploying (see the `checkresources` management
+command) or when your application boots:
+
+    from dagny.checks import validate
+    validate()  # Raises `ImproperlyConfigured` if any check fails.
+
+Each check is a function which accepts a list of `Route`s (as produced by
+`dagny.urls.router.iter_routes()`) and yields `CheckMessage`s. You can add your
+own to the `CHECKS` list.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from dagny import conneg
+from dagny.action import Action
+from dagny.urls.router import iter_routes, routed_actions
+from dagny.warmup import precompile_templates
+
+__all__ = ['CheckMessage', 'ERROR', 'WARNING', 'CHECKS', 'run_checks',
+           'validate']
+
+
+WARNING = 'WARNING'
+ERROR = 'ERROR'
+
+class CheckMessage(object):
+
+    """
+    A problem found by a check.
+
+        >>> CheckMessage(ERROR, "Something is wrong", 'User#show')
+        <CheckMessage ERROR 'User#show': Something is wrong>
+
+    """
+
+    def __init__(self, level, message, obj=None):
+        self.level = level
+        self.message = message
+        self.obj = obj
+
+    def __repr__(self):
+        return "<CheckMessage %s %r: %s>" % (self.level, self.obj, self.message)
+
+    def __unicode__(self):
+        if self.obj is None:
+            return u"%s: %s" % (self.level, self.message)
+        return u"%s: %s: %s" % (self.level, self.obj, self.message)
+
+    def __str__(self):
+        return unicode(self).encode('utf-8')
+
+    @property
+    def is_error(self):
+        return self.level == ERROR
+
+
+def run_checks(urlconf=None, checks=None):
+    """Run every check against the routes in a URLconf; return the messages."""
+
+    if checks is None:
+        checks = CHECKS
+    routes = list(iter_routes(urlconf))
+
+    messages = []
+    for check in checks:
+        messages.extend(check(routes))
+    return messages
+
+
+def validate(urlconf=None, checks=None):
+    """Run the checks, raising `ImproperlyConfigured` if any errors occur."""
+
+    errors = [msg for msg in run_checks(urlconf, checks) if msg.is_error]
+    if errors:
+        raise ImproperlyConfigured(
+            "Dagny resource checks failed:\n" +
+            "\n".join("  " + str(error) for error in errors))
+
+
+## Checks
+
+def check_undefined_actions(routes):
+
+    """
+    Warn about routes which map HTTP methods to undefined actions.
+
+    Requests using these methods will get a 405 (or a 404, if none of the
+    methods on the URL are defined). Restrict the actions which are routed
+    using the `actions` argument to `resources()` and `resource()`.
+    """
+
+    seen = set()
+    for route in routes:
+        for method, action_name in sorted(route.methods.iteritems()):
+            key = (route.regex, method)
+            if key in seen:
+                continue
+            seen.add(key)
+            if not isinstance(getattr(route.resource, action_name, None), Action):
+                yield CheckMessage(WARNING,
+                    "%s is routed to %r, which is not an action on %s.%s" % (
+                        method, action_name, route.resource.__module__,
+                        route.resource.__name__),
+                    route.regex)
+
+
+def check_duplicate_names(routes):
+
+    """
+    Flag route names which are defined for more than one URL.
+
+    `reverse()` and `{% url %}` will silently pick one of them.
+    """
+
+    regexes = {}
+    for route in routes:
+        if route.name is not None:
+            regexes.setdefault(route.name, set()).add(route.regex)
+
+    for name, name_regexes in sorted(regexes.iteritems()):
+        if len(name_regexes) > 1:
+            yield CheckMessage(ERROR,
+                "Route name is used for more than one URL (%s); pass a "
+                "distinct `name` to each `resources()`/`resource()` call" % (
+                    ", ".join(sorted(name_regexes)),),
+                name)
+
+
+def check_renderers(routes):
+
+    """
+    Flag routed actions whose renderer backends can never be reached.
+
+    An action with no renderer backends will always produce a 406 response,
+    unless it returns a response of its own. A backend whose shortcode is not
+    in `dagny.conneg.MIMETYPES` will cause content negotiation to fail.
+    """
+
+    for label, resource, action, methods in routed_actions(routes):
+        shortcodes = action.render._keys()
+        if not shortcodes:
+            yield CheckMessage(WARNING,
+                "Action has no renderer backends, so will produce a 406 "
+                "response unless it returns one of its own", label)
+        for shortcode in shortcodes:
+            if shortcode not in conneg.MIMETYPES:
+                yield CheckMessage(ERROR,
+                    "Renderer backend %r has no mimetype registered in "
+                    "dagny.conneg.MIMETYPES" % (shortcode,), label)
+
+
+def check_skip_order(routes):
+
+    """
+    Warn about backends which may raise `Skip` ahead of ones which won't.
+
+    Content negotiation tries backends in the order they were defined, so a
+    backend which is likely to skip will be run (and thrown away) before the
+    one which produces the response. Define these backends last.
+
+    Whether a backend may skip is decided by looking for references to `Skip`
+    in its code; a backend can override this by setting a `may_skip`
+    attribute. Generic backends are not considered, since they're shared by
+    every action and always come before its own backends.
+    """
+
+    for label, resource, action, methods in routed_actions(routes):
+        skipping = []
+        for shortcode, backend in action.render._items():
+            if backend is Action.RENDERER._get(shortcode):
+                continue
+            if may_skip(backend):
+                skipping.append(shortcode)
+            elif skipping:
+                yield CheckMessage(WARNING,
+                    "Renderer backend(s) %s may raise Skip, but are tried "
+                    "before %r" % (", ".join(map(repr, skipping)), shortcode),
+                    label)
+                break
+
+
+def check_pagination(routes):
+
+    """
+    Warn about `index` actions on resources with no `paginator`.
+
+    An unpaginated index will load and render the entire collection on every
+    request. See `dagny.pagination`.
+    """
+
+    for label, resource, action, methods in routed_actions(routes):
+        if (action.name == 'index' and
+                getattr(resource, 'paginator', None) is None):
+            yield CheckMessage(WARNING,
+                "Resource has no `paginator`, so this index may load the "
+                "entire collection", label)
+
+
+def check_templates(routes):
+
+    """
+    Flag missing or broken templates for the generic HTML backend.
+
+    Only actions routed to by `GET` are checked; actions for the other methods
+    conventionally redirect or re-render another action. An action with
+    backends of its own (such as a JSON-only API action) may never be meant
+    to render HTML, so a missing template is only a warning for it; remove
+    its `'html'` backend to silence it.
+    """
+
+    from django.template import TemplateDoesNotExist
+
+    own_backends = set()
+    for label, resource, action, methods in routed_actions(routes):
+        for shortcode, backend in action.render._items():
+            if backend is not Action.RENDERER._get(shortcode):
+                own_backends.add(label)
+
+    compiled, failures = precompile_templates(routes=routes, cache=False)
+    for label, template_name, exc in failures:
+        if isinstance(exc, TemplateDoesNotExist):
+            if label in own_backends:
+                yield CheckMessage(WARNING,
+                    "Template %r does not exist; if this action isn't "
+                    "rendered as HTML, remove its 'html' renderer backend" % (
+                        template_name,), label)
+            else:
+                yield CheckMessage(ERROR,
+                    "Template %r does not exist" % (template_name,), label)
+        else:
+            yield CheckMessage(ERROR,
+                "Template %r is invalid: %s" % (template_name, exc), label)
+
+
+CHECKS = [
+    check_undefined_actions,
+    check_duplicate_names,
+    check_renderers,
+    check_skip_order,
+    check_pagination,
+    check_templates,
+]
+
+
+## Utilities
+
+def may_skip(backend, _seen=None):
+
+    """
+    Guess whether a renderer backend might raise `Skip`.
+
+        >>> from dagny.renderer import Skip
+        >>> def skipping(action, resource):
+        ...     raise Skip
+        >>> def not_skipping(action, resource):
+        ...     return 'response'
+
+        >>> may_skip(skipping)
+        True
+        >>> may_skip(not_skipping)
+        False
+
+    Backends defined with the `@action.render.<shortcode>` syntax are wrapped
+    in a closure, which is also inspected:
+
+        >>> from dagny.renderer import resource_method_wrapper
+        >>> may_skip(resource_method_wrapper(lambda self: Skip))
+        True
+
+    """
+
+    explicit = getattr(backend, 'may_skip', None)
+    if explicit is not None:
+        return explicit
+
+    code = getattr(backend, 'func_code', None)
+    if code is None:
+        return False
+    if 'Skip' in code.co_names:
+        return True
+
+    seen = _seen or set([backend])
+    for cell in (getattr(backend, 'func_closure', None) or ()):
+        func = cell.cell_contents
+        if callable(func) and func not in seen:
+            seen.add(func)
+            if may_skip(func, seen):
+                return True
+    return False
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""
+Conditional requests, decided before an action runs.
+
+An action can declare cheap functions which compute its `ETag` and
+`Last-Modified` validators, with the same decorator syntax as renderer
+backends. They take the same arguments as the action:
+
+    class User(Resource):
+
+        @action
+        def show(self, user_id):
+            self.user = get_object_or_404(models.User, id=int(user_id))
+
+        @show.last_modified
+        def show(self, user_id):
+            return (models.User.objects.filter(id=int(user_id))
+                    .values_list('last_login', flat=True) or [None])[0]
+
+These are evaluated before the action (and any response cache), so a client
+revalidating an unchanged representation gets a `304 Not Modified` for the
+price of one small query, rather than a full load and render. Either function
+may return `None` if the resource doesn't exist (or has no validator).
+
+The request headers are handled as in RFC 7232:
+
+*   `If-Match` and `If-Unmodified-Since` are preconditions for changes; if
+    they fail, the response is a `412 Precondition Failed`. Declare
+    validators on `update` and `destroy` to protect against lost updates:
+
+        update.last_modified(show.last_modified_function)
+
+*   `If-None-Match` and `If-Modified-Since` make `GET` and `HEAD` requests
+    conditional, producing a `304` if the representation hasn't changed. An
+    `If-None-Match` which matches on any other method is a `412`.
+
+The validators are also added to the headers of `GET` and `HEAD` responses
+(unless the renderer has already set them).
+
+Decorators applied with `action.deco()` run before the validators, so a
+`login_required` action won't answer `304` or `412` to anonymous clients;
+access checks in the action itself, though, only run if it does.
+"""
+
+from calendar import timegm
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import (http_date, parse_etags, parse_http_date_safe,
+                               quote_etag)
+
+__all__ = ['conditional_response', 'check_preconditions']
+
+
+def conditional_response(bound_action, respond):
+
+    """
+    Evaluate a bound action's validators, then respond if the request allows.
+
+    `respond` is called to produce the response as usual, unless the
+    request's conditional headers short-circuit it. This is called by
+    `BoundAction.__call__()`.
+    """
+
+    action = bound_action.action
+    etag_function = getattr(action, 'etag_function', None)
+    last_modified_function = getattr(action, 'last_modified_function', None)
+    if etag_function is None and last_modified_function is None:
+        return respond()
+
+    resource = bound_action.resource
+    request = resource.request
+    etag = last_modified = None
+    if etag_function is not None:
+        etag = etag_function(resource, *resource.args)
+    if last_modified_function is not None:
+        modified = last_modified_function(resource, *resource.args)
+        if modified is not None:
+            last_modified = timegm(modified.utctimetuple())
+
+    response = check_preconditions(request, etag, last_modified)
+    if response is None:
+        response = respond()
+    if request.method in ('GET', 'HEAD') or response.status_code == 304:
+        if etag is not None and not response.has_header('ETag'):
+            response['ETag'] = quote_etag(etag)
+        if (last_modified is not None and
+                not response.has_header('Last-Modified')):
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def check_preconditions(request, etag, last_modified):
+
+    """
+    Return a `304` or `412` response if a request's conditions call for one.
+
+    `etag` is the current (unquoted) entity tag, and `last_modified` the
+    current modification time as a UTC timestamp; either may be `None`.
+    Returns `None` if the request should be processed as normal.
+    """
+
+    meta = request.META
+    safe = request.method in ('GET', 'HEAD')
+
+    if_match = meta.get('HTTP_IF_MATCH')
+    if if_match is not None:
+        etags = parse_etags(if_match)
+        if etag is None or ('*' not in etags and etag not in etags):
+            return precondition_failed()
+    else:
+        if_unmodified_since = parse_http_date_safe(
+            meta.get('HTTP_IF_UNMODIFIED_SINCE') or '')
+        if (if_unmodified_since is not None and
+                (last_modified is None or last_modified > if_unmodified_since)):
+            return precondition_failed()
+
+    if_none_match = meta.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        if etag is not None and ('*' in etags or etag in etags):
+            return HttpResponseNotModified() if safe else precondition_failed()
+    elif safe:
+        if_modified_since = parse_http_date_safe(
+            meta.get('HTTP_IF_MODIFIED_SINCE') or '')
+        if (if_modified_since is not None and last_modified is not None and
+                last_modified <= if_modified_since):
+            return HttpResponseNotModified()
+    return None
+
+
+def precondition_failed():
+    return HttpResponse(status=412)
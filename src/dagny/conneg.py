@@ -13,6 +13,7 @@ dictionary in this module (without the leading '.' character). For example:
 
 """
 
+import hashlib
 import mimetypes
 
 from webob.acceptparse import MIMEAccept
@@ -20,10 +21,24 @@ from webob.acceptparse import MIMEAccept
 __all__ = ['MIMETYPES', 'match_accept']
 
 
+# Upper bound on the number of memoized `match_accept()` results.
+MATCH_CACHE_SIZE = 1024
+_match_cache = {}
+
+# A cache shared between processes, consulted when a result isn't memoized in
+# this one. Set this to any object with Django-style `get()` and `set()`
+# methods, such as a `dagny.shm.SharedMemoryCache` or a Django cache.
+SHARED_MATCH_CACHE = None
+
+
 # Maps renderer shortcodes => mimetypes.
 MIMETYPES = {
+    'cbor': 'application/cbor',
     'rss': 'application/rss+xml',
     'json': 'application/json',
+    'columns_json': 'application/vnd.dagny.columns+json',
+    'fragment': 'application/vnd.dagny.fragment+html',
+    'ndjson': 'application/x-ndjson',
     'rdf_xml': 'application/rdf+xml',
     'xhtml': 'application/xhtml+xml',
     'xml': 'application/xml',
@@ -57,8 +72,38 @@ def match_accept(header, shortcodes):
         >>> match_accept(header2, ['html', 'xml', 'json'])
         ['xml', 'json']
 
+    Results are memoized on the header and shortcode list, since real-world
+    traffic only ever sends a handful of distinct Accept headers:
+
+        >>> (header2, ('html', 'xml', 'json')) in _match_cache
+        True
+
     """
 
+    key = (header, tuple(shortcodes))
+    try:
+        return list(_match_cache[key])
+    except KeyError:
+        pass
+
+    shared = SHARED_MATCH_CACHE
+    if shared is None:
+        matches = _match_accept(header, shortcodes)
+    else:
+        shared_key = 'dagny:accept:' + hashlib.md5(repr(key)).hexdigest()
+        matches = shared.get(shared_key)
+        if matches is None:
+            matches = _match_accept(header, shortcodes)
+            shared.set(shared_key, matches)
+    if len(_match_cache) >= MATCH_CACHE_SIZE:
+        _match_cache.clear()
+    _match_cache[key] = tuple(matches)
+    return matches
+
+
+def _match_accept(header, shortcodes):
+    """Uncached implementation of `match_accept()`."""
+
     server_types = map(MIMETYPES.__getitem__, shortcodes)
     client_types = list(MIMEAccept(header))
     matches = []
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+
+"""
+Static export of rendered resources, for serving straight from disk.
+
+Resources which change rarely can be rendered ahead of time, into files a web
+server like nginx serves without touching Django. Declare which objects a
+resource's members are exported for:
+
+    from dagny.export import Export
+
+    class User(Resource):
+
+        export = Export(models.User.objects.filter(is_active=True),
+                        changed_field='last_modified')
+
+Then run `manage.py exportresources /srv/www/export`. Every `GET` route made
+by `URLRouter` in the root URLconf is requested for every renderer shortcode
+of its action, through the full request/response pipeline (middleware
+included), and each `200 OK` response with the expected content type is
+written to a file. Collection and singleton routes are exported once, and
+member routes once for each object in the resource's `Export`.
+
+Form routes (`new` and `edit`) aren't exported unless the `Export` says so,
+since forms usually carry a CSRF token, which would be baked into the file.
+Responses which set cookies, or have `Vary: Cookie`, depend on the client, so
+they're never written.
+
+URLs ending in a slash are written to `index.<shortcode>` within the
+matching directory (so `/users/1/` in JSON becomes `users/1/index.json`),
+and other URLs to `<path>.<shortcode>`. Each file gets a gzipped copy
+alongside it (`index.json.gz`) for nginx's `gzip_static`, and an
+`nginx.types` file maps the extensions back to their mimetypes.
+
+An incremental export (`--incremental`) only re-exports the members whose
+`changed_field` is later than the start of the previous export, along with
+every non-member route (since collections may list changed members). Deleted
+objects aren't removed; run a full export into a fresh directory for that.
+"""
+
+import datetime
+import gzip
+import os
+import re
+import tempfile
+import time
+import urlparse
+
+from django.core.urlresolvers import NoReverseMatch, reverse
+from django.utils import simplejson
+
+from dagny import conneg
+from dagny.action import Action
+from dagny.urls.router import iter_routes
+
+__all__ = ['Export', 'iter_exports', 'export']
+
+
+# The file, in the export directory, recording when the last export started.
+STATE_FILE = '.dagny-export'
+
+# Responses smaller than this aren't worth compressing.
+GZIP_MIN_LENGTH = 256
+
+# Actions which render forms, skipped unless `Export(forms=True)`.
+FORM_ACTIONS = frozenset(['new', 'edit'])
+
+
+class Export(object):
+
+    """
+    Declares the objects whose member URLs a resource exports.
+
+    :param queryset:
+        The objects to export; their primary keys fill in the ID in member
+        URLs.
+    :param changed_field:
+        A date/time field which is updated whenever an object changes, for
+        incremental exports. Without one, incremental exports include every
+        object.
+    :param forms:
+        Whether to export the `new` and `edit` routes too. Only do so if
+        their forms don't use CSRF tokens, or anything else per-client.
+    """
+
+    def __init__(self, queryset, changed_field=None, forms=False):
+        self.queryset = queryset
+        self.changed_field = changed_field
+        self.forms = forms
+
+    def ids(self, since=None):
+        """Return the primary keys to export, optionally only changed ones."""
+
+        queryset = self.queryset.all()
+        if since is not None and self.changed_field:
+            queryset = queryset.filter(**{
+                self.changed_field + '__gt':
+                    datetime.datetime.fromtimestamp(since)})
+        return list(queryset.values_list('pk', flat=True))
+
+
+def iter_exports(since=None):
+
+    """
+    Yield `(url, shortcode)` for every rendered representation to export.
+
+    `since` is a timestamp; if given, only members changed since then (and
+    all non-member routes) are yielded.
+    """
+
+    for route in iter_routes():
+        action_name = route.methods.get('GET')
+        if action_name is None or not route.name:
+            continue
+        declaration = getattr(route.resource, 'export', None)
+        if action_name in FORM_ACTIONS and not getattr(declaration, 'forms',
+                                                       False):
+            continue
+        action = getattr(route.resource, action_name, None)
+        if not isinstance(action, Action):
+            # The router answers these with a 404; `checkresources` warns.
+            continue
+        shortcodes = action.render._keys()
+
+        try:
+            urls = [reverse(route.name)]
+        except NoReverseMatch:
+            # A member route; its first argument is the object's ID.
+            if declaration is None:
+                continue
+            urls = [member_url(route, pk)
+                    for pk in declaration.ids(since=since)]
+            if None in urls:
+                # Patterns with other arguments (from an `include()`, say)
+                # can't be filled in.
+                continue
+
+        for url in urls:
+            for shortcode in shortcodes:
+                yield url, shortcode
+
+
+def member_url(route, pk):
+    groups = re.compile(route.regex).groupindex
+    try:
+        if groups:
+            name = min(groups, key=groups.get)
+            return reverse(route.name, kwargs={name: pk})
+        return reverse(route.name, args=[pk])
+    except NoReverseMatch:
+        return None
+
+
+def export_path(url, shortcode):
+
+    """
+    Return the path, relative to the export directory, for a representation.
+
+        >>> export_path('/users/1/', 'json')
+        'users/1/index.json'
+        >>> export_path('/users/1', 'json')
+        'users/1.json'
+
+    """
+
+    path = urlparse.urlparse(url).path.lstrip('/')
+    if not path or path.endswith('/'):
+        return path + 'index.' + shortcode
+    return path + '.' + shortcode
+
+
+def export(directory, processes=1, incremental=False, compress=True):
+
+    """
+    Export every routed representation into a directory.
+
+    Representations are rendered by `processes` worker processes. Returns a
+    list of `(url, shortcode, path, error)`, where `path` is the file written
+    (or `None` if nothing was), and `error` says why not.
+    """
+
+    state_path = os.path.join(directory, STATE_FILE)
+    since = None
+    if incremental and os.path.exists(state_path):
+        with open(state_path) as state_file:
+            since = simplejson.load(state_file)['started']
+    started = time.time()
+
+    jobs = [(url, shortcode, directory, compress)
+            for url, shortcode in iter_exports(since=since)]
+    if processes > 1:
+        from multiprocessing import Pool
+        from django.db import connections
+
+        # Forked workers mustn't share the parent's database connections.
+        for connection in connections.all():
+            connection.close()
+        pool = Pool(processes)
+        try:
+            results = pool.map(export_one, jobs, chunksize=16)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = map(export_one, jobs)
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    write_types(directory, set(shortcode for url, shortcode, path, error
+                               in results if path))
+    with open(state_path, 'w') as state_file:
+        simplejson.dump({'started': started}, state_file)
+    return results
+
+
+# One Django test client per process, to send requests through the handler.
+_client = None
+
+
+def export_one(job):
+    """Render and write a single representation."""
+
+    global _client
+    from django.test.client import Client
+
+    url, shortcode, directory, compress = job
+    mimetype = conneg.MIMETYPES.get(shortcode)
+    if mimetype is None:
+        return url, shortcode, None, 'no mimetype registered'
+    if _client is None:
+        _client = Client()
+    try:
+        response = _client.get(url, HTTP_ACCEPT=mimetype)
+        content = response.content
+    except Exception, exc:
+        return url, shortcode, None, '%s: %s' % (exc.__class__.__name__, exc)
+    if response.status_code != 200:
+        return url, shortcode, None, 'status %d' % (response.status_code,)
+    if response['Content-Type'].split(';')[0].strip() != mimetype:
+        return url, shortcode, None, 'content type %s' % (
+            response['Content-Type'],)
+    if response.cookies or varies_on_cookie(response):
+        return url, shortcode, None, 'depends on cookies'
+
+    path = os.path.join(directory, export_path(url, shortcode))
+    write_file(path, content)
+    if compress and len(content) >= GZIP_MIN_LENGTH:
+        write_file(path + '.gz', content, compressed=True)
+    return url, shortcode, path, None
+
+
+def varies_on_cookie(response):
+    if not response.has_header('Vary'):
+        return False
+    return 'cookie' in [header.strip().lower()
+                        for header in response['Vary'].split(',')]
+
+
+def write_file(path, content, compressed=False):
+    """Write a file atomically, so the server never sees a partial one."""
+
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # Another worker got there first.
+            if not os.path.isdir(directory):
+                raise
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.export-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            if compressed:
+                gzipped = gzip.GzipFile(fileobj=temp_file, mode='wb',
+                                        compresslevel=9)
+                gzipped.write(content)
+                gzipped.close()
+            else:
+                temp_file.write(content)
+        os.chmod(temp_path, 0644)
+        os.rename(temp_path, path)
+    except:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def write_types(directory, shortcodes):
+    """Write an nginx `types` block mapping exported extensions to mimetypes."""
+
+    # Only shortcodes with a registered mimetype can have been exported.
+    lines = ['types {\n']
+    for shortcode in sorted(shortcodes):
+        lines.append('    %s %s;\n' % (conneg.MIMETYPES[shortcode], shortcode))
+    lines.append('}\n')
+    write_file(os.path.join(directory, 'nginx.types'), ''.join(lines))
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+"""
+Sending files as responses, without reading them into memory.
+
+Renderer backends for binary representations (PDFs, images, CSV exports)
+often end up doing `HttpResponse(open(path).read())`, which holds the whole
+file in the worker's memory for the length of the download. `send_file()`
+returns a response which streams the file instead, or hands it off to the web
+server entirely:
+
+    from dagny.files import send_file
+
+    class Report(Resource):
+
+        @action
+        def show(self, report_id):
+            self.report = get_object_or_404(Report, id=report_id)
+
+        @show.render.pdf
+        def show(self):
+            return send_file(self.request, self.report.pdf_path,
+                             filename='report.pdf', attachment=True)
+
+For the common case of an action which just finds a file, there's a generic
+backend, `render_file()`. Name the attribute which holds the path (or file
+object) with `sends_file`, and install the backend for the relevant
+shortcodes:
+
+    class Report(Resource):
+
+        @action
+        def show(self, report_id):
+            self.pdf = get_object_or_404(Report, id=report_id).pdf_path
+
+        show.sends_file = 'pdf'
+        show.render['pdf'] = render_file
+
+Files are served in one of three ways:
+
+*   If the `DAGNY_SENDFILE` setting is `'x-sendfile'` (for Apache's
+    mod_xsendfile, or lighttpd), the response carries an `X-Sendfile` header
+    with the file's path and no body; the web server sends the file itself.
+*   If it's `'x-accel-redirect'` (for nginx), the response carries an
+    `X-Accel-Redirect` header. The file's path must be under
+    `DAGNY_SENDFILE_ROOT`, which is mapped to the `internal` location at
+    `DAGNY_SENDFILE_URL`.
+*   Otherwise, the file is streamed in blocks with the WSGI server's
+    `wsgi.file_wrapper` (or Django's `FileWrapper`). Single byte-range requests
+    (`Range: bytes=...`) get a `206 Partial Content` response, served from a
+    memory map of the file; unsatisfiable ranges get a `416`.
+"""
+
+import mimetypes
+import mmap
+import os
+import re
+import urllib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.http import http_date
+
+from dagny.renderer import Skip
+
+__all__ = ['send_file', 'render_file']
+
+
+# Size of the blocks a file is sent in.
+BLOCK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$')
+
+
+def send_file(request, file, content_type=None, filename=None,
+              attachment=False, status=None):
+
+    """
+    Return a response which sends a file to the client.
+
+    :param file:
+        A filesystem path, or an open file object. File objects are closed
+        once the response has been sent, and must have a real file
+        descriptor to use the `X-Sendfile` or `X-Accel-Redirect` headers or
+        byte ranges.
+    :param content_type:
+        Defaults to a guess from the filename, or `application/octet-stream`.
+    :param filename:
+        The filename to give the client in a `Content-Disposition` header.
+    :param attachment:
+        If true, the client will be asked to save the file rather than
+        display it.
+    """
+
+    if isinstance(file, basestring):
+        path, fileobj = file, None
+    else:
+        path, fileobj = getattr(file, 'name', None), file
+        if not isinstance(path, basestring) or not os.path.isfile(path):
+            path = None
+
+    if content_type is None:
+        content_type = (mimetypes.guess_type(filename or path or '')[0] or
+                        'application/octet-stream')
+
+    sendfile = getattr(settings, 'DAGNY_SENDFILE', None)
+    if sendfile and path is not None:
+        if fileobj is not None:
+            fileobj.close()
+        response = _server_response(sendfile, os.path.abspath(path),
+                                    content_type, status)
+    else:
+        if fileobj is None:
+            fileobj = open(path, 'rb')
+        response = _file_response(request, fileobj, content_type, status)
+
+    if filename or attachment:
+        disposition = 'attachment' if attachment else 'inline'
+        if filename:
+            disposition += '; filename="%s"' % (
+                filename.replace('\\', '\\\\').replace('"', '\\"'),)
+        response['Content-Disposition'] = disposition
+    return response
+
+
+def _server_response(sendfile, path, content_type, status):
+    """Return a response telling the web server to send the file at `path`."""
+
+    from django.core.exceptions import ImproperlyConfigured
+
+    response = HttpResponse(content_type=content_type, status=status)
+    path = _bytes(path)
+    if sendfile == 'x-sendfile':
+        response['X-Sendfile'] = path
+    elif sendfile == 'x-accel-redirect':
+        root = _bytes(os.path.join(
+            os.path.abspath(settings.DAGNY_SENDFILE_ROOT), ''))
+        if not path.startswith(root):
+            raise ImproperlyConfigured(
+                "%r is not under DAGNY_SENDFILE_ROOT" % (path,))
+        # nginx decodes the URI before mapping it back to a file.
+        url = (_bytes(settings.DAGNY_SENDFILE_URL).rstrip('/') + '/' +
+               urllib.quote(path[len(root):]))
+        response['X-Accel-Redirect'] = url
+    else:
+        raise ImproperlyConfigured(
+            "Unknown DAGNY_SENDFILE setting: %r" % (sendfile,))
+    return response
+
+
+def _bytes(string):
+    if isinstance(string, unicode):
+        return string.encode('utf-8')
+    return string
+
+
+def _file_response(request, fileobj, content_type, status):
+    """Return a response streaming an open file, honouring `Range`."""
+
+    size, mtime = _stat(fileobj)
+    last_modified = mtime and http_date(mtime)
+
+    byte_range = None
+    if status is None and request.method in ('GET', 'HEAD'):
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None or if_range == last_modified:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    if byte_range is None:
+        wrapper = request.META.get('wsgi.file_wrapper', _default_file_wrapper())
+        response = HttpResponse(wrapper(fileobj, BLOCK_SIZE),
+                                content_type=content_type, status=status)
+        if size is not None:
+            response['Content-Length'] = str(size)
+    elif byte_range is False:
+        fileobj.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */%d' % (size,)
+    else:
+        start, stop = byte_range
+        response = HttpResponse(RangeFileWrapper(fileobj, start, stop),
+                                content_type=content_type, status=206)
+        response['Content-Range'] = 'bytes %d-%d/%d' % (start, stop - 1, size)
+        response['Content-Length'] = str(stop - start)
+
+    if size is not None:
+        response['Accept-Ranges'] = 'bytes'
+    if last_modified:
+        response['Last-Modified'] = last_modified
+    return response
+
+
+def _stat(fileobj):
+    """Return the `(size, mtime)` of a file object, or `None`s if unknown."""
+
+    try:
+        stat = os.fstat(fileobj.fileno())
+    except (AttributeError, IOError, OSError):
+        return None, None
+    return stat.st_size, stat.st_mtime
+
+
+def _default_file_wrapper():
+    from django.core.servers.basehttp import FileWrapper
+    return FileWrapper
+
+
+def parse_range(header, size):
+
+    """
+    Parse a `Range` header into a `(start, stop)` pair of byte offsets.
+
+        >>> parse_range('bytes=0-499', 1000)
+        (0, 500)
+        >>> parse_range('bytes=500-', 1000)
+        (500, 1000)
+        >>> parse_range('bytes=-100', 1000)
+        (900, 1000)
+        >>> parse_range('bytes=900-5000', 1000)
+        (900, 1000)
+
+    Returns `False` if the range can't be satisfied, and `None` if there's no
+    header, if it's malformed, or if it asks for several ranges (in which
+    case the whole file should be sent, as HTTP allows):
+
+        >>> parse_range('bytes=1000-', 1000)
+        False
+        >>> parse_range('bytes=0-1,5-6', 1000) is None
+        True
+
+    """
+
+    if not header or size is None:
+        return None
+    match = RANGE_RE.match(header)
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # A suffix range: the last N bytes.
+        length = int(last)
+        if not length or not size:
+            return False
+        return max(0, size - length), size
+    start = int(first)
+    if last:
+        stop = int(last) + 1
+        if stop <= start:
+            return None
+    else:
+        stop = size
+    if start >= size:
+        return False
+    return start, min(stop, size)
+
+
+class RangeFileWrapper(object):
+
+    """
+    Iterate over a byte range of a file, in blocks, from a memory map.
+
+    Slicing the map copies each block straight from the page cache, without
+    the file object's own buffering. The file is closed by `close()`, which
+    Django calls once the response has been sent.
+    """
+
+    def __init__(self, fileobj, start, stop, block_size=BLOCK_SIZE):
+        self.fileobj = fileobj
+        self.start = start
+        self.stop = stop
+        self.block_size = block_size
+        self._map = None
+
+    def __iter__(self):
+        if self.stop <= self.start:
+            return
+        self._map = mmap.mmap(self.fileobj.fileno(), 0,
+                              access=mmap.ACCESS_READ)
+        for offset in xrange(self.start, self.stop, self.block_size):
+            yield self._map[offset:min(offset + self.block_size, self.stop)]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self.fileobj.close()
+
+
+def render_file(action, resource, content_type=None, status=None):
+
+    """
+    Send the file named by an action's `sends_file` attribute.
+
+    `sends_file` is the name of the resource attribute holding the path or
+    file object (as set by the action). If the action doesn't declare one, or
+    the attribute is `None`, this backend raises `Skip`.
+    """
+
+    name = getattr(action, 'sends_file', None)
+    if name is None:
+        raise Skip
+    file = getattr(resource, name, None)
+    if file is None:
+        raise Skip
+    return send_file(resource.request, file, content_type=content_type,
+                     status=status)
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+A generic HTML renderer backend using Jinja2 templates.
+
+Django's template language resolves every `{{ self.user.username }}` through
+a chain of dictionary, attribute and index lookups, which becomes a
+measurable cost on pages which render a lot of data. Jinja2 compiles templates
+to Python code instead. To use it for a resource (or a single action), set
+`template_engine`:
+
+    class User(Resource):
+
+        template_engine = 'jinja2'
+
+        @action
+        def index(self):
+            self.users = models.User.objects.all()
+
+        @action
+        def show(self, user_id):
+            # ...
+
+        show.template_engine = 'django'  # Overrides the resource.
+
+Templates are found with the same naming scheme as the Django backend (e.g.
+`auth/user/index.html`), but in different directories: those listed in the
+`JINJA2_TEMPLATE_DIRS` setting, followed by the `jinja2/` directory of each
+installed app. Jinja2 reserves the name `self`, so the resource is available
+as `resource` instead. The context also contains `request`, the output of your
+`TEMPLATE_CONTEXT_PROCESSORS`, and two helpers, `url()` (which takes the same
+arguments as `reverse()`) and `csrf_input()`.
+
+Compiled templates are kept in memory, and their bytecode is cached on disk
+(in the `JINJA2_BYTECODE_CACHE_DIR` setting, or a temporary directory) so
+that new processes don't have to compile them again. When `TEMPLATE_DEBUG` is
+on, templates are checked for changes and reloaded.
+
+This module requires Jinja2 (`pip install dagny[jinja2]`).
+"""
+
+import os
+import threading
+
+import jinja2
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+
+__all__ = ['render_jinja', 'get_environment']
+
+
+_environment = None
+_environment_lock = threading.Lock()
+
+
+def get_environment():
+    """Return the Jinja2 `Environment` used for resources, creating it once."""
+
+    global _environment
+    if _environment is None:
+        with _environment_lock:
+            if _environment is None:
+                _environment = make_environment()
+    return _environment
+
+
+def make_environment():
+    from django.template.loaders.app_directories import app_template_dirs
+
+    search_path = list(getattr(settings, 'JINJA2_TEMPLATE_DIRS', ()))
+    search_path.extend(os.path.join(os.path.dirname(directory), 'jinja2')
+                       for directory in app_template_dirs)
+
+    cache_dir = getattr(settings, 'JINJA2_BYTECODE_CACHE_DIR', None)
+    environment = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(search_path),
+        bytecode_cache=jinja2.FileSystemBytecodeCache(cache_dir),
+        auto_reload=settings.TEMPLATE_DEBUG,
+        autoescape=True,
+        cache_size=getattr(settings, 'JINJA2_CACHE_SIZE', 400),
+        extensions=getattr(settings, 'JINJA2_EXTENSIONS', ()))
+    environment.globals.update(url=url)
+    environment.filters.update(iterator=iterator)
+    return environment
+
+
+def url(viewname, *args, **kwargs):
+    """Reverse a URL, as with `{% url %}` in Django templates."""
+
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def iterator(value):
+    """Iterate over a queryset without caching its rows (a template filter)."""
+
+    from django.db.models.query import QuerySet
+
+    if isinstance(value, QuerySet):
+        return value.iterator()
+    return value
+
+
+def render_jinja(action, resource, content_type=None, status=None,
+                 current_app=None, template_name=None):
+
+    """
+    Render the template for an action with Jinja2.
+
+    This has the same signature as `dagny.renderers.render_html`, which calls
+    it for actions and resources whose `template_engine` is `'jinja2'`. As
+    there, an action with `stream = True` has its template rendered as the
+    response is sent; use the `iterator` filter on querysets in `for` loops
+    (`{% for user in resource.users|iterator %}`) so that they're fetched in
+    chunks rather than loaded whole.
+    """
+
+    from django.http import HttpResponse
+    from dagny.renderers import STREAM_BUFFER_SIZE, _buffered, get_template_name
+
+    if template_name is None:
+        template_name = get_template_name(action, resource)
+    template = get_environment().get_template(template_name)
+    if getattr(action, 'stream', False):
+        content = _buffered(template.generate(get_context(resource)),
+                            STREAM_BUFFER_SIZE)
+    else:
+        content = template.render(get_context(resource))
+    return HttpResponse(content, content_type=content_type, status=status)
+
+
+def get_context(resource):
+    """Build the template context for a resource."""
+
+    from django.core.context_processors import csrf
+    from django.template.context import get_standard_processors
+
+    request = resource.request
+    context = {}
+    for processor in get_standard_processors():
+        context.update(processor(request))
+    token = csrf(request)['csrf_token']
+    context.update({
+        'resource': resource,
+        'request': request,
+        'csrf_input': lambda: jinja2.Markup(
+            u"<input type='hidden' name='csrfmiddlewaretoken' value='%s' />")
+            % (unicode(token),),
+    })
+    return context
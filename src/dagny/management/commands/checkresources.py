@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+from optparse import make_option
+
+from django.core.management.base import CommandError, NoArgsCommand
+
+from dagny.checks import run_checks
+
+
+class Command(NoArgsCommand):
+
+    help = ("Check the Dagny resources in the URLconf for problems which "
+            "would otherwise only show up at runtime.")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--urlconf', dest='urlconf', default=None,
+                    help="The URLconf to check (defaults to ROOT_URLCONF)."),
+        make_option('--fail-on-warning', action='store_true',
+                    dest='fail_on_warning', default=False,
+                    help="Exit with an error if there are any warnings."),
+    )
+
+    def handle_noargs(self, **options):
+        messages = run_checks(urlconf=options['urlconf'])
+        for message in messages:
+            self.stderr.write("%s\n" % (message,))
+
+        errors = [msg for msg in messages if msg.is_error]
+        if errors or (messages and options['fail_on_warning']):
+            raise CommandError("%d error(s), %d warning(s)" % (
+                len(errors), len(messages) - len(errors)))
+        if int(options.get('verbosity', 1)) >= 1:
+            self.stdout.write("%d warning(s)\n" % (len(messages),))
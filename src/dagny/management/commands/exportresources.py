@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dagny.export import export
+
+
+class Command(BaseCommand):
+
+    args = '<directory>'
+    help = ("Render every routed Dagny GET action, in every format, into "
+            "static (and gzipped) files for a web server to serve.")
+
+    option_list = BaseCommand.option_list + (
+        make_option('--processes', dest='processes', type='int', default=1,
+                    help="The number of worker processes to render with."),
+        make_option('--incremental', action='store_true', dest='incremental',
+                    default=False,
+                    help="Only re-export members changed since the last "
+                         "export into this directory."),
+        make_option('--no-gzip', action='store_false', dest='compress',
+                    default=True,
+                    help="Don't write gzipped copies of the files."),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("Expected a single export directory")
+        verbosity = int(options.get('verbosity', 1))
+
+        results = export(args[0], processes=options['processes'],
+                         incremental=options['incremental'],
+                         compress=options['compress'])
+
+        written = 0
+        for url, shortcode, path, error in results:
+            if path is not None:
+                written += 1
+                if verbosity >= 2:
+                    self.stdout.write("Exported %s (%s) to %s\n" % (
+                        url, shortcode, path))
+            elif verbosity >= 2:
+                self.stdout.write("Skipped %s (%s): %s\n" % (url, shortcode,
+                                                             error))
+        if verbosity >= 1:
+            self.stdout.write("Exported %d file(s), skipped %d\n" % (
+                written, len(results) - written))
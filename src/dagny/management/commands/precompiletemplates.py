@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+from optparse import make_option
+
+from django.core.management.base import CommandError, NoArgsCommand
+
+from dagny.warmup import precompile_templates
+
+
+class Command(NoArgsCommand):
+
+    help = ("Load and compile the HTML template for every routed Dagny "
+            "action, failing if any are missing or invalid.")
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--urlconf', dest='urlconf', default=None,
+                    help="The URLconf to use (defaults to ROOT_URLCONF)."),
+    )
+
+    def handle_noargs(self, **options):
+        verbosity = int(options.get('verbosity', 1))
+        compiled, failures = precompile_templates(urlconf=options['urlconf'],
+                                                  cache=False)
+
+        if verbosity >= 2:
+            for label, template_name in compiled:
+                self.stdout.write("Compiled %s (%s)\n" % (template_name, label))
+        for label, template_name, exc in failures:
+            self.stderr.write("%s (%s): %s: %s\n" % (
+                template_name, label, exc.__class__.__name__, exc))
+        if failures:
+            raise CommandError("%d template(s) failed to compile" % (
+                len(failures),))
+
+        if verbosity >= 1:
+            self.stdout.write("Compiled %d template(s)\n" % (len(compiled),))
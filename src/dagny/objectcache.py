@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+A read-through cache of the objects behind a resource's members.
+
+Member actions (`show`, `edit`, `update`, `destroy`) load the same row by
+primary key on request after request. Declare an `ObjectCache` on your
+resource, and load members with `get_member()`:
+
+    from dagny.objectcache import ObjectCache, get_member
+
+    class User(Resource):
+
+        object_cache = ObjectCache(models.User, size=1000, cache='default')
+
+        @action
+        def show(self, user_id):
+            self.user = get_member(self, user_id)
+
+Objects are looked up in a bounded, least-recently-used cache in the process,
+then (if `cache` is given) in a shared Django cache, and only then in the
+database. Saving or deleting an object (through the model, so that its
+`post_save` or `post_delete` signal is sent) removes it from the process's
+cache and the shared one. Other processes' caches aren't told, so their
+entries expire after `local_timeout` seconds; bulk `QuerySet.update()`s send
+no signals at all, and are only seen once entries expire.
+
+Each call returns a fresh copy of the cached object, so actions can modify
+it (as a `ModelForm` does) without affecting other requests.
+"""
+
+import copy
+import threading
+import time
+
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+import odict
+
+from dagny.cache import GENERATION_TIMEOUT, KEY_PREFIX, get_backend
+
+__all__ = ['ObjectCache', 'get_member']
+
+
+class ObjectCache(object):
+
+    """
+    Caches instances of a model by primary key.
+
+    :param model:
+        The model class.
+    :param size:
+        The most objects to keep in each process.
+    :param local_timeout:
+        How long (in seconds) each process keeps an object.
+    :param cache:
+        The alias of a Django cache to share objects between processes, or
+        `None` to only cache them in each process.
+    :param timeout:
+        How long (in seconds) to keep objects in the shared cache. Defaults to
+        the cache backend's own default timeout.
+    """
+
+    def __init__(self, model, size=1000, local_timeout=5, cache=None,
+                 timeout=None):
+        self.model = model
+        self.size = size
+        self.local_timeout = local_timeout
+        self.cache_alias = cache
+        self.timeout = timeout
+        self._objects = odict.odict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation, so that a load which raced with one
+        # doesn't store what it read.
+        self._generation = 0
+        self.hits = self.shared_hits = self.misses = self.invalidations = 0
+        # Receivers are identified by `id()`, so a weakly-connected cache which
+        # was collected could stop a new one at the same address connecting.
+        post_save.connect(self._invalidate, sender=model, weak=False)
+        post_delete.connect(self._invalidate, sender=model, weak=False)
+
+    def __repr__(self):
+        return "<ObjectCache %s.%s size=%d>" % (self.model._meta.app_label,
+                                                self.model._meta.object_name,
+                                                self.size)
+
+    def get(self, pk):
+
+        """
+        Return (a copy of) the object with a primary key.
+
+        Raises the model's `DoesNotExist` if there isn't one, or a
+        `ValidationError` if `pk` isn't a valid primary key.
+        """
+
+        pk = self.model._meta.pk.to_python(pk)
+        with self._lock:
+            entry = self._objects.pop(pk, None)
+            if entry is not None and entry[0] > time.time():
+                self._objects[pk] = entry
+                self.hits += 1
+                return copy_instance(entry[1])
+            generation = self._generation
+
+        instance = None
+        if self.cache_alias is not None:
+            # Shared entries are stored with the object's version, which
+            # invalidation bumps; an entry written by a load which raced with
+            # a save (in any process) has an old version, and is ignored.
+            backend = get_backend(self.cache_alias)
+            key = self.key(pk)
+            version_key = key + ':version'
+            values = backend.get_many([key, version_key])
+            version = values.get(version_key)
+            if version is None:
+                version = int(time.time() * 1000000)
+                if not backend.add(version_key, version, GENERATION_TIMEOUT):
+                    version = backend.get(version_key, version)
+            entry = values.get(key)
+            if entry is not None and entry[0] == version:
+                instance = entry[1]
+        if instance is not None:
+            with self._lock:
+                self.shared_hits += 1
+        else:
+            instance = self.model._default_manager.get(pk=pk)
+            with self._lock:
+                self.misses += 1
+                current = generation == self._generation
+            if self.cache_alias is not None and current:
+                backend.set(key, (version, instance), self.timeout)
+
+        with self._lock:
+            if generation == self._generation:
+                self._objects[pk] = (time.time() + self.local_timeout,
+                                     instance)
+                while len(self._objects) > self.size:
+                    del self._objects[self._objects.firstkey()]
+        return copy_instance(instance)
+
+    def key(self, pk):
+        return '%s:object:%s.%s:%s' % (KEY_PREFIX,
+                                       self.model._meta.app_label,
+                                       self.model._meta.object_name, pk)
+
+    def clear(self):
+        """Empty this process's cache (but not the shared one)."""
+
+        with self._lock:
+            self._objects.clear()
+            self._generation += 1
+
+    def stats(self):
+
+        """
+        Return a dict of statistics for this process.
+
+        `hits` counts objects found in this process, `shared_hits` those found
+        in the shared cache, and `misses` those loaded from the database.
+        """
+
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'entries': len(self._objects),
+                'hit_rate': (float(self.hits + self.shared_hits) / lookups
+                             if lookups else 0.0),
+            }
+
+    def _invalidate(self, sender, instance, **kwargs):
+        with self._lock:
+            self._objects.pop(instance.pk, None)
+            self._generation += 1
+            self.invalidations += 1
+        if self.cache_alias is not None:
+            backend = get_backend(self.cache_alias)
+            key = self.key(instance.pk)
+            version = backend.get(key + ':version', 0)
+            backend.set(key + ':version', max(int(time.time() * 1000000),
+                                              version + 1),
+                        GENERATION_TIMEOUT)
+            backend.delete(key)
+
+
+def copy_instance(instance):
+    clone = copy.copy(instance)
+    clone._state = copy.copy(instance._state)
+    return clone
+
+
+def get_member(resource, pk):
+
+    """
+    Load a member of a resource through its `object_cache`.
+
+    Raises `Http404` if there's no such object (or `pk` is invalid).
+    """
+
+    object_cache = resource.object_cache
+    try:
+        return object_cache.get(pk)
+    except (object_cache.model.DoesNotExist, ValidationError, ValueError):
+        raise Http404
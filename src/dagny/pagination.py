@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+"""
+Keyset (a.k.a. cursor) pagination for collections.
+
+`OFFSET`-based pagination gets slower the deeper a client pages, since the
+database has to walk past every skipped row. Keyset pagination instead
+remembers the ordering values of the last row on a page, and asks for the rows
+which come after it; with an index on the ordering columns, every page costs
+the same as the first.
+
+Declare a `Paginator` on your resource, and call `paginate()` from your
+action:
+
+    from dagny.pagination import Paginator, paginate
+
+    class User(Resource):
+
+        paginator = Paginator(ordering=('-date_joined',), per_page=50,
+                              max_per_page=500)
+
+        @action
+        def index(self):
+            self.users = paginate(self, models.User.objects.all())
+
+The page is also stored as `self.page`, so templates have access to
+`self.page.next_url` and `self.page.has_next`. Every rendered response for a
+page with more results gets a `Link: <...>; rel="next"` header.
+
+Clients move through the collection by following the next link, which carries
+an opaque `cursor` parameter; they can choose a page size with the `limit`
+parameter, up to the paginator's `max_per_page`. An invalid cursor results in
+a 404, as with Django's own paginated generic views.
+"""
+
+import base64
+import datetime
+import decimal
+
+from django.http import Http404
+from django.utils import simplejson
+
+from dagny.renderer import RESPONSE_PROCESSORS
+
+__all__ = ['Paginator', 'Page', 'paginate']
+
+
+class Paginator(object):
+
+    """
+    Paginates querysets by their ordering columns.
+
+    :param ordering:
+        A sequence of field names to order by, each optionally prefixed with
+        `'-'` for descending order. The primary key is always added as a
+        final tie-breaker. These should be non-null, non-relational columns,
+        covered by an index.
+    :param per_page:
+        The default number of objects per page.
+    :param max_per_page:
+        The maximum page size a client can ask for with the `limit` parameter.
+    """
+
+    cursor_param = 'cursor'
+    limit_param = 'limit'
+
+    def __init__(self, ordering=(), per_page=25, max_per_page=100):
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.max_per_page = max_per_page
+
+    def __repr__(self):
+        return "<Paginator ordering=%r per_page=%d>" % (self.ordering,
+                                                        self.per_page)
+
+    def page(self, request, queryset):
+        """Return the `Page` of `queryset` requested by `request`."""
+
+        columns = self._columns(queryset.model)
+        ordered = queryset.order_by(*[('-' if desc else '') + field.name
+                                      for field, desc in columns])
+
+        cursor = request.GET.get(self.cursor_param)
+        if cursor:
+            ordered = ordered.filter(self._after(columns,
+                                                 self._decode(columns, cursor)))
+
+        per_page = self._per_page(request)
+        object_list = list(ordered[:per_page + 1])
+        has_next = len(object_list) > per_page
+        del object_list[per_page:]
+
+        next_cursor = None
+        if has_next:
+            next_cursor = self._encode(columns, object_list[-1])
+        return Page(object_list, queryset, next_cursor,
+                    self._url(request, next_cursor))
+
+    def _columns(self, model):
+        """Resolve the ordering to a list of `(field, descending)` pairs."""
+
+        columns = []
+        for name in self.ordering:
+            desc = name.startswith('-')
+            name = name.lstrip('-')
+            if name == 'pk':
+                field = model._meta.pk
+            else:
+                field = model._meta.get_field(name)
+            columns.append((field, desc))
+        if model._meta.pk not in [field for field, _ in columns]:
+            # Break ties in the same direction as the last column, so the
+            # ordering can still be served by a single composite index.
+            desc = columns[-1][1] if columns else False
+            columns.append((model._meta.pk, desc))
+        return columns
+
+    def _after(self, columns, values):
+
+        """
+        Build a `Q` matching the rows after the given ordering values.
+
+        For columns `(a, b, c)` and values `(x, y, z)`, this is:
+
+            a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+
+        With `<` in place of `>` for descending columns.
+        """
+
+        from django.db.models import Q
+
+        clauses = []
+        for i, (field, desc) in enumerate(columns):
+            clause = Q(**{field.name + ('__lt' if desc else '__gt'): values[i]})
+            for j, (prev_field, _) in enumerate(columns[:i]):
+                clause &= Q(**{prev_field.name: values[j]})
+            clauses.append(clause)
+        return reduce(lambda q1, q2: q1 | q2, clauses)
+
+    def _encode(self, columns, obj):
+        values = []
+        for field, _ in columns:
+            value = getattr(obj, field.attname)
+            if isinstance(value, (datetime.date, datetime.time, decimal.Decimal)):
+                value = unicode(value)
+            values.append(value)
+        return base64.urlsafe_b64encode(simplejson.dumps(values)).rstrip('=')
+
+    def _decode(self, columns, cursor):
+        try:
+            cursor = str(cursor)
+            values = simplejson.loads(base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)))
+            if not (isinstance(values, list) and len(values) == len(columns)):
+                raise ValueError
+            return [field.to_python(value)
+                    for (field, _), value in zip(columns, values)]
+        except Exception:
+            raise Http404("Invalid pagination cursor")
+
+    def _per_page(self, request):
+        try:
+            per_page = int(request.GET.get(self.limit_param, self.per_page))
+        except ValueError:
+            per_page = self.per_page
+        return max(1, min(per_page, self.max_per_page))
+
+    def _url(self, request, cursor):
+        if cursor is None:
+            return None
+        params = request.GET.copy()
+        params[self.cursor_param] = cursor
+        return request.build_absolute_uri(
+            '%s?%s' % (request.path, params.urlencode()))
+
+
+class Page(object):
+
+    """
+    A single page of results.
+
+    Iterating over a page yields its objects. It also has the following
+    attributes:
+
+    `object_list`
+    :   The list of objects on this page.
+    `queryset`
+    :   The full, un-paginated queryset.
+    `has_next`
+    :   Whether there are any objects after this page.
+    `next_cursor`, `next_url`
+    :   The cursor and absolute URL for the next page, or `None`.
+    """
+
+    def __init__(self, object_list, queryset, next_cursor, next_url):
+        self.object_list = object_list
+        self.queryset = queryset
+        self.next_cursor = next_cursor
+        self.next_url = next_url
+
+    def __repr__(self):
+        return "<Page of %d objects>" % (len(self.object_list),)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def paginate(resource, queryset, paginator=None):
+
+    """
+    Paginate a queryset for the current request to a resource.
+
+    Uses `paginator` if given, otherwise the resource's `paginator` attribute,
+    otherwise a default `Paginator()` (ordering by primary key). The page is
+    assigned to `resource.page` and returned.
+    """
+
+    if paginator is None:
+        paginator = getattr(resource, 'paginator', None) or Paginator()
+    resource.page = paginator.page(resource.request, queryset)
+    return resource.page
+
+
+def add_link_header(action, resource, response):
+    """Add a `Link` header pointing to the next page, if there is one."""
+
+    page = getattr(resource, 'page', None)
+    if isinstance(page, Page) and page.has_next:
+        response['Link'] = '<%s>; rel="next"' % (page.next_url,)
+
+RESPONSE_PROCESSORS.append(add_link_header)
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import itertools
+import types
 from functools import wraps
 
 import odict
@@ -17,6 +19,11 @@ class Skip(Exception):
     """
 
 
+# Functions which are called with `(action, resource, response)` on every
+# response a `Renderer` produces, so that they can add headers to it.
+RESPONSE_PROCESSORS = []
+
+
 class Renderer(object):
 
     """
@@ -136,13 +143,23 @@ class Renderer(object):
         return decorate
 
     def __call__(self, action, resource, *args, **kwargs):
+        response = self._render(action, resource, *args, **kwargs)
+        for processor in RESPONSE_PROCESSORS:
+            processor(action, resource, response)
+        return response
+
+    def _render(self, action, resource, *args, **kwargs):
         matches = self._match(action, resource)
 
         for shortcode in matches:
             try:
-                return self[shortcode](action, resource, *args, **kwargs)
+                response = self._call(shortcode, action, resource, *args,
+                                      **kwargs)
             except Skip:
                 continue
+            # Recorded for the response cache, which keys on it.
+            resource._rendered_by = shortcode
+            return response
 
         # One last-ditch attempt to render HTML, pursuant to the note about
         # HTTP/1.1 here:
@@ -150,12 +167,51 @@ class Renderer(object):
         # It's better to give an 'unacceptable' response than none at all.
         if 'html' not in matches and 'html' in self:
             try:
-                return self['html'](action, resource, *args, **kwargs)
+                return self._call('html', action, resource, *args, **kwargs)
             except Skip:
                 pass
 
         return not_acceptable(action, resource)
 
+    def _call(self, shortcode, action, resource, *args, **kwargs):
+
+        """
+        Run a single backend, turning a generator into a streaming response.
+
+        A backend may be a generator function, yielding the response body in
+        chunks. The response then has the shortcode's mimetype, and its content
+        is produced as it is sent to the client:
+
+            >>> r = Renderer()
+            >>> @r.json
+            ... def stream(action, resource):
+            ...     yield '['
+            ...     yield '1, 2'
+            ...     yield ']'
+
+            >>> response = r._call('json', None, None)
+            >>> response['Content-Type']
+            'application/json'
+            >>> response.content
+            '[1, 2]'
+
+        The first chunk is produced straight away, so a generator can still
+        raise `Skip` before yielding anything; after that it's too late.
+        """
+
+        result = self[shortcode](action, resource, *args, **kwargs)
+        if not isinstance(result, types.GeneratorType):
+            return result
+
+        from django.http import HttpResponse
+
+        try:
+            first = result.next()
+        except StopIteration:
+            first = ''
+        return HttpResponse(itertools.chain([first], result),
+                            content_type=conneg.MIMETYPES[shortcode])
+
     def _match(self, action, resource):
         """Return all matching shortcodes for a given action and resource."""
 
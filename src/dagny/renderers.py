@@ -1,12 +1,20 @@
 """Generic, built-in renderers."""
 
+import datetime
+import decimal
+import itertools
+import uuid
+
+from django.utils import simplejson
+
 from dagny.action import Action
+from dagny.renderer import Skip
 from dagny.utils import camel_to_underscore, resource_name
 
 
 @Action.RENDERER.html
 def render_html(action, resource, content_type=None, status=None,
-                current_app=None):
+                current_app=None, template_name=None):
 
     """
     Render an appropriate HTML response for an action.
@@ -38,19 +46,773 @@ def render_html(action, resource, content_type=None, status=None,
 
         auth/user/show.html
 
-    Finally, this is rendered using `django.shortcuts.render()`. The resource
-    is passed into the context as `self`, so that attribute assignments from
-    the action will be available in the template. This also uses
-    `RequestContext`, so configured context processors will also be available.
+    You can also set the template name for a single action explicitly:
+
+        class User(Resource):
+            @action
+            def show(self, username):
+                # ...
+
+            show.template_name = 'profiles/show.html'
+
+    To render with Jinja2 instead of Django's template language, set
+    `template_engine = 'jinja2'` on the resource or the action (see
+    `dagny.jinja`).
+
+    The template name is only worked out once per resource class and action,
+    and the compiled template is cached (see `load_template()`). It's then
+    rendered with a `RequestContext`, so configured context processors will
+    be available. The resource is passed into the context as `self`, so that
+    attribute assignments from the action will be available in the template.
+
+    If the action has `stream = True`, the template is rendered incrementally
+    as the response is sent, instead of all at once (see `stream_template()`).
+
+    Pass `template_name` to render a different template with the same context
+    (as `render_fragment` does).
+    """
+
+    from django.http import HttpResponse
+    from django.template import RequestContext
+
+    if get_template_engine(action, resource) == 'jinja2':
+        from dagny.jinja import render_jinja
+        return render_jinja(action, resource, content_type=content_type,
+                            status=status, current_app=current_app,
+                            template_name=template_name)
+
+    if template_name is None:
+        template_name = get_template_name(action, resource)
+    template = load_template(template_name)
+    context = RequestContext(resource.request, {'self': resource},
+                             current_app=current_app)
+    if getattr(action, 'stream', False):
+        content = stream_template(template, context)
+    else:
+        content = template.render(context)
+    return HttpResponse(content, content_type=content_type, status=status)
+
+
+# Template names by `(resource class, action)`.
+_template_names = {}
+
+# Compiled templates by name; not used when `TEMPLATE_DEBUG` is on.
+_templates = {}
+
+
+def get_template_name(action, resource):
+
+    """
+    Return the name of the HTML template for an action on a resource.
+
+    `resource` may be either a resource instance or a resource class:
+
+        >>> from dagny import Resource
+        >>> from dagny.action import Action as action
+        >>> class UserResource(Resource):
+        ...     template_path_prefix = 'auth/'
+        ...     @action
+        ...     def show(self):
+        ...         pass
+
+        >>> get_template_name(UserResource.show, UserResource)
+        'auth/user/show.html'
+
+    An action's `template_name` attribute overrides this:
+
+        >>> class ProfileResource(Resource):
+        ...     @action
+        ...     def show(self):
+        ...         pass
+        ...     show.template_name = 'profiles/show.html'
+
+        >>> get_template_name(ProfileResource.show, ProfileResource)
+        'profiles/show.html'
+
+    The result is cached for each resource class and action.
+    """
+
+    if not isinstance(resource, type):
+        resource = type(resource)
+    key = (resource, action)
+    try:
+        return _template_names[key]
+    except KeyError:
+        pass
+
+    template_name = getattr(action, 'template_name', None)
+    if template_name is None:
+        resource_label = camel_to_underscore(resource_name(resource))
+        template_path_prefix = getattr(resource, 'template_path_prefix', "")
+        template_name = "%s%s/%s.html" % (template_path_prefix, resource_label,
+                                          action.name)
+    _template_names[key] = template_name
+    return template_name
+
+
+def get_template_engine(action, resource):
+    """Return the `template_engine` of the action, or else of the resource."""
+
+    return (getattr(action, 'template_engine', None) or
+            getattr(resource, 'template_engine', None) or 'django')
+
+
+def load_template(template_name):
+
+    """
+    Load and compile a template, caching it unless `TEMPLATE_DEBUG` is on.
+
+    With `TEMPLATE_DEBUG`, templates are loaded afresh on every call, so that
+    edits show up without a restart (as with Django's own loaders). Use
+    `clear_template_cache()` to empty the cache.
+    """
+
+    from django.conf import settings
+    from django.template.loader import get_template
+
+    if settings.TEMPLATE_DEBUG:
+        return get_template(template_name)
+    template = _templates.get(template_name)
+    if template is None:
+        template = _templates[template_name] = get_template(template_name)
+    return template
+
+
+def clear_template_cache():
+    """Forget all cached template names and compiled templates."""
+
+    _template_names.clear()
+    _templates.clear()
+
+
+# Characters of HTML buffered into each chunk of a streaming response.
+STREAM_BUFFER_SIZE = 8192
+
+
+def stream_template(template, context):
+
+    """
+    Render a Django template in chunks, as it's iterated over.
+
+    Django templates normally render every node into one string. This walks
+    the template's nodes instead, yielding their output in chunks of about
+    `STREAM_BUFFER_SIZE` characters. `{% extends %}` and `{% block %}` tags
+    are followed, and `{% for %}` loops produce their output one iteration
+    at a time; any other tag is rendered whole.
+
+    A queryset in a `{% for %}` loop is not loaded into memory all at once:
+    its length comes from `count()`, and rows are fetched in chunks with
+    `iterator()`. Querysets which have already been evaluated are used as-is.
+    """
+
+    streamers = _get_node_streamers()
+    context.render_context.push()
+    try:
+        for chunk in _buffered(_iter_nodelist(template.nodelist, context,
+                                              streamers),
+                               STREAM_BUFFER_SIZE):
+            yield chunk
+    finally:
+        context.render_context.pop()
+
+
+# Functions to stream each type of node, by node class.
+_node_streamers = {}
+
+
+def _get_node_streamers():
+    if not _node_streamers:
+        from django.template.defaulttags import ForNode
+        from django.template.loader_tags import BlockNode, ExtendsNode
+        _node_streamers.update({ExtendsNode: _iter_extends,
+                                BlockNode: _iter_block,
+                                ForNode: _iter_for})
+    return _node_streamers
+
+
+def _iter_nodelist(nodelist, context, streamers):
+    for node in nodelist:
+        streamer = streamers.get(type(node))
+        if streamer is None:
+            yield node.render(context)
+        else:
+            for piece in streamer(node, context, streamers):
+                yield piece
+
+
+def _iter_extends(node, context, streamers):
+    # As `ExtendsNode.render()`, but iterating over the parent's nodes.
+    from django.template.base import TextNode
+    from django.template.loader_tags import (BLOCK_CONTEXT_KEY, BlockContext,
+                                             BlockNode, ExtendsNode)
+
+    parent = node.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(node.blocks)
+    for parent_node in parent.nodelist:
+        if not isinstance(parent_node, TextNode):
+            if not isinstance(parent_node, ExtendsNode):
+                block_context.add_blocks(dict(
+                    (block.name, block) for block in
+                    parent.nodelist.get_nodes_by_type(BlockNode)))
+            break
+    return _iter_nodelist(parent.nodelist, context, streamers)
+
+
+def _iter_block(node, context, streamers):
+    # As `BlockNode.render()`, but iterating over the block's nodes.
+    from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockNode
+
+    block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+    context.push()
+    if block_context is None:
+        push, block = None, node
+    else:
+        push = block = block_context.pop(node.name)
+        if block is None:
+            block = node
+        block = BlockNode(block.name, block.nodelist)
+        block.context = context
+    context['block'] = block
+    for piece in _iter_nodelist(block.nodelist, context, streamers):
+        yield piece
+    if push is not None:
+        block_context.push(node.name, push)
+    context.pop()
+
+
+def _iter_for(node, context, streamers):
+    # As `ForNode.render()`, but yielding the output of each iteration.
+    from django.db.models.query import QuerySet
+    from django.template.base import VariableDoesNotExist
+
+    parentloop = context['forloop'] if 'forloop' in context else {}
+    context.push()
+    try:
+        values = node.sequence.resolve(context, True)
+    except VariableDoesNotExist:
+        values = None
+    if values is None:
+        values = []
+
+    if (isinstance(values, QuerySet) and values._result_cache is None and
+            not node.is_reversed):
+        len_values = values.count()
+        values = values.iterator()
+    else:
+        if not hasattr(values, '__len__'):
+            values = list(values)
+        len_values = len(values)
+        if node.is_reversed:
+            values = reversed(values)
+
+    if len_values < 1:
+        context.pop()
+        for piece in _iter_nodelist(node.nodelist_empty, context, streamers):
+            yield piece
+        return
+
+    unpack = len(node.loopvars) > 1
+    loop_dict = context['forloop'] = {'parentloop': parentloop}
+    for i, item in enumerate(values):
+        loop_dict['counter0'] = i
+        loop_dict['counter'] = i + 1
+        loop_dict['revcounter'] = len_values - i
+        loop_dict['revcounter0'] = len_values - i - 1
+        loop_dict['first'] = (i == 0)
+        loop_dict['last'] = (i == len_values - 1)
+
+        pop_context = False
+        if unpack:
+            try:
+                unpacked_vars = dict(zip(node.loopvars, item))
+            except TypeError:
+                pass
+            else:
+                pop_context = True
+                context.update(unpacked_vars)
+        else:
+            context[node.loopvars[0]] = item
+        for piece in _iter_nodelist(node.nodelist_loop, context, streamers):
+            yield piece
+        if pop_context:
+            context.pop()
+    context.pop()
+
+
+def _buffered(pieces, size):
+    """Join an iterable of strings into unicode chunks of at least `size`."""
+
+    from django.utils.encoding import force_unicode
+
+    buf, length = [], 0
+    for piece in pieces:
+        piece = force_unicode(piece)
+        buf.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield u''.join(buf)
+            buf, length = [], 0
+    if buf:
+        yield u''.join(buf)
+
+
+@Action.RENDERER.json
+def render_json(action, resource, content_type=None, status=None):
+
     """
+    Render the attributes an action exposes as a JSON response.
+
+    Actions declare what they expose by name, as an attribute (or tuple of
+    attributes) set on the resource by the action method:
+
+        class User(Resource):
+
+            @action
+            def show(self, username):
+                self.user = get_object_or_404(User, username=username)
+
+            show.exposes = 'user'
+
+    A single name is serialized as-is; a tuple of names is serialized as an
+    object keyed by those names. Actions which expose nothing cause this
+    backend to raise `Skip`, so you can still define `@show.render.json`
+    yourself for anything more involved.
+
+    If the resource has a `serializer` (see `dagny.serializers`), exposed
+    model instances and querysets are converted with it first.
+
+    Encoding uses the resource's `json_encoder` attribute if present, or
+    `JSONEncoder` (below) otherwise. The document is produced in a single
+    pass of the encoder, without building an intermediate string per value,
+    and handed straight to the response.
+
+    For large collections, set `stream = True` on the action: a single exposed
+    queryset (or other iterable) is then encoded one row at a time as the
+    response is sent, rather than all at once (see `stream_json_array()`).
+    """
+
+    from django.http import HttpResponse
+
+    if getattr(action, 'stream', False):
+        items = iter_exposed_items(action, resource)
+        if items is not None:
+            return HttpResponse(stream_json_array(resource, items),
+                                content_type=content_type or 'application/json',
+                                status=status)
+
+    data = get_data(action, resource)
+    encoder = getattr(resource, 'json_encoder', JSONEncoder)
+    return HttpResponse(encoder().encode(data),
+                        content_type=content_type or 'application/json',
+                        status=status)
+
+
+def get_exposed(action, resource):
+
+    """
+    Return the data exposed by an action on a resource, or raise `Skip`.
+
+        >>> from dagny import Resource
+        >>> from dagny.action import Action as action
+        >>> class User(Resource):
+        ...     @action
+        ...     def show(self):
+        ...         pass
+        >>> resource = User._new(object())
+        >>> resource.user, resource.friends = 'zack', ['ben']
+
+        >>> get_exposed(User.show, resource)
+        Traceback (most recent call last):
+            ...
+        Skip
+
+        >>> User.show.exposes = 'user'
+        >>> get_exposed(User.show, resource)
+        'zack'
+
+        >>> User.show.exposes = ('user', 'friends')
+        >>> sorted(get_exposed(User.show, resource).items())
+        [('friends', ['ben']), ('user', 'zack')]
+
+    """
+
+    exposes = getattr(action, 'exposes', None)
+    if not exposes:
+        raise Skip
+    if isinstance(exposes, basestring):
+        return getattr(resource, exposes)
+    return dict((name, getattr(resource, name)) for name in exposes)
+
+
+def get_data(action, resource):
+
+    """
+    Return the exposed data for an action, converted by the resource's
+    `serializer`, if it has one.
+
+    This is the data which the generic, data-oriented renderer backends (JSON,
+    XML, etc.) represent; it raises `Skip` if the action exposes nothing.
+    """
+
+    data = get_exposed(action, resource)
+    serializer = getattr(resource, 'serializer', None)
+    if serializer is None:
+        return data
+    if isinstance(action.exposes, basestring):
+        return serializer.apply(data)
+    return dict((name, serializer.apply(value))
+                for name, value in data.iteritems())
+
+
+class JSONEncoder(simplejson.JSONEncoder):
+
+    """
+    A JSON encoder for the types resources commonly expose.
+
+    Dates and times are encoded in ISO 8601 format, and UUIDs as strings.
+    Decimals are encoded as strings (so as not to lose precision), unless the
+    installed `simplejson` supports them natively. Any other iterable, such as
+    a `QuerySet` or a `Page`, is encoded as a list.
+
+        >>> encoder = JSONEncoder()
+        >>> print encoder.encode([datetime.datetime(2011, 5, 1, 12, 30),
+        ...                       uuid.UUID(int=1), iter([1, 2])])
+        ["2011-05-01T12:30:00", "00000000-0000-0000-0000-000000000001", [1, 2]]
+
+    Conversions are looked up by exact type in `converters` before falling
+    back to `isinstance()` checks, so that the common cases cost a single
+    dictionary lookup. Subclasses can add their own:
+
+        class MyEncoder(JSONEncoder):
+            converters = dict(JSONEncoder.converters,
+                              **{Point: lambda p: [p.x, p.y]})
+
+    """
+
+    converters = {
+        datetime.datetime: datetime.datetime.isoformat,
+        datetime.date: datetime.date.isoformat,
+        datetime.time: datetime.time.isoformat,
+        decimal.Decimal: str,
+        uuid.UUID: str,
+    }
+
+    def default(self, obj):
+        converter = self.converters.get(type(obj))
+        if converter is not None:
+            return converter(obj)
+        for cls, converter in self.converters.iteritems():
+            if isinstance(obj, cls):
+                return converter(obj)
+        if hasattr(obj, '__iter__'):
+            return list(obj)
+        return super(JSONEncoder, self).default(obj)
+
+
+@Action.RENDERER.xml
+def render_xml(action, resource, content_type=None, status=None):
+
+    """
+    Render the attributes an action exposes as an XML document.
+
+    This uses the same declarations as `render_json()` (`exposes` on the
+    action, and optionally `serializer` on the resource); see `to_xml()` for
+    the format. Actions which expose nothing cause this backend to raise
+    `Skip`.
+    """
+
+    from django.http import HttpResponse
+
+    data = get_data(action, resource)
+    if isinstance(action.exposes, basestring):
+        root = action.exposes
+    else:
+        root = action.name
+    return HttpResponse(to_xml(data, root),
+                        content_type=content_type or 'application/xml',
+                        status=status)
+
+
+def to_xml(data, root):
+
+    """
+    Serialize data as a simple XML document, with `root` as the root element.
+
+    Dicts become elements named after their keys, and lists become a sequence
+    of `<item>` elements. Scalars are converted to text like the JSON encoder
+    does, and `None` becomes an empty element with a `null` attribute.
+
+        >>> print to_xml({'user': {'username': 'zack'}, 'ids': [1, 2]},
+        ...              'show')  # doctest: +NORMALIZE_WHITESPACE
+        <?xml version="1.0" encoding="utf-8"?>
+        <show><ids><item>1</item><item>2</item></ids><user><username>zack</username></user></show>
+
+    """
+
+    from StringIO import StringIO
+    from xml.sax.saxutils import XMLGenerator
+
+    stream = StringIO()
+    generator = XMLGenerator(stream, 'utf-8')
+    generator.startDocument()
+    _write_xml(generator, root, data, JSONEncoder())
+    generator.endDocument()
+    return stream.getvalue()
+
+
+def _write_xml(generator, name, value, encoder):
+    if value is None:
+        generator.startElement(name, {'null': 'true'})
+    else:
+        generator.startElement(name, {})
+        if isinstance(value, dict):
+            for key in sorted(value):
+                _write_xml(generator, key, value[key], encoder)
+        elif hasattr(value, '__iter__'):
+            for item in value:
+                _write_xml(generator, 'item', item, encoder)
+        else:
+            if isinstance(value, bool):
+                value = unicode(value).lower()
+            elif not isinstance(value, (basestring, int, long, float)):
+                value = encoder.default(value)
+            generator.characters(unicode(value))
+    generator.endElement(name)
+
+
+@Action.RENDERER.columns_json
+def render_columns_json(action, resource, content_type=None, status=None):
+
+    """
+    Render an exposed collection as column-oriented JSON.
+
+    This is an opt-in representation for clients pulling large collections
+    (for example, for analysis), negotiated with the
+    `application/vnd.dagny.columns+json` media type or `?format=columns_json`.
+    Rather than an object per row, the keys are sent once:
+
+        {"fields": ["username", "first_name"],
+         "rows": [["zack", "Zachary"], ["ben", "Ben"], ...]}
+
+    With `?orient=columns`, each field's values are sent as one array:
+
+        {"fields": ["username", "first_name"],
+         "columns": [["zack", "ben", ...], ["Zachary", "Ben", ...]]}
+
+    The action must expose a single queryset, page or list of objects, and
+    the resource must have a `serializer`; otherwise this backend raises
+    `Skip`. For querysets, the serializer's fields are fetched directly with
+    `values_list()` (dotted paths becoming `__` lookups), which skips building
+    model instances entirely. Serializers with method or nested fields fall
+    back to serializing the instances.
+    """
+
+    from django.http import HttpResponse
+
+    serializer = getattr(resource, 'serializer', None)
+    if serializer is None or not isinstance(action.exposes, basestring):
+        raise Skip
+    value = get_exposed(action, resource)
+    if isinstance(value, (basestring, dict)) or not hasattr(value, '__iter__'):
+        raise Skip
+
+    rows = column_rows(serializer, value)
+    data = {'fields': serializer.keys}
+    if resource.request.GET.get('orient') == 'columns':
+        data['columns'] = zip(*rows) or [[] for key in serializer.keys]
+    else:
+        data['rows'] = rows
+
+    encoder = getattr(resource, 'json_encoder', JSONEncoder)
+    return HttpResponse(encoder().encode(data),
+                        content_type=content_type or
+                        'application/vnd.dagny.columns+json',
+                        status=status)
+
+
+def column_rows(serializer, objects):
+    """Return a list of value tuples for the serializer's fields."""
+
+    from django.core.exceptions import FieldError
+    from django.db.models.query import QuerySet
+
+    if isinstance(objects, QuerySet) and not serializer._nested:
+        lookups = [path.replace('.', '__') for path in serializer.paths]
+        try:
+            return list(objects.values_list(*lookups))
+        except FieldError:
+            pass  # Not all of the paths are fields; use the instances.
+    return list(serializer.rows(objects))
+
+
+@Action.RENDERER.cbor
+def render_cbor(action, resource, content_type=None, status=None):
+
+    """
+    Render the attributes an action exposes as CBOR.
+
+    CBOR is a binary format with the same data model as JSON, but smaller and
+    faster to parse; it's intended for service-to-service traffic. This uses
+    the same declarations as `render_json()` (`exposes`, `serializer`), and
+    the resource's `json_encoder` for any types `dagny.cbor` doesn't handle
+    itself. Actions which expose nothing cause this backend to raise `Skip`.
+    """
+
+    from django.http import HttpResponse
+    from dagny import cbor
+
+    data = get_data(action, resource)
+    encoder = getattr(resource, 'json_encoder', JSONEncoder)()
+    return HttpResponse(cbor.dumps(data, default=encoder.default),
+                        content_type=content_type or 'application/cbor',
+                        status=status)
+
+
+# Number of rows encoded into each chunk of a streaming response.
+STREAM_CHUNK_SIZE = 100
+
+
+@Action.RENDERER.ndjson
+def render_ndjson(action, resource, content_type=None, status=None):
+
+    """
+    Stream an exposed collection as newline-delimited JSON.
+
+    Each object in the collection is encoded as a JSON document on its own
+    line, as it's sent to the client. The action must expose a single
+    queryset or other iterable; otherwise this backend raises `Skip`.
+    """
+
+    from django.http import HttpResponse
+
+    items = iter_exposed_items(action, resource)
+    if items is None:
+        raise Skip
+    return HttpResponse(stream_json_lines(resource, items),
+                        content_type=content_type or 'application/x-ndjson',
+                        status=status)
+
+
+@Action.RENDERER.fragment
+def render_fragment(action, resource, content_type=None, status=None,
+                    current_app=None):
+
+    """
+    Render just the partial template for an action, for in-page navigation.
+
+    Front ends which swap out part of a page (such as with PJAX) don't need
+    the full layout around it. This backend renders a partial template with
+    the same context as `render_html`; its name is the action's template name
+    with an underscore before the action, e.g. `auth/user/_show.html`.
+
+    The backend is chosen for requests with an `X-PJAX` header, or with
+    `?format=fragment`. Responses are `text/html`. If the partial template
+    doesn't exist, it raises `Skip`, and the request is negotiated as usual.
+    Have the full template `{% include %}` the partial, so that both stay in
+    step.
+    """
+
+    from django.template import TemplateDoesNotExist
+
+    template_name = get_fragment_template_name(action, resource)
+    engine = get_template_engine(action, resource)
+    if engine == 'jinja2':
+        import jinja2
+        from dagny.jinja import get_environment
+        try:
+            get_environment().get_template(template_name)
+        except jinja2.TemplateNotFound:
+            raise Skip
+    else:
+        try:
+            load_template(template_name)
+        except TemplateDoesNotExist:
+            raise Skip
+    return render_html(action, resource, content_type=content_type,
+                       status=status, current_app=current_app,
+                       template_name=template_name)
+
+
+def get_fragment_template_name(action, resource):
+
+    """
+    Return the name of the partial template for an action.
+
+        >>> from dagny import Resource
+        >>> from dagny.action import Action as action
+        >>> class User(Resource):
+        ...     template_path_prefix = 'auth/'
+        ...     @action
+        ...     def show(self):
+        ...         pass
+
+        >>> get_fragment_template_name(User.show, User)
+        'auth/user/_show.html'
+
+    An action's `fragment_template_name` attribute overrides this.
+    """
+
+    template_name = getattr(action, 'fragment_template_name', None)
+    if template_name is not None:
+        return template_name
+    directory, _, filename = get_template_name(action, resource).rpartition('/')
+    return '%s/_%s' % (directory, filename) if directory else '_' + filename
+
+
+def iter_exposed_items(action, resource):
+
+    """
+    Return an iterator over a single exposed collection, or `None`.
+
+    Querysets are iterated with `iterator()`, so rows are fetched from the
+    database in chunks and not cached on the queryset. If the resource has a
+    `serializer`, model instances are serialized one at a time.
+    """
+
+    from django.db.models import Model
+    from django.db.models.query import QuerySet
+
+    if not isinstance(getattr(action, 'exposes', None), basestring):
+        return None
+    value = get_exposed(action, resource)
+    if isinstance(value, (basestring, dict)) or not hasattr(value, '__iter__'):
+        return None
+    if isinstance(value, QuerySet):
+        value = value.iterator()
+
+    serializer = getattr(resource, 'serializer', None)
+    if serializer is None:
+        return iter(value)
+    return (serializer.serialize(item) if isinstance(item, Model) else item
+            for item in value)
+
+
+def stream_json_array(resource, items):
+    """Yield a JSON array of `items`, in chunks of `STREAM_CHUNK_SIZE` rows."""
+
+    encode = getattr(resource, 'json_encoder', JSONEncoder)().encode
+    separator = '['
+    for chunk in _chunked(items, STREAM_CHUNK_SIZE):
+        yield separator + ', '.join(map(encode, chunk))
+        separator = ', '
+    yield '[]' if separator == '[' else ']'
+
+
+def stream_json_lines(resource, items):
+    """Yield `items` as newline-delimited JSON, `STREAM_CHUNK_SIZE` at a time."""
 
-    from django.shortcuts import render
+    encode = getattr(resource, 'json_encoder', JSONEncoder)().encode
+    for chunk in _chunked(items, STREAM_CHUNK_SIZE):
+        yield ''.join(encode(item) + '\n' for item in chunk)
 
-    resource_label = camel_to_underscore(resource_name(resource))
-    template_path_prefix = getattr(resource, 'template_path_prefix', "")
-    template_name = "%s%s/%s.html" % (template_path_prefix, resource_label,
-                                      action.name)
 
-    return render(resource.request, template_name, {'self': resource},
-                  content_type=content_type, status=status,
-                  current_app=current_app)
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            break
+        yield chunk
@@ -29,6 +29,10 @@ class Resource(View):
             method_action_map = self.params.pop('methods')
         except KeyError:
             raise ValueError("Expected 'methods' dict in view kwargs")
+        bulk_action_map = self.params.pop('bulk_methods', None)
+        if bulk_action_map:
+            method_action_map = self._bulk_methods(method, method_action_map,
+                                                   bulk_action_map)
         return self._route(method, method_action_map)()
 
     def _route(self, method, method_action_map):
@@ -66,12 +70,40 @@ class Resource(View):
                 allowed_methods.append(meth)
         return allowed_methods
 
+    def _bulk_methods(self, method, method_action_map, bulk_action_map):
+
+        """
+        Merge the bulk HTTP method -> action map into the usual one.
+
+        Bulk actions are routed on the collection URL, alongside `index` and
+        `create`. Since `create` and `bulk_create` are both `POST`s, a `POST`
+        is only sent to `bulk_create` if it carries a JSON list.
+        """
+
+        merged = dict(method_action_map)
+        for meth, action_name in bulk_action_map.items():
+            if meth == 'POST' and not (method == 'POST' and self._is_bulk_post()):
+                continue
+            merged[meth] = action_name
+        return merged
+
+    def _is_bulk_post(self):
+        content_type = self.request.META.get('CONTENT_TYPE', '')
+        if content_type.split(';', 1)[0].strip() != 'application/json':
+            return False
+        return self.request.raw_post_data.lstrip().startswith('[')
+
     def _format(self):
         """Return a mimetype shortcode, in case there's no Accept header."""
 
         if self.params.get('format'):
             return self.params['format'].lstrip('.')
-        return self.request.GET.get('format')
+        if self.request.GET.get('format'):
+            return self.request.GET['format']
+        # PJAX requests want just the part of the page they'll replace.
+        if self.request.META.get('HTTP_X_PJAX'):
+            return 'fragment'
+        return None
 
 
 def not_found():
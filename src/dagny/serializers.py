@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+Declarative, precompiled serializers for turning objects into data.
+
+A `Serializer` lists the fields of a representation, and is attached to a
+resource. The generic JSON and XML backends (and any others which use
+`dagny.renderers.get_data()`) then use it to convert the model instances and
+querysets an action exposes:
+
+    from dagny.serializers import Serializer
+
+    class User(Resource):
+
+        serializer = Serializer(
+            'username',
+            ('name', 'get_full_name'),
+            ('group', 'profile.group.name'),
+            ('friends', 'friends', Serializer('username')),
+        )
+
+        @action
+        def index(self):
+            self.users = models.User.objects.all()
+
+        index.exposes = 'users'
+
+Each field is one of:
+
+*   A name, which is both the key and the attribute to fetch.
+*   A `(key, path)` pair, where `path` is a dotted attribute path. If the
+    value found is callable (like a method), it's called with no arguments.
+    If any link before the end of the path is `None`, the value is `None`.
+*   A `(key, path, serializer)` triple, for related objects. A related
+    manager or queryset is serialized as a list; a single object as a dict.
+
+The declaration is compiled into Python functions which build each row (or
+dict) with plain attribute access (and `None` checks), much as
+`collections.namedtuple()` compiles its classes. This happens once per
+serializer and model class, when the first object of that class is
+serialized, so a collection is serialized by calling one function per object,
+with no per-field interpretation or method calls.
+"""
+
+import keyword
+import re
+
+__all__ = ['Serializer']
+
+
+PATH_RE = re.compile(r'^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$')
+
+
+class Serializer(object):
+
+    """
+    A compiled list of fields to extract from objects.
+
+        >>> class Obj(object):
+        ...     def __init__(self, **attrs):
+        ...         self.__dict__.update(attrs)
+
+        >>> owner = Obj(name='zack', get_title=lambda: 'Mr')
+        >>> obj = Obj(id=1, owner=owner)
+
+        >>> serializer = Serializer('id', ('owner', 'owner.name'),
+        ...                         ('title', 'owner.get_title'))
+        >>> serializer.keys
+        ('id', 'owner', 'title')
+        >>> serializer.row(obj)
+        (1, 'zack', 'Mr')
+        >>> sorted(serializer.serialize(obj).items())
+        [('id', 1), ('owner', 'zack'), ('title', 'Mr')]
+
+    Nested serializers handle related objects:
+
+        >>> nested = Serializer('id', ('owner', 'owner', Serializer('name')))
+        >>> nested.serialize(obj)['owner']
+        {'name': 'zack'}
+        >>> nested.serialize(Obj(id=2, owner=None))['owner'] is None
+        True
+
+    """
+
+    def __init__(self, *fields):
+        keys, paths, nested = [], [], []
+        for index, field in enumerate(fields):
+            if isinstance(field, basestring):
+                field = (field, field)
+            if not (PATH_RE.match(field[1]) and
+                    not any(map(keyword.iskeyword, field[1].split('.')))):
+                raise ValueError("Invalid attribute path: %r" % (field[1],))
+            keys.append(field[0])
+            paths.append(field[1])
+            if len(field) > 2:
+                nested.append((index, field[2]))
+
+        self.fields = fields
+        self.keys = tuple(keys)
+        self.paths = tuple(paths)
+        self._nested = tuple(nested)
+        self._compiled = {}
+
+    def __repr__(self):
+        return "<Serializer %s>" % (", ".join(self.keys),)
+
+    def row(self, obj):
+        """Return a tuple of the field values for `obj`, in field order."""
+
+        return self._compile(obj)[0](obj)
+
+    def rows(self, objects):
+        """Yield a value tuple for each of `objects`."""
+
+        return self._map(0, objects)
+
+    def serialize(self, obj):
+        """Return a dict of the fields of `obj`."""
+
+        return self._compile(obj)[1](obj)
+
+    def serialize_many(self, objects):
+        """Return a list of dicts, one for each of `objects`."""
+
+        return list(self._map(1, objects))
+
+    def _map(self, which, objects):
+        # Objects usually all have the same class, so only look the compiled
+        # function up again when it changes.
+        cls = function = None
+        for obj in objects:
+            if obj.__class__ is not cls:
+                cls = obj.__class__
+                function = self._compile(obj)[which]
+            yield function(obj)
+
+    def apply(self, value):
+
+        """
+        Serialize an exposed value, if it's something this serializer handles.
+
+        Model instances are serialized as dicts, and querysets, pages and lists
+        of model instances as lists of dicts. Anything else is returned as-is.
+        """
+
+        from django.db.models import Model
+        from django.db.models.query import QuerySet
+        from dagny.pagination import Page
+
+        if isinstance(value, Model):
+            return self.serialize(value)
+        if isinstance(value, (QuerySet, Page)):
+            return self.serialize_many(value)
+        if (isinstance(value, (list, tuple)) and value and
+                isinstance(value[0], Model)):
+            return self.serialize_many(value)
+        return value
+
+    def apply_related(self, value):
+        """Serialize a related object, manager or queryset."""
+
+        if value is None:
+            return None
+        if hasattr(value, 'all'):
+            return self.serialize_many(value.all())
+        return self.serialize(value)
+
+    def _compile(self, obj):
+
+        """
+        Return `(to_row, to_dict)` functions for objects of `obj`'s class.
+
+        Fields whose values on `obj` are callable will be called by the
+        compiled functions; nested serializers are applied to their fields.
+        If a link in a field's path is `None` on `obj`, so it can't be told
+        whether the field is callable, that's checked for each object.
+        """
+
+        functions = self._compiled.get(obj.__class__)
+        if functions is not None:
+            return functions
+
+        lines = []
+        for index, path in enumerate(self.paths):
+            names = path.split('.')
+            lines.append('v%d = obj.%s' % (index, names[0]))
+            for name in names[1:]:
+                lines.append('if v%d is not None: v%d = v%d.%s' % (
+                    index, index, index, name))
+            value, found = follow(obj, names)
+            if not found:
+                lines.append('if callable(v%d): v%d = v%d()' % (
+                    index, index, index))
+            elif callable(value) and len(names) > 1:
+                lines.append('if v%d is not None: v%d = v%d()' % (
+                    index, index, index))
+            elif callable(value):
+                lines.append('v%d = v%d()' % (index, index))
+        for index, _ in self._nested:
+            lines.append('v%d = n%d(v%d)' % (index, index, index))
+
+        # Keys and nested serializers are passed in as arguments, so that only
+        # the (validated) attribute paths appear in the generated source.
+        arg_names = ['k%d' % i for i in xrange(len(self.keys))]
+        arg_names.extend('n%d' % index for index, _ in self._nested)
+        args = list(self.keys)
+        args.extend(serializer.apply_related for _, serializer in self._nested)
+        body = ''.join('        %s\n' % line for line in lines)
+        source = ('def make(%s):\n'
+                  '    def to_row(obj):\n%s        return (%s,)\n'
+                  '    def to_dict(obj):\n%s        return {%s}\n'
+                  '    return to_row, to_dict\n') % (
+            ', '.join(arg_names),
+            body, ', '.join('v%d' % i for i in xrange(len(self.keys))),
+            body, ', '.join('k%d: v%d' % (i, i)
+                            for i in xrange(len(self.keys))))
+        namespace = {}
+        exec source in namespace
+        functions = namespace['make'](*args)
+
+        self._compiled[obj.__class__] = functions
+        return functions
+
+
+def follow(obj, names):
+
+    """
+    Follow a path of attribute names from `obj`.
+
+    Returns `(value, True)`, or `(None, False)` if a link before the end of
+    the path is `None`.
+    """
+
+    for name in names[:-1]:
+        obj = getattr(obj, name)
+        if obj is None:
+            return None, False
+    return getattr(obj, names[-1]), True
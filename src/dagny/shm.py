@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+
+"""
+A fixed-size cache in shared memory, for all the processes on one host.
+
+Under a pre-forking server every worker has its own in-process caches, so
+each one warms up separately, and hit rates are divided by the number of
+workers. A `SharedMemoryCache` lives in a memory-mapped file (put it on a
+`tmpfs`, such as `/dev/shm`), so every process which opens the same path sees
+the same entries, without running a cache server:
+
+    from dagny.shm import SharedMemoryCache
+
+    cache = SharedMemoryCache('/dev/shm/myproject-dagny', size=64 * 1024 * 1024)
+    cache.set('key', {'any': 'picklable value'}, timeout=60)
+    cache.get('key')
+
+The file is divided into fixed-size slots, grouped into small sets. A key is
+hashed to one set, and can be stored in any of its slots; when they're all in
+use, the least recently used entry in the set is evicted. Each set has its
+own lock (a `fcntl` byte-range lock, plus a thread lock within a process), so
+operations on different keys rarely wait on each other. Values larger than a
+slot aren't stored at all.
+
+`SharedMemoryBackend` makes one usable through Django's cache framework, and
+so by `dagny.cache.ResponseCache`:
+
+    CACHES = {
+        'default': {...},
+        'shared': {
+            'BACKEND': 'dagny.shm.SharedMemoryBackend',
+            'LOCATION': '/dev/shm/myproject-dagny',
+            'OPTIONS': {'SIZE': 64 * 1024 * 1024, 'SLOT_SIZE': 16 * 1024},
+        },
+    }
+
+It can also back the content negotiation memo; see
+`dagny.conneg.SHARED_MATCH_CACHE`.
+"""
+
+from contextlib import contextmanager
+import cPickle as pickle
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.core.cache.backends.base import BaseCache
+
+__all__ = ['SharedMemoryCache', 'SharedMemoryBackend']
+
+
+MAGIC = 'DAGNYSH1'
+
+# The file header: magic, number of sets, slots per set and slot size. It's
+# padded to HEADER_SIZE bytes.
+HEADER = struct.Struct('<8sIII')
+HEADER_SIZE = 64
+
+# Counters for each set, in the order of STATS_FIELDS.
+STATS = struct.Struct('<QQQQQ')
+STATS_FIELDS = ('hits', 'misses', 'sets', 'evictions', 'oversize')
+HITS, MISSES, SETS, EVICTIONS, OVERSIZE = range(len(STATS_FIELDS))
+
+# The header of each slot: the MD5 digest of the key, the time it expires (or
+# 0), the time it was last used (or 0 if the slot is empty), and the length
+# of the pickled value which follows.
+SLOT = struct.Struct('<16sddI')
+LAST_USED = struct.Struct('<d')
+LAST_USED_OFFSET = 24
+
+DEFAULT_SIZE = 64 * 1024 * 1024
+DEFAULT_SLOT_SIZE = 16 * 1024
+DEFAULT_WAYS = 8
+
+# Sets share this many thread locks within a process.
+THREAD_LOCKS = 64
+
+
+class SharedMemoryCache(object):
+
+    """
+    A cache of picklable values, in a memory-mapped file shared by processes.
+
+    :param path:
+        The file to map. It's created if it doesn't exist; every process
+        sharing it must pass the same `size`, `slot_size` and `ways`.
+    :param size:
+        The total size of the slots, in bytes.
+    :param slot_size:
+        The size of each slot, including a 36-byte header. This is the limit
+        on the size of each (pickled) value.
+    :param ways:
+        The number of slots in each set; a key can be stored in any of them.
+    """
+
+    def __init__(self, path, size=DEFAULT_SIZE, slot_size=DEFAULT_SLOT_SIZE,
+                 ways=DEFAULT_WAYS):
+        if slot_size <= SLOT.size:
+            raise ValueError("slot_size must be larger than %d bytes" %
+                             (SLOT.size,))
+        self.path = path
+        self.slot_size = slot_size
+        self.ways = ways
+        self.sets = max(1, size // (slot_size * ways))
+        self._stats_offset = HEADER_SIZE
+        self._slots_offset = HEADER_SIZE + self.sets * STATS.size
+        self._length = self._slots_offset + self.sets * ways * slot_size
+        self._map = None
+        self._fd = None
+        self._open_lock = threading.Lock()
+        self._thread_locks = [threading.Lock()
+                              for i in xrange(min(self.sets, THREAD_LOCKS))]
+
+    def __repr__(self):
+        return "<SharedMemoryCache %r sets=%d ways=%d slot_size=%d>" % (
+            self.path, self.sets, self.ways, self.slot_size)
+
+    @property
+    def capacity(self):
+        """The maximum number of entries."""
+
+        return self.sets * self.ways
+
+    def get(self, key, default=None):
+        digest, index = self._locate(key)
+        with self._locked(index):
+            offset, length = self._find(index, digest)[0]
+            if offset is None:
+                self._count(index, MISSES)
+                return default
+            start = offset + SLOT.size
+            data = self._map[start:start + length]
+            LAST_USED.pack_into(self._map, offset + LAST_USED_OFFSET,
+                                time.time())
+            self._count(index, HITS)
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout=None):
+        """Store a value, for `timeout` seconds (or until it's evicted)."""
+
+        return self._store(key, value, timeout, replace=True)
+
+    def add(self, key, value, timeout=None):
+        """Store a value if the key isn't already present; return success."""
+
+        return self._store(key, value, timeout, replace=False)
+
+    def delete(self, key):
+        digest, index = self._locate(key)
+        with self._locked(index):
+            offset = self._find(index, digest)[0][0]
+            if offset is not None:
+                self._map[offset:offset + SLOT.size] = '\0' * SLOT.size
+
+    def incr(self, key, delta=1):
+        """Atomically add `delta` to a stored number, returning the result."""
+
+        digest, index = self._locate(key)
+        with self._locked(index):
+            offset, length = self._find(index, digest)[0]
+            if offset is None:
+                raise ValueError("Key '%s' not found" % (key,))
+            start = offset + SLOT.size
+            value = pickle.loads(self._map[start:start + length]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            expires = SLOT.unpack_from(self._map, offset)[1]
+            self._write(offset, digest, expires, data)
+        return value
+
+    def clear(self):
+        """Remove every entry (but keep the statistics)."""
+
+        self._open()
+        empty = '\0' * SLOT.size
+        for index in xrange(self.sets):
+            with self._locked(index):
+                for offset in self._slot_offsets(index):
+                    self._map[offset:offset + SLOT.size] = empty
+
+    def stats(self):
+
+        """
+        Return a dict of statistics, summed over every process.
+
+        The keys are `hits`, `misses`, `sets` (successful stores),
+        `evictions` (live entries replaced to make room), `oversize` (values
+        too large for a slot), `entries` (the number of live entries) and
+        `capacity`.
+        """
+
+        self._open()
+        totals = [0] * len(STATS_FIELDS)
+        entries = 0
+        now = time.time()
+        for index in xrange(self.sets):
+            counts = STATS.unpack_from(self._map,
+                                       self._stats_offset + index * STATS.size)
+            totals = map(sum, zip(totals, counts))
+            for offset in self._slot_offsets(index):
+                expires, used = SLOT.unpack_from(self._map, offset)[1:3]
+                if used and not (expires and expires <= now):
+                    entries += 1
+        stats = dict(zip(STATS_FIELDS, totals))
+        stats.update(entries=entries, capacity=self.capacity)
+        return stats
+
+    def _store(self, key, value, timeout, replace):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        digest, index = self._locate(key)
+        expires = 0 if timeout is None else time.time() + timeout
+        with self._locked(index):
+            (offset, length), (victim, live) = self._find(index, digest)
+            if len(data) > self.slot_size - SLOT.size:
+                # Don't leave an older value behind to be served instead.
+                if offset is not None:
+                    self._map[offset:offset + SLOT.size] = '\0' * SLOT.size
+                self._count(index, OVERSIZE)
+                return False
+            if offset is not None and not replace:
+                return False
+            if offset is None:
+                offset = victim
+                if live:
+                    self._count(index, EVICTIONS)
+            self._write(offset, digest, expires, data)
+            self._count(index, SETS)
+        return True
+
+    def _write(self, offset, digest, expires, data):
+        SLOT.pack_into(self._map, offset, digest, expires, time.time(),
+                       len(data))
+        start = offset + SLOT.size
+        self._map[start:start + len(data)] = data
+
+    def _locate(self, key):
+        """Return the digest of a key, and the index of its set."""
+
+        self._open()
+        if isinstance(key, unicode):
+            key = key.encode('utf-8')
+        digest = hashlib.md5(key).digest()
+        return digest, struct.unpack_from('<Q', digest)[0] % self.sets
+
+    def _slot_offsets(self, index):
+        base = self._slots_offset + index * self.ways * self.slot_size
+        return xrange(base, base + self.ways * self.slot_size, self.slot_size)
+
+    def _find(self, index, digest):
+
+        """
+        Look for a key in its set.
+
+        Returns `((offset, length), (victim, live))`: the offset and length of
+        the key's slot (or `None`s if it's not present), and the offset of
+        the slot to store it in otherwise, with whether that slot holds a live
+        entry which would be evicted.
+        """
+
+        now = time.time()
+        victim = victim_used = None
+        for offset in self._slot_offsets(index):
+            key, expires, used, length = SLOT.unpack_from(self._map, offset)
+            expired = expires and expires <= now
+            if used and not expired and key == digest:
+                return (offset, length), (None, False)
+            if not used or expired:
+                used = 0
+            if victim is None or used < victim_used:
+                victim, victim_used = offset, used
+        return (None, None), (victim, victim_used > 0)
+
+    def _count(self, index, field):
+        offset = self._stats_offset + index * STATS.size + field * 8
+        count, = struct.unpack_from('<Q', self._map, offset)
+        struct.pack_into('<Q', self._map, offset, count + 1)
+
+    @contextmanager
+    def _locked(self, index):
+        # `fcntl` locks belong to the process, so threads need their own.
+        start = self._stats_offset + index * STATS.size
+        with self._thread_locks[index % len(self._thread_locks)]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, start)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, start)
+
+    def _open(self):
+        if self._map is not None:
+            return
+        with self._open_lock:
+            if self._map is not None:
+                return
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0600)
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)
+                try:
+                    self._initialize(fd)
+                finally:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, 1, 0)
+                self._map = mmap.mmap(fd, self._length)
+            except:
+                os.close(fd)
+                raise
+            self._fd = fd
+
+    def _initialize(self, fd):
+        header = HEADER.pack(MAGIC, self.sets, self.ways, self.slot_size)
+        os.lseek(fd, 0, os.SEEK_SET)
+        existing = os.read(fd, HEADER.size)
+        if existing == header and os.fstat(fd).st_size == self._length:
+            return
+        if existing.startswith(MAGIC):
+            # Truncating a file other processes have mapped would crash them.
+            raise ValueError("%s is in use with a different size; remove it, "
+                             "or use another path" % (self.path,))
+        os.ftruncate(fd, self._length)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, header)
+
+
+class SharedMemoryBackend(BaseCache):
+
+    """
+    A Django cache backend storing entries in a `SharedMemoryCache`.
+
+    `LOCATION` is the path of the file, and the `SIZE`, `SLOT_SIZE` and
+    `WAYS` options are passed to `SharedMemoryCache`.
+    """
+
+    def __init__(self, location, params):
+        BaseCache.__init__(self, params)
+        options = params.get('OPTIONS', {})
+        self._cache = SharedMemoryCache(
+            location,
+            size=int(options.get('SIZE', DEFAULT_SIZE)),
+            slot_size=int(options.get('SLOT_SIZE', DEFAULT_SLOT_SIZE)),
+            ways=int(options.get('WAYS', DEFAULT_WAYS)))
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return self.default_timeout
+        return timeout
+
+    def add(self, key, value, timeout=None, version=None):
+        return self._cache.add(self._key(key, version), value,
+                               self._timeout(timeout))
+
+    def get(self, key, default=None, version=None):
+        return self._cache.get(self._key(key, version), default)
+
+    def set(self, key, value, timeout=None, version=None):
+        self._cache.set(self._key(key, version), value,
+                        self._timeout(timeout))
+
+    def delete(self, key, version=None):
+        self._cache.delete(self._key(key, version))
+
+    def incr(self, key, delta=1, version=None):
+        return self._cache.incr(self._key(key, version), delta)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""
+Russian-doll caching of template fragments.
+
+Load the tag library (with `'dagny'` in `INSTALLED_APPS`), and wrap the parts
+of a template which depend only on a few objects in `{% cachefragment %}`:
+
+    {% load dagny_cache %}
+
+    {% cachefragment users %}
+      <ul>
+        {% cachefragment user in users %}
+          <li><a href="{% url User#show user.id %}">{{ user.username }}</a></li>
+        {% endcachefragment %}
+      </ul>
+    {% endcachefragment %}
+
+A fragment's cache key is made from the objects after the tag name: a model
+instance contributes its model, primary key and version field (`updated_at`,
+unless you pass `version="..."`); a sequence or `QuerySet` contributes the
+keys of all its members; anything else contributes its string value. Each key
+also includes a digest of the fragment's template source, so editing a
+fragment invalidates it (and every fragment enclosing it).
+
+This makes fragments nest: when one user changes, the outer fragment's key
+changes, so it's rendered again; but all the other users' fragments are still
+in the cache, and only the changed one is rendered. The `item in sequence`
+form renders the fragment for each member, fetching all of their entries with
+a single `get_many()`.
+
+Pass `timeout=...` to override the cache's default timeout. Fragments are
+kept in the cache named by the `DAGNY_FRAGMENT_CACHE` setting (`'default'`).
+Since entries are only found, never invalidated, the version field must
+change whenever anything rendered from the object does.
+"""
+
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.db.models import Model
+from django.utils.encoding import smart_str
+
+from dagny.cache import KEY_PREFIX, get_backend
+
+register = template.Library()
+
+
+DEFAULT_VERSION_FIELD = 'updated_at'
+
+OPTIONS = ('timeout', 'version')
+
+
+@register.tag
+def cachefragment(parser, token):
+    bits = token.split_contents()
+    tag_name, bits = bits[0], bits[1:]
+    options = {}
+    while bits and '=' in bits[-1]:
+        name, value = bits.pop().split('=', 1)
+        if name not in OPTIONS:
+            raise template.TemplateSyntaxError(
+                "Unknown option for %r: %r" % (tag_name, name))
+        options[name] = parser.compile_filter(value)
+
+    loop_var = None
+    if len(bits) == 3 and bits[1] == 'in':
+        loop_var, bits = bits[0], bits[2:]
+    if not bits:
+        raise template.TemplateSyntaxError(
+            "%r needs at least one object to key the fragment on" % tag_name)
+
+    # The tokens making up the fragment are hashed into its keys, so that
+    # changes to the template invalidate it.
+    tokens = parser.tokens[:]
+    nodelist = parser.parse(('end' + tag_name,))
+    source = tokens[:len(tokens) - len(parser.tokens)]
+    parser.delete_first_token()
+    digest = hashlib.md5('\0'.join(
+        '%d:%s' % (token.token_type, smart_str(token.contents))
+        for token in source)).hexdigest()
+
+    return CacheFragmentNode(nodelist, digest,
+                             map(parser.compile_filter, bits), loop_var,
+                             options.get('timeout'), options.get('version'))
+
+
+class CacheFragmentNode(template.Node):
+
+    def __init__(self, nodelist, digest, objects, loop_var=None, timeout=None,
+                 version=None):
+        self.nodelist = nodelist
+        self.digest = digest
+        self.objects = objects
+        self.loop_var = loop_var
+        self.timeout = timeout
+        self.version = version
+
+    def render(self, context):
+        backend = get_backend(getattr(settings, 'DAGNY_FRAGMENT_CACHE',
+                                      'default'))
+        timeout = version = None
+        if self.timeout is not None:
+            timeout = int(self.timeout.resolve(context))
+        if self.version is not None:
+            version = self.version.resolve(context) or None
+
+        if self.loop_var is None:
+            key = self.key([obj.resolve(context) for obj in self.objects],
+                           version)
+            content = backend.get(key)
+            if content is None:
+                content = self.nodelist.render(context)
+                backend.set(key, content, timeout)
+            return content
+
+        items = list(self.objects[0].resolve(context) or ())
+        keys = [self.key([item], version) for item in items]
+        cached = backend.get_many(keys)
+        output, rendered = [], {}
+        for item, key in zip(items, keys):
+            content = cached.get(key)
+            if content is None:
+                context.push()
+                try:
+                    context[self.loop_var] = item
+                    content = rendered[key] = self.nodelist.render(context)
+                finally:
+                    context.pop()
+            output.append(content)
+        if rendered:
+            backend.set_many(rendered, timeout)
+        return ''.join(output)
+
+    def key(self, objects, version):
+        parts = '\0'.join(key_part(obj, version) for obj in objects)
+        return '%s:fragment:%s:%s' % (KEY_PREFIX, self.digest,
+                                      hashlib.md5(parts).hexdigest())
+
+
+def key_part(value, version=None):
+
+    """
+    Return the part of a fragment's cache key which identifies an object.
+
+        >>> key_part(u'zack')
+        'zack'
+        >>> key_part([1, 2, 3]) == key_part((1, 2, 3))
+        True
+
+    Model instances are versioned by their `version` field, or else by
+    `DEFAULT_VERSION_FIELD`. Models with neither can't be cached, since edits
+    to them would never change their key.
+    """
+
+    if isinstance(value, Model):
+        if version is None:
+            try:
+                stamp = getattr(value, DEFAULT_VERSION_FIELD)
+            except AttributeError:
+                raise template.TemplateSyntaxError(
+                    "%s has no %r field; pass `version=` to "
+                    "{%% cachefragment %%} to name the field that changes "
+                    "when it does" % (value._meta.object_name,
+                                      DEFAULT_VERSION_FIELD))
+        else:
+            try:
+                stamp = getattr(value, version)
+            except AttributeError:
+                raise template.TemplateSyntaxError(
+                    "%s has no version field %r (given as `version=` to "
+                    "{%% cachefragment %%})" % (value._meta.object_name,
+                                                 version))
+        return '%s.%s:%s:%s' % (value._meta.app_label,
+                                value._meta.object_name, value.pk, stamp)
+    if isinstance(value, basestring):
+        return smart_str(value)
+    if hasattr(value, '__iter__'):
+        return hashlib.md5('\0'.join(key_part(item, version)
+                                     for item in value)).hexdigest()
+    return smart_str(value)
@@ -1,4 +1,10 @@
+from collections import namedtuple
+
 from django.conf.urls import defaults
+from django.core.urlresolvers import RegexURLResolver, get_resolver
+
+from dagny.action import Action
+from dagny.resource import Resource
 
 
 class URLRouter(object):
@@ -15,7 +21,8 @@ class URLRouter(object):
     def __init__(self, style):
         self.style = style
 
-    def _make_patterns(self, resource_name, id, name, actions, urls):
+    def _make_patterns(self, resource_name, id, name, actions, urls,
+                       bulk=False):
 
         """
         Construct an `include()` with all the URLs for a resource.
@@ -38,6 +45,10 @@ class URLRouter(object):
             A list of the URLs to define patterns for. Must be made up only of
             'member', 'collection', 'new', 'edit', 'singleton' and
             'singleton_edit'.
+        :param bulk:
+            If `True`, also route the style's `BULK_METHODS` on the
+            collection URL. These are passed to the resource separately, as
+            the `bulk_methods` kwarg.
         """
 
         if actions is not None:
@@ -54,20 +65,95 @@ class URLRouter(object):
             methods = dict(
                 (method, action) for method, action in methods.iteritems()
                 if (actions is None) or (action in actions))
+            kwargs = {'methods': methods}
+            if bulk and url == 'collection':
+                kwargs['bulk_methods'] = dict(
+                    (method, action)
+                    for method, action in self.style.BULK_METHODS.iteritems()
+                    if (actions is None) or (action in actions))
             # Add named url patterns, one per action. Note that we will have
             # duplicate URLs in some cases, but this is so that
             # `{% url User#show %}` can be distinguished from
             # `{% url User#update %}` when it makes sense.
-            for action in methods.itervalues():
+            action_names = set(methods.itervalues())
+            action_names.update(kwargs.get('bulk_methods', {}).itervalues())
+            for action in sorted(action_names):
                 urlpatterns.append(defaults.url(pattern, resource_name,
-                                                kwargs={'methods': methods},
+                                                kwargs=kwargs,
                                                 name=("%s#%s" % (name, action))))
         return defaults.include(defaults.patterns('', *urlpatterns))
 
-    def resources(self, resource_name, id=r'\d+', actions=None, name=None):
+    def resources(self, resource_name, id=r'\d+', actions=None, name=None,
+                  bulk=False):
         return self._make_patterns(resource_name, id, name, actions,
-                                   ['collection', 'new', 'member', 'edit'])
+                                   ['collection', 'new', 'member', 'edit'],
+                                   bulk=bulk)
 
     def resource(self, resource_name, actions=None, name=None):
         return self._make_patterns(resource_name, '', name, actions,
                                    ['singleton', 'new', 'singleton_edit'])
+
+
+# A single Dagny URL pattern, as found by `iter_routes()`.
+Route = namedtuple('Route', 'name regex resource methods')
+
+
+def iter_routes(urlconf=None):
+
+    """
+    Yield a `Route` for every Dagny URL pattern in a URLconf.
+
+    This walks the full URLconf (defaulting to `settings.ROOT_URLCONF`),
+    including any `include()`s, and picks out the patterns generated by
+    `URLRouter`. Each `Route` has the pattern's `name` (e.g. `'User#show'`,
+    prefixed with any enclosing namespaces, as you would pass it to
+    `reverse()`), its full `regex` (with the prefixes of any enclosing
+    `include()`s), the `resource` class and the `methods` dict mapping HTTP
+    methods to action names.
+
+    Note that resolving the resource class will import it, if it was given to
+    the router as a string.
+    """
+
+    return _iter_routes(get_resolver(urlconf), '', '')
+
+
+def _iter_routes(resolver, prefix, namespace):
+    for pattern in resolver.url_patterns:
+        regex = prefix + pattern.regex.pattern.lstrip('^')
+        if isinstance(pattern, RegexURLResolver):
+            sub_namespace = namespace
+            if pattern.namespace:
+                sub_namespace += pattern.namespace + ':'
+            for route in _iter_routes(pattern, regex, sub_namespace):
+                yield route
+        elif 'methods' in pattern.default_args:
+            callback = pattern.callback
+            if isinstance(callback, type) and issubclass(callback, Resource):
+                name = pattern.name and (namespace + pattern.name)
+                yield Route(name, '^' + regex, callback,
+                            pattern.default_args['methods'])
+
+
+def routed_actions(routes):
+
+    """
+    Yield `(label, resource, action, methods)` for every routed action.
+
+    `label` is of the form `'User#show'`; `methods` is the list of HTTP methods
+    which route to the action. Each action is only yielded once per resource,
+    however many times it is routed.
+    """
+
+    seen = {}
+    for route in routes:
+        for method, action_name in route.methods.iteritems():
+            action = getattr(route.resource, action_name, None)
+            if not isinstance(action, Action):
+                continue
+            key = (route.resource, action_name)
+            seen.setdefault(key, (route.resource, action, set()))[2].add(method)
+
+    for (resource, action_name), (_, action, methods) in sorted(seen.items()):
+        yield ("%s#%s" % (resource.__name__, action_name), resource, action,
+               sorted(methods))
@@ -32,6 +32,16 @@ class URLStyle(object):
         'singleton_edit': {'GET': 'edit'},
     }
 
+    # Extra methods routed on the collection when `bulk=True` is passed to
+    # `resources()`. A `POST` is only routed to `bulk_create` if its body is a
+    # JSON list; otherwise it goes to `create` as usual.
+    BULK_METHODS = {
+        'POST': 'bulk_create',
+        'PUT': 'bulk_update',
+        'PATCH': 'bulk_update',
+        'DELETE': 'bulk_destroy',
+    }
+
     def __call__(self, url, id_param):
         id_regex = self._get_id_regex(id_param)
 
@@ -3,6 +3,9 @@
 import re
 
 
+CAMEL_BOUNDARY_RE = re.compile(r'(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))')
+
+
 def camel_to_underscore(camel_string):
 
     """
@@ -24,9 +27,7 @@ def camel_to_underscore(camel_string):
 
     """
 
-    return re.sub(
-        r'(((?<=[a-z])[A-Z])|([A-Z](?![A-Z]|$)))', r'_\1',
-        camel_string).lower().strip('_')
+    return CAMEL_BOUNDARY_RE.sub(r'_\1', camel_string).lower().strip('_')
 
 
 def resource_name(resource_cls):
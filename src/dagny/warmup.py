@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+Boot-time warmup for pre-forking servers.
+
+Resources referenced by string in the URLconf are only imported when a URL
+pattern is first resolved, and a lot of Dagny's lookup state is built lazily
+on the first request to each action. Under a pre-forking server (e.g.
+gunicorn), every worker pays for this separately, and every worker ends up with
+its own private copy of the resulting objects.
+
+Calling `warmup()` in the master process before it forks does all of that work
+up front, so that it can be shared copy-on-write between the workers. With
+gunicorn, for example, enable `preload_app` and call it from your WSGI module:
+
+    import django.core.handlers.wsgi
+    from dagny.warmup import warmup
+
+    application = django.core.handlers.wsgi.WSGIHandler()
+    warmup()
+
+"""
+
+import gc
+
+from django.core.urlresolvers import get_resolver
+
+from dagny import conneg
+from dagny.action import Action
+from dagny.renderers import (get_fragment_template_name, get_template_engine,
+                             get_template_name, load_template, render_fragment,
+                             render_html)
+from dagny.urls.router import iter_routes, routed_actions
+
+__all__ = ['warmup', 'precompile_templates']
+
+
+# Accept headers used to pre-populate the content negotiation memo. These are
+# what browsers, XHR libraries and command-line clients send by default.
+ACCEPT_HEADERS = [
+    'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'application/json, text/javascript, */*; q=0.01',
+    'application/json',
+    '*/*',
+]
+
+# HTTP methods whose responses are rendered (rather than redirected) by
+# convention, and so should have templates.
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def warmup(urlconf=None, accept_headers=None, templates=True, freeze=True):
+
+    """
+    Import every routed resource and build its lookup tables.
+
+    This will:
+
+    *   Populate the URL resolver's reverse lookup tables, importing every view
+        (and so every Dagny resource) in the process. The regexes themselves
+        are compiled as the URLconf is loaded.
+
+    *   Build the negotiation table for every routed action, by matching each
+        of `accept_headers` (defaulting to `ACCEPT_HEADERS`) against the
+        action's renderer backends.
+
+    *   Load and compile the HTML template for every routed `GET` action (see
+        `precompile_templates()`), unless `templates` is false. Templates
+        which fail to load are skipped; use the `checkresources` or
+        `precompiletemplates` commands to find them.
+
+    *   Run a full garbage collection and, where the interpreter supports it
+        (Python 3.7+), call `gc.freeze()` so that the surviving objects are
+        never touched by the collector again. Without this, a collection in a
+        worker would write to the objects' headers and un-share their pages.
+        Pass `freeze=False` to skip this step.
+
+    Returns the list of `dagny.urls.router.Route`s which were warmed up.
+    """
+
+    if accept_headers is None:
+        accept_headers = ACCEPT_HEADERS
+
+    get_resolver(urlconf).reverse_dict
+
+    routes = list(iter_routes(urlconf))
+    seen = set()
+    for route in routes:
+        for action_name in route.methods.itervalues():
+            action = getattr(route.resource, action_name, None)
+            if not isinstance(action, Action) or action in seen:
+                continue
+            seen.add(action)
+            _warmup_action(action, accept_headers)
+
+    if templates:
+        precompile_templates(routes=routes)
+
+    if freeze:
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+    return routes
+
+
+def _warmup_action(action, accept_headers):
+    """Pre-compute the negotiation results for an action's renderer."""
+
+    shortcodes = action.render._keys()
+    for header in accept_headers:
+        conneg.match_accept(header, shortcodes)
+
+
+def precompile_templates(urlconf=None, routes=None, cache=True):
+
+    """
+    Load and compile the template for every routed action rendered as HTML.
+
+    This covers every action routed to by `GET` whose HTML backend is the
+    generic `render_html`, using the same template names it does. If `cache`
+    is true, the compiled templates are stored in `render_html`'s template
+    cache (unless `TEMPLATE_DEBUG` is on). Templates are loaded through the
+    configured `TEMPLATE_LOADERS`, so a `django.template.loaders.cached.Loader`
+    will also be populated. Templates for the Jinja2 engine are compiled into
+    its environment (and so its bytecode cache).
+
+    Partial templates for the generic `render_fragment` backend are compiled
+    too. Since actions may leave them out (and render the full page instead),
+    a missing partial is only a failure if the action names it with
+    `fragment_template_name`.
+
+    Returns a pair of lists: `(label, template_name)` for each template which
+    was compiled, and `(label, template_name, exception)` for each which was
+    missing or invalid.
+    """
+
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError
+    from django.template.loader import get_template
+
+    if routes is None:
+        routes = list(iter_routes(urlconf))
+    load = load_template if cache else get_template
+
+    compiled, failures = [], []
+    for label, resource, action, methods in routed_actions(routes):
+        if not set(methods).intersection(SAFE_METHODS):
+            continue
+        jinja = get_template_engine(action, resource) == 'jinja2'
+
+        template_names = []
+        if action.render._get('html') is render_html:
+            template_names.append((get_template_name(action, resource), True))
+        if action.render._get('fragment') is render_fragment:
+            template_names.append((
+                get_fragment_template_name(action, resource),
+                getattr(action, 'fragment_template_name', None) is not None))
+
+        for template_name, required in template_names:
+            try:
+                if jinja:
+                    _load_jinja_template(template_name)
+                else:
+                    load(template_name)
+            except TemplateDoesNotExist, exc:
+                if required:
+                    failures.append((label, template_name, exc))
+            except TemplateSyntaxError, exc:
+                failures.append((label, template_name, exc))
+            else:
+                compiled.append((label, template_name))
+    return compiled, failures
+
+
+def _load_jinja_template(template_name):
+    """Compile a Jinja2 template, raising Django's exceptions on failure."""
+
+    import jinja2
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError
+    from dagny.jinja import get_environment
+
+    try:
+        get_environment().get_template(template_name)
+    except jinja2.TemplateNotFound:
+        raise TemplateDoesNotExist(template_name)
+    except jinja2.TemplateSyntaxError, exc:
+        raise TemplateSyntaxError("%s (line %s)" % (exc.message, exc.lineno))